@@ -142,7 +142,7 @@ def update_available_armatures():
     # Get subdirectory names
     subdirs = [
         name for name in os.listdir(hierarchy_dir)
-        if os.path.isdir(os.path.join(hierarchy_dir, name))
+        if not name.startswith(".") and os.path.isdir(os.path.join(hierarchy_dir, name))
     ]
 
     # Optional: only include subdirs that have .json files inside
@@ -2,6 +2,7 @@ from mathutils import Vector, Euler, Quaternion # type: ignore
 import bpy # type: ignore
 import json
 import os
+from ..utils import limb_index, limb_loader, bone_defaults, bone_builder, bone_geometry, bone_collections, rig_diff
 
 def apply_global_transform(armature, meta_data):
     transform = meta_data.get("transform", {})
@@ -40,7 +41,8 @@ def get_or_create_armature(armature_name):
     return arm
 
 def create_bone_in_edit_mode(armature, bone_name, head, tail, parent_name=None):
-    bpy.ops.object.mode_set(mode='EDIT')
+    if armature.mode != 'EDIT':
+        bone_builder.mode_set('EDIT')
     ebones = armature.data.edit_bones
 
     if bone_name in ebones:
@@ -56,92 +58,65 @@ def create_bone_in_edit_mode(armature, bone_name, head, tail, parent_name=None):
 
     return bone
 
-def rebuild_bones_from_json_file(filepath, armature):
-    if not os.path.exists(filepath):
-        raise FileNotFoundError(f"[ERROR] File not found: {filepath}")
-
-    with open(filepath, 'r') as f:
-        data = json.load(f)
+def rebuild_bones_from_json_file(filepath, armature, incremental=False, limb=None):
+    # JSON and binary (.arlb) limb files are both detected here. The first
+    # two passes only need the limb index, full records are read in pass 3.
+    # limb may be a LazyLimb already loaded by limb_loader
+    limb = limb or limb_index.open_limb(filepath)
+    limb_key = os.path.splitext(os.path.basename(str(filepath)))[0]
 
     if not armature or armature.type != 'ARMATURE':
         raise ValueError("Armature not found or invalid")
 
-    bpy.context.view_layer.objects.active = armature
-    bpy.ops.object.mode_set(mode='EDIT')
-
-    bone_data = {k: v for k, v in data.items() if not k.startswith('_')}
-    meta = data.get("_meta", {})
-    apply_global_transform(armature, meta)
-
-    # First pass: create all bones using scaled coordinates
-    for bone_name, attrs in bone_data.items():
-        head = Vector(attrs.get('head', [0, 0, 0]))
-        tail = Vector(attrs.get('tail', [0, 1, 0]))
-        create_bone_in_edit_mode(armature, bone_name, head, tail)
-
-    # Second pass: assign parenting
-    for bone_name, attrs in bone_data.items():
-        parent = attrs.get('parent')
-        if parent and parent in armature.data.edit_bones:
-            armature.data.edit_bones[bone_name].parent = armature.data.edit_bones[parent]
-        else:
-            if parent:
-                print(f"[INFO] Skipping parent assignment for '{bone_name}' - parent '{parent}' not found.")
-
-    # Third pass: pose mode settings
-    bpy.ops.object.mode_set(mode='POSE')
-    for bone_name, attrs in bone_data.items():
-        pose_bone = armature.pose.bones.get(bone_name)
-        if not pose_bone:
-            continue
-        
-        # Add bone to bone collections
-        bone_collections = attrs.get("bone_collections", [])
-        for col_name in bone_collections:
-            if col_name not in armature.data.collections:
-                new_col = armature.data.collections.new(name=col_name)
-            else:
-                new_col = armature.data.collections[col_name]
-
-            bone_ref = armature.data.bones.get(bone_name)
-            if bone_ref:
-                new_col.assign(bone_ref)
-
-         # Custom shape
-        shape_name = attrs.get("custom_shape")
-        if shape_name and shape_name in bpy.data.objects:
-            pose_bone.custom_shape = bpy.data.objects[shape_name]
-
-        # Custom shape transform
-        shape_transform = attrs.get("custom_shape_transform")
-        if shape_transform and shape_transform in bpy.data.objects:
-            pose_bone.custom_shape_transform = bpy.data.objects[shape_transform]
-
-        # Simple vector settings
-        pose_bone.custom_shape_scale_xyz = Vector(attrs.get("custom_shape_scale_xyz", [1.0, 1.0, 1.0]))
-        pose_bone.custom_shape_translation = Vector(attrs.get("custom_shape_translation", [0.0, 0.0, 0.0]))
-        pose_bone.custom_shape_wire_width = attrs.get("custom_shape_wire_width", 0.5)
-        pose_bone.use_custom_shape_bone_size = attrs.get("use_custom_shape_bone_size", False)
-
-        # Lock settings
-        pose_bone.lock_location = attrs.get("lock_location", [False, False, False])
-        pose_bone.lock_rotation = attrs.get("lock_rotation", [False, False, False])
-        pose_bone.lock_rotation_w = attrs.get("lock_rotation_w", False)
-        pose_bone.lock_scale = attrs.get("lock_scale", [False, False, False])
-
-        # Rotation mode
-        pose_bone.rotation_mode = attrs.get("rotation_mode", "QUATERNION")
-        
-    bpy.ops.object.mode_set(mode='OBJECT')
-
-
-
-def main(armature, limb):
+    # Every record is needed below, read them in one pass instead of a
+    # seek per bone. Limbs from limb_loader are already preloaded
+    limb.preload()
+    apply_global_transform(armature, limb.meta)
+
+    if incremental:
+        # Diff against the current armature and only write what changed
+        bones = {name: limb.record(name) for name in limb.names}
+        return rig_diff.rebuild_incremental(armature, limb_key, bones)
+
+    # First and second pass: create and parent every bone in one EDIT
+    # session, then switch straight to POSE mode for the settings
+    new_bones = {name for name in limb.names if name not in armature.data.bones}
+    arrays = limb.bone_arrays()
+    report = bone_builder.build_edit_bones_from_arrays(armature, arrays, exit_mode='POSE')
+
+    # Third pass: collections, custom shapes and colors grouped by value,
+    # then the per-bone pose settings
+    records = {name: limb.record(name) for name in limb.names if name in armature.pose.bones}
+    report.update(bone_collections.apply_bone_appearance(armature, records))
+
+    for bone_name, attrs in records.items():
+        pose_bone = armature.pose.bones[bone_name]
+
+        # Vector, lock and rotation mode settings. Bones created above
+        # already hold the defaults, so only the differing values are written
+        settings = bone_defaults.pose_settings_to_write(attrs, bone_name in new_bones)
+        for key, value in settings.items():
+            setattr(pose_bone, key, value)
+
+    bone_builder.mode_set('OBJECT')
+    report["ops_calls"] += 1
+    rig_diff.record_built_bones(armature, limb_key, limb.names)
+    return report
+
+
+
+def main(armature, limb, incremental=False):
     if not armature:
         print("[INFO] User input pending... run main() again after selection.")
         return
 
-    rebuild_bones_from_json_file(limb, armature)
+    if isinstance(limb, (list, tuple)):
+        # Read and parse every limb in parallel, build them one by one here
+        limbs = limb_loader.load_lazy_limbs(limb)
+        return [rebuild_bones_from_json_file(path, armature, incremental=incremental, limb=lazy)
+                for path, lazy in limbs.items()]
+
+    return rebuild_bones_from_json_file(limb, armature, incremental=incremental)
 
 
 if __name__ == "__main__":
@@ -5,6 +5,7 @@ from mathutils import Vector  # type: ignore
 import bpy # type: ignore
 import json
 from pathlib import Path
+from ..utils import retarget
 
 def vector_sub(a, b):
     return [a[i] - b[i] for i in range(3)]
@@ -57,7 +58,8 @@ def build_segment_dict_from_json(json_path: str) -> Dict[str, Tuple[List[float],
 
 
 def create_bone_in_edit_mode(armature, bone_name, head, tail):
-    bpy.ops.object.mode_set(mode='EDIT')
+    if armature.mode != 'EDIT':
+        bpy.ops.object.mode_set(mode='EDIT')
     ebones = armature.data.edit_bones
 
     if bone_name in ebones:
@@ -115,15 +117,9 @@ def get_data_from_file(filepath):
 
 
 def retarget_ue_bones(source, target):
-    for bone_name in source:
-        if bone_name in target:
-            source[bone_name]["head"] = target[bone_name].get("head")
-            child_name = target[bone_name].get("child")
-            if child_name and child_name in target:
-                source[bone_name]["tail"] = target[child_name].get("head")
-            else:
-                source[bone_name]["tail"] = [0,0,0]
-    return source
+    # Joined by name once; tails come from the target's first child, or the
+    # target's own tail for leaf bones
+    return retarget.retarget_bones(source, target)
 
 def scale_and_apply(armature):
     bpy.ops.object.mode_set(mode='OBJECT')
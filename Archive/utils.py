@@ -2,6 +2,7 @@ import bpy
 import json
 import os
 from mathutils import Vector
+from ..utils import constraint_schema, bone_hierarchy
 
 def print_armature():
     """
@@ -42,17 +43,9 @@ def serialize_vector(vec):
     return [vec.x, vec.y, vec.z]
 
 def serialize_constraint(con):
-    con_data = {"type": con.type}
-    for attr in dir(con):
-        if attr.startswith("__") or attr in {"bl_rna", "rna_type", "type"}:
-            continue
-        try:
-            value = getattr(con, attr)
-            # Avoid serializing Blender types directly
-            if isinstance(value, (str, int, float, bool)) or value is None:
-                con_data[attr] = value
-        except Exception:
-            pass
+    con_data = {"type": con.type, "name": con.name}
+    # Avoid serializing Blender types directly, plain values only
+    con_data.update(constraint_schema.serialize_constraint_values(con, kinds={"value"}))
     return con_data
 
 def serialize_custom_props(bone):
@@ -68,34 +61,27 @@ def serialize_bone_data(armature, root_bone_name, stop_at=[]):
     bpy.ops.object.mode_set(mode='EDIT')
     ebones = armature.data.edit_bones
 
-    data = {}
-    stop_at = set(stop_at)
-
-    def traverse(bone):
-        if bone.name in data:
-            return
-        if bone.name in stop_at:
-            print(f"[STOP] Reached stop bone: {bone.name}")
-            return
+    if root_bone_name not in ebones:
+        print(f"[ERROR] Bone {root_bone_name} not found.")
+        return {}
 
-        data[bone.name] = {
-            "name": bone.name,
+    # Children come from an index built once and walked without recursion
+    index = bone_hierarchy.BoneIndex(ebones)
+    reached_stops = []
+    data = {}
+    for name in index.walk([root_bone_name], stop_at, reached_stops=reached_stops):
+        bone = ebones[name]
+        data[name] = {
+            "name": name,
             "head": serialize_vector(bone.head),
             "tail": serialize_vector(bone.tail),
             "roll": bone.roll,
-            "parent": bone.parent.name if bone.parent else None,
+            "parent": index.parents[name],
             "use_connect": bone.use_connect,
             "custom_properties": serialize_custom_props(bone),
         }
-
-        for child in bone.children:
-            traverse(child)
-
-    if root_bone_name not in ebones:
-        print(f"[ERROR] Bone {root_bone_name} not found.")
-        return {}
-
-    traverse(ebones[root_bone_name])
+    for name in reached_stops:
+        print(f"[STOP] Reached stop bone: {name}")
 
     # Switch to pose mode to access constraints and drivers
     bpy.ops.object.mode_set(mode='POSE')
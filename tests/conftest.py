@@ -0,0 +1,20 @@
+import os
+import sys
+import importlib
+
+import pytest
+
+# The add-on is imported as a package named after its folder (Auto_Rig
+# inside Blender). Only the bpy-free modules are exercised here.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(ROOT))
+PACKAGE = os.path.basename(ROOT)
+HIERARCHY = os.path.join(ROOT, "Hierarchy")
+
+
+@pytest.fixture
+def autorig():
+    def load(module):
+        return importlib.import_module(f"{PACKAGE}.{module}")
+    return load
@@ -0,0 +1,63 @@
+import os
+import shutil
+
+import pytest
+
+from conftest import HIERARCHY
+
+TIMING_KEYS = {"plan_seconds", "build_seconds"}
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    hierarchy = tmp_path / "Hierarchy"
+    for name in ("driver", "driver.01"):
+        shutil.copytree(os.path.join(HIERARCHY, name), hierarchy / name)
+    return {
+        "hierarchy": str(hierarchy),
+        "characters": [
+            {"name": "hero", "source": "driver.01", "limbs": ["arm_l", "arm_r"]},
+            {"name": "broken", "source": "driver.01", "limbs": ["no_such_limb"]},
+            {"name": "villain", "source": "driver", "limbs": ["arm_l"]},
+            {"name": "extra", "source": "driver.01", "target": "driver", "limbs": ["arm_l"]},
+            {"name": "crowd", "source": "driver.01"},
+        ],
+    }
+
+
+def _comparable(report):
+    return [{k: v for k, v in r.items() if k not in TIMING_KEYS} for r in report["characters"]]
+
+
+def test_results_come_back_in_submission_order(autorig, manifest):
+    batch_build = autorig("utils.batch_build")
+    report = batch_build.run_batch(manifest, batch_build.FakeBackend(), max_workers=1)
+
+    names = [c["name"] for c in manifest["characters"]]
+    assert [r["character"] for r in report["characters"]] == names
+
+
+def test_failing_character_does_not_abort_the_batch(autorig, manifest):
+    batch_build = autorig("utils.batch_build")
+    backend = batch_build.FakeBackend(fail={"villain"})
+    report = batch_build.run_batch(manifest, backend, max_workers=1)
+
+    by_name = {r["character"]: r for r in report["characters"]}
+    assert (by_name["broken"]["ok"], by_name["broken"]["stage"]) == (False, "plan")
+    assert "no_such_limb" in by_name["broken"]["error"]
+    assert (by_name["villain"]["ok"], by_name["villain"]["stage"]) == (False, "build")
+    assert all(by_name[n]["ok"] for n in ("hero", "extra", "crowd"))
+    assert (report["built"], report["failed"]) == (3, 2)
+    assert set(backend.armatures) == {"hero", "extra", "crowd"}
+
+
+def test_process_pool_matches_serial_planning(autorig, manifest):
+    batch_build = autorig("utils.batch_build")
+    serial_backend = batch_build.FakeBackend()
+    pooled_backend = batch_build.FakeBackend()
+
+    serial = batch_build.run_batch(manifest, serial_backend, max_workers=1)
+    pooled = batch_build.run_batch(manifest, pooled_backend, max_workers=3)
+
+    assert _comparable(pooled) == _comparable(serial)
+    assert pooled_backend.armatures == serial_backend.armatures
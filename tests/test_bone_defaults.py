@@ -0,0 +1,35 @@
+import os
+import json
+import glob
+import shutil
+
+import pytest
+
+from conftest import HIERARCHY
+
+LIMB_FILES = sorted(
+    path for path in glob.glob(os.path.join(HIERARCHY, "*", "*.json"))
+    if not os.path.basename(path).startswith(".")
+)
+
+
+@pytest.mark.parametrize("path", LIMB_FILES, ids=lambda p: os.path.relpath(p, HIERARCHY))
+def test_elided_limb_refills_to_the_original(autorig, path):
+    bone_defaults = autorig("utils.bone_defaults")
+    with open(path) as f:
+        data = bone_defaults.fill_limb_defaults(json.load(f))
+
+    elided = json.loads(json.dumps(bone_defaults.elide_limb_defaults(data)))
+    assert bone_defaults.fill_limb_defaults(elided) == data
+    assert bone_defaults.roundtrip_mismatches(data) == []
+
+
+def test_verify_roundtrip_skips_dot_directories(autorig, tmp_path):
+    bone_defaults = autorig("utils.bone_defaults")
+
+    shutil.copytree(os.path.join(HIERARCHY, "driver.01"), tmp_path / "driver.01")
+    (tmp_path / ".plans").mkdir()
+    (tmp_path / ".plans" / "0123.json").write_text(json.dumps({"version": 2, "ops": {}}))
+    (tmp_path / "driver.01" / ".meta_fingerprints.json").write_text(json.dumps({"arm_l": "abc"}))
+
+    assert bone_defaults.verify_roundtrip(str(tmp_path)) == []
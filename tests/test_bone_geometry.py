@@ -0,0 +1,114 @@
+import os
+import json
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from conftest import HIERARCHY
+
+LIMB = os.path.join(HIERARCHY, "driver", "arm_l.json")
+
+
+class FakeEditBone:
+    def __init__(self, name):
+        self.name = name
+        self.head = [0.0, 0.0, 0.0]
+        self.tail = [0.0, 1.0, 0.0]
+        self.roll = 0.0
+
+
+class FakeEditBones(list):
+    # Enough of bpy_prop_collection for foreach_get/foreach_set
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return next(b for b in self if b.name == key)
+        return list.__getitem__(self, key)
+
+    def foreach_get(self, attr, buf):
+        flat = []
+        for bone in self:
+            value = getattr(bone, attr)
+            flat.extend(value if isinstance(value, list) else [value])
+        buf[:] = flat
+
+    def foreach_set(self, attr, buf):
+        width = 1 if attr == "roll" else 3
+        for i, bone in enumerate(self):
+            values = [float(v) for v in buf[i * width:(i + 1) * width]]
+            setattr(bone, attr, values[0] if width == 1 else values)
+
+
+def _per_bone_scaled(bones, scale):
+    # What the per-bone builders computed, with mathutils when available
+    try:
+        from mathutils import Vector  # type: ignore
+    except ImportError:
+        Vector = None
+    rows = {}
+    for name, bone in bones.items():
+        head = bone.get("head") or [0.0, 0.0, 0.0]
+        tail = bone.get("tail") or [0.0, 1.0, 0.0]
+        if Vector is not None:
+            rows[name] = (list(Vector(head) * scale), list(Vector(tail) * scale))
+        else:
+            rows[name] = ([x * scale for x in head], [x * scale for x in tail])
+    return rows
+
+
+def _limb_bones(autorig):
+    limb_io = autorig("utils.limb_io")
+    return limb_io.flatten_limb_bones(limb_io.load_limb_data(LIMB))
+
+
+def test_scaled_arrays_match_per_bone_math(autorig):
+    bone_geometry = autorig("utils.bone_geometry")
+    bones = _limb_bones(autorig)
+
+    arrays = bone_geometry.BoneArrays.from_bones(bones).scale(bone_geometry.SCALE)
+    expected = _per_bone_scaled(bones, bone_geometry.SCALE)
+
+    assert arrays.names == list(bones)
+    for i, name in enumerate(arrays.names):
+        head, tail = expected[name]
+        np.testing.assert_allclose(arrays.heads[i], head, rtol=0, atol=1e-9)
+        np.testing.assert_allclose(arrays.tails[i], tail, rtol=0, atol=1e-9)
+        assert arrays.parents[i] == bones[name].get("parent")
+
+
+def test_foreach_write_matches_per_bone_write(autorig):
+    bone_geometry = autorig("utils.bone_geometry")
+    bones = _limb_bones(autorig)
+    arrays = bone_geometry.BoneArrays.from_bones(bones).scale(bone_geometry.SCALE)
+
+    # An unrelated bone in the collection must be left alone
+    bulk = FakeEditBones(FakeEditBone(n) for n in ["other", *bones])
+    loop = FakeEditBones(FakeEditBone(n) for n in ["other", *bones])
+    assert bone_geometry.push_to_edit_bones(bulk, arrays) == "foreach"
+    bone_geometry._push_loop(loop, arrays)
+
+    for a, b in zip(bulk, loop):
+        np.testing.assert_allclose(a.head, b.head, atol=1e-6)
+        np.testing.assert_allclose(a.tail, b.tail, atol=1e-6)
+        assert a.roll == pytest.approx(b.roll, abs=1e-6)
+    assert bulk[0].tail == [0.0, 1.0, 0.0]
+
+
+def test_binary_arrays_match_json_arrays(autorig, tmp_path):
+    bone_geometry = autorig("utils.bone_geometry")
+    limb_binary = autorig("utils.limb_binary")
+    limb_io = autorig("utils.limb_io")
+
+    data = limb_io.load_limb_data(LIMB)
+    path = str(tmp_path / "arm_l.arlb")
+    limb_binary.write_binary_limb(path, data)
+
+    expected = bone_geometry.BoneArrays.from_bones(limb_io.flatten_limb_bones(data))
+    with limb_binary.BinaryLimb(path) as limb:
+        arrays = bone_geometry.BoneArrays.from_binary(limb)
+        assert arrays.names == expected.names
+        assert arrays.parents == expected.parents
+        np.testing.assert_allclose(arrays.heads, expected.heads, atol=1e-5)
+        np.testing.assert_allclose(arrays.tails, expected.tails, atol=1e-5)
+        np.testing.assert_allclose(arrays.rolls, expected.rolls, atol=1e-6)
+        assert (arrays.has_roll == expected.has_roll).all()
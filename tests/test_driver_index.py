@@ -0,0 +1,33 @@
+from types import SimpleNamespace
+
+
+def _armature(*paths):
+    drivers = [SimpleNamespace(data_path=path, array_index=index) for path, index in paths]
+    return SimpleNamespace(name="rig", animation_data=SimpleNamespace(drivers=drivers))
+
+
+def test_index_maps_bones_to_driver_positions(autorig):
+    driver_index = autorig("utils.driver_index")
+    driver_index.clear_driver_index()
+
+    armature = _armature(('pose.bones["hand_l"].rotation_quaternion', 1),
+                         ('pose.bones["arm \\"l\\""].scale', 0),
+                         ('pose.bones["hand_l"]["twist"]', 0),
+                         ('location', 0))
+    index, drivers = driver_index.get_driver_index(armature)
+    assert index == {"hand_l": [0, 2], 'arm "l"': [1]}
+    assert drivers is armature.animation_data.drivers
+
+
+def test_cached_index_is_reused_until_a_driver_path_changes(autorig):
+    driver_index = autorig("utils.driver_index")
+    driver_index.clear_driver_index()
+
+    armature = _armature(('pose.bones["hand_l"].location', 0), ('pose.bones["hand_l"].location', 1))
+    first, _ = driver_index.get_driver_index(armature)
+    assert driver_index.get_driver_index(armature)[0] is first
+
+    # Same driver count, different bone
+    armature.animation_data.drivers[1].data_path = 'pose.bones["hand_r"].location'
+    second, _ = driver_index.get_driver_index(armature)
+    assert second == {"hand_l": [0], "hand_r": [1]}
@@ -0,0 +1,11 @@
+def test_forget_limb_drops_only_that_limb(autorig, tmp_path):
+    limb_fingerprints = autorig("utils.limb_fingerprints")
+
+    bones = [("ue_bones", "upperarm_l", {"head": [0, 0, 0]})]
+    entry = limb_fingerprints.fingerprint_limb({}, bones, (".json", False, False))
+    limb_fingerprints.save_fingerprints(str(tmp_path), {"arm_l": entry, "arm_r": entry})
+
+    limb_fingerprints.forget_limb(str(tmp_path), "arm_l")
+    limb_fingerprints.forget_limb(str(tmp_path), "leg_l")
+
+    assert limb_fingerprints.load_fingerprints(str(tmp_path)) == {"arm_r": entry}
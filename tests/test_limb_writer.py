@@ -0,0 +1,26 @@
+import os
+import json
+
+from conftest import HIERARCHY
+
+
+def _stream(limb_io, data):
+    _, sections = limb_io.split_limb_sections(data)
+    return [(section, name, bone) for section, bones in sections.items() for name, bone in bones.items()]
+
+
+def test_compact_and_pretty_keep_section_order(autorig, tmp_path):
+    limb_io = autorig("utils.limb_io")
+    limb_writer = autorig("utils.limb_writer")
+
+    data = limb_io.load_limb_data(os.path.join(HIERARCHY, "driver.01", "arm_r.json"))
+    for pretty in (False, True):
+        path = str(tmp_path / f"arm_r_{pretty}.json")
+        count = limb_writer.write_limb_stream(path, data["_meta"], _stream(limb_io, data), pretty=pretty)
+        with open(path) as f:
+            written = json.load(f)
+
+        assert list(written) == ["_meta", "ue_bones", "controllers"]
+        assert count == written["_meta"]["bone_count"]
+        for section in ("ue_bones", "controllers"):
+            assert list(written[section]) == list(data[section])
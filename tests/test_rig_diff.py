@@ -0,0 +1,113 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from conftest import HIERARCHY
+
+# Limbs whose constraints were saved with read-only RNA keys (bl_rna,
+# is_valid, error_location, ...) by the old dir() based exporter
+SHIPPED_LIMBS = [
+    ("driver", "arm_l"),
+    ("driver.01", "arm_l"),
+    ("driver.01", "arm_r"),
+    ("driver.01", "hand_l"),
+]
+
+# Read-only on every constraint type in Blender's RNA
+READONLY = {"is_valid", "error_location", "error_rotation", "is_override_data"}
+ID_POINTERS = {"target", "pole_target", "space_object"}
+ID_STRUCT = SimpleNamespace(identifier="Object", base=SimpleNamespace(identifier="ID", base=None))
+
+
+def _fake_constraint(data, objects):
+    # A live constraint holding the saved values, with an RNA description
+    # like Blender's: read-only and ID pointer properties flagged as such
+    props, values = [], {"name": data["name"], "type": data["type"]}
+    for key, value in data.items():
+        if key in ("name", "type", "bl_rna"):
+            continue
+        prop = SimpleNamespace(identifier=key, is_readonly=key in READONLY, type='FLOAT',
+                               is_enum_flag=False, array_length=0, fixed_type=None)
+        if key == "rna_type":
+            prop.type = 'POINTER'
+        elif key in ID_POINTERS:
+            prop.type, prop.fixed_type = 'POINTER', ID_STRUCT
+            value = SimpleNamespace(name=value) if value in objects else None
+        elif isinstance(value, list):
+            prop.array_length = len(value)
+        props.append(prop)
+        values[key] = value
+    return SimpleNamespace(bl_rna=SimpleNamespace(properties=props), **values)
+
+
+def _fake_armature(bones, bone_defaults, objects):
+    data_bones, pose_bones = {}, {}
+    for name, record in bones.items():
+        data_bones[name] = SimpleNamespace(
+            head_local=record.get("head") or [0, 0, 0],
+            tail_local=record.get("tail") or [0, 1, 0],
+            parent=None,
+            collections=[SimpleNamespace(name=c) for c in record.get("bone_collections") or []],
+        )
+        pose = SimpleNamespace(
+            constraints=[_fake_constraint(c, objects) for c in record.get("constraints") or []],
+            bone_color=SimpleNamespace(palette='DEFAULT', custom=SimpleNamespace(
+                normal=[0.0] * 3, select=[0.0] * 3, active=[0.0] * 3)),
+        )
+        for key in ("custom_shape", "custom_shape_transform"):
+            shape = record.get(key)
+            setattr(pose, key, SimpleNamespace(name=shape) if shape in objects else None)
+        for key in bone_defaults.POSE_SETTINGS:
+            setattr(pose, key, record.get(key, bone_defaults.BONE_DEFAULTS[key]))
+        pose_bones[name] = pose
+        # Parents may live in another limb, only the name is read
+        parent = record.get("parent")
+        data_bones[name].parent = SimpleNamespace(name=parent) if parent else None
+    return SimpleNamespace(data=SimpleNamespace(bones=data_bones), pose=SimpleNamespace(bones=pose_bones))
+
+
+def _referenced_objects(bones):
+    names = {b.get(k) for b in bones.values() for k in ("custom_shape", "custom_shape_transform")}
+    names |= {c.get(k) for b in bones.values() for c in b["constraints"] for k in ID_POINTERS}
+    return names - {None}
+
+
+@pytest.mark.parametrize("with_targets", [True, False])
+@pytest.mark.parametrize("armature_name, limb_name", SHIPPED_LIMBS)
+def test_unchanged_shipped_limb_has_empty_diff(autorig, armature_name, limb_name, with_targets):
+    limb_io = autorig("utils.limb_io")
+    rig_diff = autorig("utils.rig_diff")
+    bone_defaults = autorig("utils.bone_defaults")
+    autorig("utils.constraint_schema").clear_constraint_schemas()
+
+    bones = limb_io.flatten_limb_bones(
+        limb_io.load_limb_data(os.path.join(HIERARCHY, armature_name, f"{limb_name}.json")))
+    assert any("bl_rna" in c for b in bones.values() for c in b["constraints"])
+
+    # Without the target objects in the file the builder leaves the
+    # pointers empty, which must compare as unchanged too
+    objects = _referenced_objects(bones) if with_targets else set()
+    snapshot = rig_diff.snapshot_armature(_fake_armature(bones, bone_defaults, objects), bones)
+
+    diff = rig_diff.diff_bones(snapshot, bones, list(bones), objects=objects)
+    assert diff == {"added": [], "removed": [], "changed": {}}
+
+
+def test_changed_constraint_and_bone_color_are_reported(autorig):
+    limb_io = autorig("utils.limb_io")
+    rig_diff = autorig("utils.rig_diff")
+    bone_defaults = autorig("utils.bone_defaults")
+
+    bones = limb_io.flatten_limb_bones(
+        limb_io.load_limb_data(os.path.join(HIERARCHY, "driver", "arm_l.json")))
+    objects = _referenced_objects(bones)
+    snapshot = rig_diff.snapshot_armature(_fake_armature(bones, bone_defaults, objects), bones)
+
+    name = next(n for n, b in bones.items() if b["constraints"])
+    bones[name]["constraints"][0]["influence"] = 0.25
+    other = next(n for n in bones if n != name)
+    bones[other]["bone_color"] = {"palette": 'THEME01', "custom_colors": None}
+
+    changed = rig_diff.diff_bones(snapshot, bones, objects=objects)["changed"]
+    assert changed == {name: ["constraints"], other: ["bone_color"]}
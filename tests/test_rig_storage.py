@@ -0,0 +1,44 @@
+import os
+import json
+import shutil
+
+from conftest import HIERARCHY
+
+
+def test_import_folder_library_skips_dot_directories(autorig, tmp_path):
+    rig_storage = autorig("utils.rig_storage")
+    limb_io = autorig("utils.limb_io")
+
+    hierarchy = tmp_path / "Hierarchy"
+    shutil.copytree(os.path.join(HIERARCHY, "driver.01"), hierarchy / "driver.01")
+    (hierarchy / ".plans").mkdir()
+    (hierarchy / ".plans" / "0123.json").write_text(json.dumps({"version": 2, "ops": {}}))
+    (hierarchy / "driver.01" / ".meta_fingerprints.json").write_text(json.dumps({"arm_l": "abc"}))
+
+    storage = rig_storage.SQLiteStorage(str(tmp_path / "library.db"))
+    try:
+        imported = rig_storage.import_folder_library(str(hierarchy), storage)
+        armatures = [row[0] for row in storage.conn.execute("SELECT name FROM armatures")]
+    finally:
+        storage.close()
+
+    limb_files = [f for f in os.listdir(hierarchy / "driver.01") if limb_io.is_limb_file(f)]
+    assert imported == len(limb_files)
+    assert armatures == ["driver.01"]
+
+
+def test_sqlite_limb_path_writes_a_readable_limb_file(autorig, tmp_path):
+    rig_storage = autorig("utils.rig_storage")
+    limb_io = autorig("utils.limb_io")
+
+    data = limb_io.load_limb_data(os.path.join(HIERARCHY, "driver.01", "arm_l.json"))
+    storage = rig_storage.SQLiteStorage(str(tmp_path / "library.db"))
+    try:
+        storage.write_limb("driver.01", "arm_l", data)
+        path = storage.limb_path("driver.01", "arm_l")
+        mtime = os.stat(path).st_mtime_ns
+        assert storage.limb_path("driver.01", "arm_l") == path
+        assert os.stat(path).st_mtime_ns == mtime
+        assert limb_io.load_limb_data(path) == storage.read_limb("driver.01", "arm_l")
+    finally:
+        storage.close()
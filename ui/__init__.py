@@ -4,12 +4,14 @@ import importlib
 from bpy.types import Panel, Operator, PropertyGroup # type: ignore
 from bpy.props import StringProperty, PointerProperty # type: ignore
 
+from . import modal_runner
 from . import control_pane
 from . import deform_pane
 from . import limb_pane
 from . import limb_editor
 from . import limb_export
 from . import limb_creator
+importlib.reload(modal_runner)
 importlib.reload(control_pane)
 importlib.reload(deform_pane)
 importlib.reload(limb_pane) 
@@ -25,6 +27,8 @@ classes = [
     deform_pane.AUTORIG_PT_DeformRig,
     
     limb_creator.LIMB_OT_Build,
+    limb_creator.LIMB_OT_BuildFullRig,
+    limb_creator.LIMB_OT_BuildFullRigModal,
     limb_creator.LIMB_PT_Builder,
     
     limb_editor.AutoRigLimbEditorProperties,
@@ -33,6 +37,12 @@ classes = [
     
     limb_export.AutoRigLimbExportProperties,
     limb_export.AUTORIG_OT_ExportSelectedLimb,
+    limb_export.AUTORIG_OT_ExportSelectedLimbModal,
+    limb_export.AUTORIG_OT_ExportAllLimbs,
+    limb_export.AUTORIG_OT_ExportArmatureArchive,
+    limb_export.AUTORIG_OT_ImportArmatureArchive,
+    limb_export.AUTORIG_OT_ImportFolderLibrary,
+    limb_export.AUTORIG_OT_CollectBoneStore,
     limb_export.AUTORIG_PT_LimbExportPanel,
     
 ]
@@ -1,55 +1,5 @@
-import bpy, os, json, math # type: ignore
-from mathutils import Vector, Matrix # type: ignore
-
-# — Helpers: JSON loader & rotation —
-def load_limb_json(path):
-    with open(path, 'r') as f:
-        return json.load(f)
-
-def rotate_z(vec, deg):
-    return Matrix.Rotation(math.radians(deg), 3, 'Z') @ vec
-
-# — Build function —
-def build_limb(arm, limb_data, mode, source_arm=None):
-    bpy.context.view_layer.objects.active = arm
-    bpy.ops.object.mode_set(mode='EDIT')
-    bones = limb_data['bones']
-    prev_vec = None
-
-    for bone in bones:
-        parent = bone['parent']
-        head = Vector(bone['head'])
-        tail = Vector(bone['tail'])
-
-        if mode == 'ctrl_from_def' and source_arm:
-            def_b = source_arm.data.bones
-            head = def_b[parent].head_local.copy()
-            child = next((b['name'] for b in bones if b['parent'] == bone['name']), None)
-            if child and child in def_b:
-                tail = def_b[child].head_local.copy()
-            elif prev_vec:
-                tail = head + rotate_z(prev_vec, 90).normalized() * (tail - head).length
-
-        elif mode == 'def_from_ctrl' and source_arm:
-            ctrl_b = source_arm.data.bones
-            head = ctrl_b[parent].head_local.copy()
-            vec = (ctrl_b[bone['name']].tail_local - ctrl_b[bone['name']].head_local)
-            tail = head + rotate_z(vec, 90).normalized() * 1.8
-
-        eb = arm.data.edit_bones.new(bone['name'])
-        eb.head, eb.tail = head, tail
-        eb.parent = arm.data.edit_bones.get(parent, None)
-        prev_vec = eb.tail - eb.head
-
-    bpy.ops.object.mode_set(mode='OBJECT')
-    
-def get_limb_chain_name_from_json(path):
-    with open(path, "r") as f:
-        data = json.load(f)
-    for key in data.keys():
-        if key != "_meta":
-            return key  # Return the first actual limb chain name found
-    return None
+import bpy # type: ignore
+from .modal_runner import TimeSlicedOperator
 
 # — Operator —
 class LIMB_OT_Build(bpy.types.Operator):
@@ -57,48 +7,102 @@ class LIMB_OT_Build(bpy.types.Operator):
     bl_label = "Build Limb"
 
     def execute(self, context):
-        props = context.scene.autorig_props 
-        
-        if props.mode   == 'ctrl_from_def':
-            target_name     = props.control_armature_name
-            limb_chain_name = props.control_limb_name
-            source_name     = props.deform_armature_name
-        elif props.mode == 'def_from_ctrl':
-            target_name     = props.deform_armature_name
-            limb_chain_name = props.deform_limb_name
-            source_name     = props.control_armature_name
-        elif props.mode == 'json':
-            target_name     = None
-            limb_chain_name = None
-            source_name     = props.filepath
-        elif props.mode == 'deform':
-            target_name     = None
-            limb_chain_name = props.deform_limb_name
-            source_name     = props.deform_armature_name
-        elif props.mode == 'control':
-            target_name     = None
-            limb_chain_name = props.control_limb_name
-            source_name     = props.control_armature_name
-        else:
-            return self.report({'ERROR'}, "Invalid mode.")
-
-        if not source_name:
-            return self.report({'ERROR'}, "Source Armature must be set.")
-
-        scripts_dir = bpy.utils.user_resource('SCRIPTS')
-        base_path = os.path.join(scripts_dir, "addons", "Auto_Rig", "Hierarchy")
-        target_path = os.path.join(base_path, target_name) if target_name else None
-        source_path = os.path.join(base_path, source_name) 
-        
-        if not limb_chain_name:
-            limb_chain_name = get_limb_chain_name_from_json(source_path)
-
-        # Build it!
-        build_limb(target_path, limb_chain_name, props.mode, source_path)
+        from ..utils import rig_compiler, rig_storage, create_limb_chain, limb_io
 
+        props = context.scene.autorig_props
+        if props.mode not in rig_compiler.MODES:
+            self.report({'ERROR'}, "Invalid mode.")
+            return {'CANCELLED'}
+
+        library = rig_storage.get_storage()
+        reference_path = None
+        try:
+            if props.mode == 'ctrl_from_def':
+                limb_path = library.limb_path(props.control_armature_name, props.control_limb_name)
+                reference_path = library.limb_path(props.deform_armature_name, props.control_limb_name)
+            elif props.mode == 'def_from_ctrl':
+                limb_path = library.limb_path(props.deform_armature_name, props.deform_limb_name)
+                reference_path = library.limb_path(props.control_armature_name, props.deform_limb_name)
+            else:
+                limb_path = bpy.path.abspath(props.filepath) if props.filepath else None
+
+            # Limbs packed into an armature archive have no file of their own
+            for path in (limb_path, reference_path):
+                if path is not None:
+                    limb_io.resolve_limb_source(path)
+        except FileNotFoundError:
+            limb_path = None
+        if not limb_path:
+            self.report({'ERROR'}, "Limb file not found.")
+            return {'CANCELLED'}
+
+        # Compiled once per limb file, mode and addon version, replayed after.
+        # Same scale as the full rig build, so a limb lands on that rig
+        armature = create_limb_chain.get_or_create_armature()
+        report = rig_compiler.build_limb(armature, limb_path, props.mode, reference_path,
+                                         scale=create_limb_chain.SCALE)
+
+        self.report({'INFO'}, f"Built {report['created'] + report['updated']} bones "
+                              f"({'cached' if report['cached'] else 'compiled'} plan)")
         return {'FINISHED'}
 
 
+class LIMB_OT_BuildFullRig(bpy.types.Operator):
+    bl_idname = "limb.build_full_rig"
+    bl_label = "Build Full Rig"
+    bl_description = ("Build every limb chain of the control armature in one pass, "
+                      "retargeted to the deform armature when one is set")
+
+    def execute(self, context):
+        from ..utils import create_limb_chain
+
+        args = full_rig_arguments(self, context)
+        if args is None:
+            return {'CANCELLED'}
+        report = create_limb_chain.build_full_rig(*args)
+        return {'FINISHED'} if report_full_rig(self, args[0], report) else {'CANCELLED'}
+
+
+class LIMB_OT_BuildFullRigModal(TimeSlicedOperator, bpy.types.Operator):
+    bl_idname = "limb.build_full_rig_modal"
+    bl_label = "Build Full Rig (Background)"
+    bl_description = ("Build the full rig a chunk of bones per tick with a progress bar. "
+                      "Esc cancels and rolls the armature back")
+
+    def make_steps(self, context):
+        from ..utils import create_limb_chain
+
+        args = full_rig_arguments(self, context)
+        if args is None:
+            return None
+        self._source_name = args[0]
+        return create_limb_chain.build_full_rig_steps(*args)
+
+    def on_finished(self, context, report):
+        report_full_rig(self, self._source_name, report)
+
+
+def full_rig_arguments(operator, context):
+    from .limb_editor import load_limb_chains
+
+    props = context.scene.autorig_props
+    source_name = props.control_armature_name
+    if not source_name:
+        operator.report({'ERROR'}, "Source Armature must be set.")
+        return None
+    return source_name, props.deform_armature_name or None, load_limb_chains()
+
+def report_full_rig(operator, source_name, report):
+    if report is None:
+        operator.report({'ERROR'}, f"No limb chains found for '{source_name}'.")
+        return False
+
+    total = sum(report["timings"].values())
+    operator.report({'INFO'}, f"Built {report['created'] + report['updated']} bones "
+                              f"from {len(report['limbs'])} limbs in {total:.2f}s")
+    return True
+
+
 # — Panel —
 class LIMB_PT_Builder(bpy.types.Panel):
     bl_label = "Limb Builder"
@@ -113,9 +117,11 @@ class LIMB_PT_Builder(bpy.types.Panel):
         layout.prop(props, "new_arm_name")
         layout.prop(props, "mode") 
         layout.operator("limb.build")
+        layout.operator("limb.build_full_rig")
+        layout.operator("limb.build_full_rig_modal")
 
 # — Register —
-classes = (LIMB_OT_Build, LIMB_PT_Builder)
+classes = (LIMB_OT_Build, LIMB_OT_BuildFullRig, LIMB_OT_BuildFullRigModal, LIMB_PT_Builder)
 def register():
     for c in classes: bpy.utils.register_class(c)
 
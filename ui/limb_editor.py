@@ -1,9 +1,10 @@
 import bpy # type: ignore
 import os
-import json
 from bpy.types import Panel, Operator, PropertyGroup # type: ignore
 from bpy.props import StringProperty, PointerProperty # type: ignore
 
+from ..utils import json_journal
+
 
 # ---- File path helper ----
 def get_limb_chains_path():
@@ -12,21 +13,25 @@ def get_limb_chains_path():
 
 
 # ---- JSON Load/Save ----
+def get_limb_chains_store():
+    return json_journal.get_store(get_limb_chains_path())
+
 def load_limb_chains():
-    path = get_limb_chains_path()
-    if not os.path.isfile(path):
-        return []
     try:
-        with open(path, "r") as f:
-            return json.load(f)
+        return get_limb_chains_store().load()
     except Exception as e:
         print(f"[AutoRig] Failed to load limb chains: {e}")
         return []
 
 def save_limb_chains(data):
     try:
-        with open(get_limb_chains_path(), "w") as f:
-            json.dump(data, f, indent=4)
+        get_limb_chains_store().replace(data)
+    except Exception as e:
+        print(f"[AutoRig] Failed to save limb chains: {e}")
+
+def save_limb_chain(chain):
+    try:
+        get_limb_chains_store().put(chain)
     except Exception as e:
         print(f"[AutoRig] Failed to save limb chains: {e}")
 
@@ -48,17 +53,8 @@ class AUTORIG_OT_SaveLimbChain(Operator):
         stops = [b.strip() for b in props.limb_stops_csv.split(",") if b.strip()]
         note = props.limb_note.strip()
 
-        data = load_limb_chains()
-
         # Replace or add
-        for item in data:
-            if item["name"] == name:
-                item.update({"roots": roots, "stops": stops, "note": note})
-                break
-        else:
-            data.append({"name": name, "roots": roots, "stops": stops, "note": note})
-
-        save_limb_chains(data)
+        save_limb_chain({"name": name, "roots": roots, "stops": stops, "note": note})
         self.report({'INFO'}, f"Saved limb chain: {name}")
         return {'FINISHED'}
 
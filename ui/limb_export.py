@@ -1,21 +1,18 @@
 import bpy # type: ignore
 import os
-import json
 from bpy.types import Panel, Operator, PropertyGroup # type: ignore
-from bpy.props import EnumProperty, PointerProperty # type: ignore
+from bpy.props import BoolProperty, EnumProperty, PointerProperty # type: ignore
 
-from ..utils import export_clean_data
+from ..utils import export_clean_data, armature_registry, rig_storage, limb_binary, limb_archive, bone_store
+from .limb_editor import get_limb_chains_store
+from .modal_runner import TimeSlicedOperator
 
 
 # ---- Limb Chain JSON Access ----
-def get_limb_chains_path():
-    scripts_dir = bpy.utils.user_resource('SCRIPTS')
-    return os.path.join(scripts_dir, "addons", "Auto_Rig", "Hierarchy", "limb_chains.json")
-
 def load_limb_chains():
+    # Goes through the journal so chains saved by the editor show up before compaction
     try:
-        with open(get_limb_chains_path(), "r") as f:
-            return json.load(f)
+        return get_limb_chains_store().load()
     except:
         return {}
 
@@ -48,12 +45,111 @@ class AutoRigLimbExportProperties(PropertyGroup):
         description="Choose a limb chain to export",
         items=get_limb_names_for_selected_armature
     ) # type: ignore
+    export_format: EnumProperty(
+        name="Format",
+        items=[
+            ('json', "JSON", "Compact JSON limb file"),
+            ('json_pretty', "JSON (Pretty)", "Indented JSON limb file, for debugging"),
+            ('binary', "Binary", "Compact .arlb file with memory-mapped bone arrays"),
+            ('manifest', "Deduplicated", "Manifest of bone hashes, bones shared through Hierarchy/.store"),
+        ],
+        default='json',
+    ) # type: ignore
+    archive_codec: EnumProperty(
+        name="Compression",
+        items=limb_archive.CODEC_ITEMS,
+        default='zlib',
+    ) # type: ignore
 
 
 class AUTORIG_OT_ExportSelectedLimb(Operator):
     bl_idname = "autorig.export_selected_limb"
     bl_label = "Export Selected Limb"
-    bl_description = "Export selected limb chain to a .json file"
+    bl_description = "Export selected limb chain to a .json or .arlb file"
+
+    def execute(self, context):
+        request = resolve_export_request(self, context)
+        if request is None:
+            return {'CANCELLED'}
+
+        with armature_registry.registry_batch():
+            export_clean_data.export_limb_file(*request["args"], **request["options"])
+
+        self.report({'INFO'}, f"Exported: {request['args'][3]}")
+        return {'FINISHED'}
+
+
+class AUTORIG_OT_ExportSelectedLimbModal(TimeSlicedOperator, Operator):
+    bl_idname = "autorig.export_selected_limb_modal"
+    bl_label = "Export Selected Limb (Background)"
+    bl_description = ("Export the selected limb chain a few bones per tick, keeping the UI responsive. "
+                      "Esc cancels without writing anything")
+
+    def make_steps(self, context):
+        request = resolve_export_request(self, context)
+        if request is None:
+            return None
+        # The final step writes the file inside a registry_batch
+        return export_clean_data.export_limb_file_steps(*request["args"], **request["options"])
+
+    def on_finished(self, context, output_path):
+        self.report({'INFO'}, f"Exported: {output_path}")
+
+
+def get_armature_chains(armature):
+    all_chains = load_limb_chains()
+
+    # Support both list and dict formats
+    if isinstance(all_chains, list):
+        return all_chains
+    elif isinstance(all_chains, dict):
+        return all_chains.get(armature.name, [])
+    return []
+
+def get_export_extension(props):
+    return limb_binary.EXTENSION if props.export_format == 'binary' else ".json"
+
+def resolve_export_request(operator, context):
+    """
+    Selected armature, limb chain and output path for the export operators.
+    Reports on the operator and returns None when something is missing.
+    """
+    armature = bpy.context.object
+    if not armature or armature.type != 'ARMATURE':
+        operator.report({'ERROR'}, "Select an armature first.")
+        return None
+
+    props = context.scene.limb_export
+    limb_name = props.export_limb_name
+
+    limb = next((c for c in get_armature_chains(armature) if c["name"] == limb_name), None)
+    if not limb:
+        operator.report({'ERROR'}, f"Limb '{limb_name}' not found.")
+        return None
+
+    base_path = get_armature_folder(armature)
+    output_path = os.path.join(base_path, f"{limb_name}{get_export_extension(props)}")
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+
+    chain = (limb["roots"], limb["stops"])
+    return {
+        "args": (limb_name, chain, armature, output_path),
+        "options": {
+            "pretty": props.export_format == 'json_pretty',
+            "dedupe": props.export_format == 'manifest',
+        },
+    }
+
+class AUTORIG_OT_ExportAllLimbs(Operator):
+    bl_idname = "autorig.export_all_limbs"
+    bl_label = "Export All Limbs"
+    bl_description = "Export every limb chain of the selected armature in one pass, skipping unchanged limbs"
+
+    force: BoolProperty(
+        name="Force",
+        description="Rewrite every limb even if nothing changed since the last export",
+        default=False,
+    ) # type: ignore
 
     def execute(self, context):
         armature = bpy.context.object
@@ -61,36 +157,101 @@ class AUTORIG_OT_ExportSelectedLimb(Operator):
             self.report({'ERROR'}, "Select an armature first.")
             return {'CANCELLED'}
 
+        chains = get_armature_chains(armature)
+        if not chains:
+            self.report({'ERROR'}, "No limb chains defined.")
+            return {'CANCELLED'}
+
         props = context.scene.limb_export
-        limb_name = props.export_limb_name
+        result = export_clean_data.export_all_limbs(
+            armature, chains, get_armature_folder(armature),
+            ext=get_export_extension(props),
+            pretty=props.export_format == 'json_pretty',
+            dedupe=props.export_format == 'manifest',
+            force=self.force,
+        )
+
+        self.report({'INFO'}, f"Exported {len(result['written'])} limbs of '{armature.name}', "
+                              f"{len(result['skipped'])} unchanged")
+        return {'FINISHED'}
+
 
-        all_chains = load_limb_chains()
+def get_armature_folder(armature):
+    current_dir = os.path.dirname(__file__)
+    return os.path.normpath(os.path.join(current_dir, '..', 'Hierarchy', armature.name))
 
-        # Support both list and dict formats
-        if isinstance(all_chains, list):
-            chains = all_chains
-        elif isinstance(all_chains, dict):
-            chains = all_chains.get(armature.name, [])
-        else:
-            chains = []
 
-        limb = next((c for c in chains if c["name"] == limb_name), None)
-        if not limb:
-            self.report({'ERROR'}, f"Limb '{limb_name}' not found.")
+class AUTORIG_OT_ExportArmatureArchive(Operator):
+    bl_idname = "autorig.export_armature_archive"
+    bl_label = "Export Armature Archive"
+    bl_description = "Pack every limb of the selected armature into a single .arlib file"
+
+    def execute(self, context):
+        armature = bpy.context.object
+        if not armature or armature.type != 'ARMATURE':
+            self.report({'ERROR'}, "Select an armature first.")
             return {'CANCELLED'}
 
-        current_dir = os.path.dirname(__file__)
-        base_path = os.path.normpath(os.path.join(current_dir, '..', 'Hierarchy', armature.name))
-        output_path = os.path.join(base_path, f"{limb_name}.json")
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        
-        chain = (limb["roots"], limb["stops"])
-        export_clean_data.export_limb_file(limb_name, chain, armature, output_path)
+        folder = get_armature_folder(armature)
+        if not os.path.isdir(folder):
+            self.report({'ERROR'}, f"No limb folder for '{armature.name}'.")
+            return {'CANCELLED'}
 
+        output_path = limb_archive.pack_armature_folder(folder, codec=context.scene.limb_export.archive_codec)
         self.report({'INFO'}, f"Exported: {output_path}")
         return {'FINISHED'}
 
 
+class AUTORIG_OT_ImportArmatureArchive(Operator):
+    bl_idname = "autorig.import_armature_archive"
+    bl_label = "Import Armature Archive"
+    bl_description = "Unpack the selected armature's .arlib file into one JSON file per limb"
+
+    def execute(self, context):
+        armature = bpy.context.object
+        if not armature or armature.type != 'ARMATURE':
+            self.report({'ERROR'}, "Select an armature first.")
+            return {'CANCELLED'}
+
+        folder = get_armature_folder(armature)
+        archive = limb_archive.get_archive_path(folder)
+        if not os.path.isfile(archive):
+            self.report({'ERROR'}, f"Archive not found: {archive}")
+            return {'CANCELLED'}
+
+        count = limb_archive.unpack_archive(archive, folder)
+        self.report({'INFO'}, f"Imported {count} limbs into {folder}")
+        return {'FINISHED'}
+
+
+class AUTORIG_OT_ImportFolderLibrary(Operator):
+    bl_idname = "autorig.import_folder_library"
+    bl_label = "Import Folders to SQLite"
+    bl_description = "Copy every Hierarchy/<armature>/<limb>.json into the SQLite rig library"
+
+    def execute(self, context):
+        hierarchy_dir = armature_registry.get_hierarchy_dir()
+        storage = rig_storage.SQLiteStorage(os.path.join(hierarchy_dir, rig_storage.DB_FILENAME))
+        try:
+            count = rig_storage.import_folder_library(hierarchy_dir, storage)
+        finally:
+            storage.close()
+
+        self.report({'INFO'}, f"Imported {count} limbs into {storage.db_path}")
+        return {'FINISHED'}
+
+
+class AUTORIG_OT_CollectBoneStore(Operator):
+    bl_idname = "autorig.collect_bone_store"
+    bl_label = "Clean Bone Store"
+    bl_description = "Delete bone store blobs that no limb manifest references"
+
+    def execute(self, context):
+        removed = bone_store.collect_garbage(armature_registry.get_hierarchy_dir())
+        self.report({'INFO'}, f"Removed {removed} unreferenced bone blobs")
+        return {'FINISHED'}
+
+
 # ---- Panel ----
 class AUTORIG_PT_LimbExportPanel(Panel):
     bl_label = "Limb Chain Exporter"
@@ -106,6 +267,22 @@ class AUTORIG_PT_LimbExportPanel(Panel):
         arm = bpy.context.object
         layout.label(text=f"Armature: {arm.name if arm else 'None'}")
         layout.prop(props, "export_limb_name")
+        layout.prop(props, "export_format")
         layout.operator("autorig.export_selected_limb", text="Export Limb to File")
+        layout.operator("autorig.export_selected_limb_modal", text="Export Limb in Background")
+        row = layout.row(align=True)
+        row.operator("autorig.export_all_limbs", text="Export All Limbs")
+        row.operator("autorig.export_all_limbs", text="Force").force = True
+
+        layout.separator()
+        layout.prop(props, "archive_codec")
+        row = layout.row(align=True)
+        row.operator("autorig.export_armature_archive", text="Export Archive")
+        row.operator("autorig.import_armature_archive", text="Import Archive")
+
+        layout.separator()
+        layout.prop(context.scene.autorig_props, "storage_backend")
+        layout.operator("autorig.import_folder_library")
+        layout.operator("autorig.collect_bone_store")
 
 
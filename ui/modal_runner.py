@@ -0,0 +1,93 @@
+import bpy # type: ignore
+
+from ..utils import rig_steps
+
+# Events let through while steps run, so the viewport can still be
+# navigated. Everything else (Tab, X, clicks on the header, hotkeys) is
+# swallowed: the steps hold edit and pose bone references across ticks and
+# a mode switch or a deleted armature would leave them pointing at freed data.
+PASS_THROUGH_EVENTS = {
+    'MOUSEMOVE', 'INBETWEEN_MOUSEMOVE', 'MIDDLEMOUSE',
+    'WHEELUPMOUSE', 'WHEELDOWNMOUSE', 'WHEELINMOUSE', 'WHEELOUTMOUSE',
+    'TRACKPADPAN', 'TRACKPADZOOM', 'MOUSEROTATE', 'NDOF_MOTION',
+    'WINDOW_DEACTIVATE',
+}
+
+
+class TimeSlicedOperator:
+    """
+    Mixin for modal operators that run a rig_steps generator from an event
+    timer, spending at most time_budget seconds per tick so the UI keeps
+    drawing. Esc closes the generator, which rolls its work back.
+
+    Subclasses override make_steps(context) to return the generator and
+    on_finished(context, report) to report its result. make_steps returning
+    None, as the base one does, cancels the operator. While the steps run
+    only viewport navigation reaches Blender, see PASS_THROUGH_EVENTS.
+    """
+    tick_interval = 0.02
+    time_budget = 0.05
+
+    _steps = None
+    _timer = None
+
+    def make_steps(self, context):
+        return None
+
+    def on_finished(self, context, report):
+        pass
+
+    def invoke(self, context, event):
+        self._steps = self.make_steps(context)
+        if self._steps is None:
+            return {'CANCELLED'}
+
+        wm = context.window_manager
+        self._timer = wm.event_timer_add(self.tick_interval, window=context.window)
+        wm.progress_begin(0, 100)
+        wm.modal_handler_add(self)
+        return {'RUNNING_MODAL'}
+
+    def execute(self, context):
+        # Blocking path, exhausts the same steps in one go
+        steps = self.make_steps(context)
+        if steps is None:
+            return {'CANCELLED'}
+        self.on_finished(context, rig_steps.run_steps(steps))
+        return {'FINISHED'}
+
+    def modal(self, context, event):
+        if event.type == 'ESC':
+            self._stop(context)
+            self._steps.close()
+            self.report({'WARNING'}, "Cancelled, changes rolled back.")
+            return {'CANCELLED'}
+
+        if event.type in PASS_THROUGH_EVENTS:
+            return {'PASS_THROUGH'}
+        if event.type != 'TIMER':
+            return {'RUNNING_MODAL'}
+
+        try:
+            finished, progress, report = rig_steps.advance(self._steps, self.time_budget)
+        except Exception as e:
+            self._stop(context)
+            self.report({'ERROR'}, f"Failed: {e}")
+            return {'CANCELLED'}
+
+        if finished:
+            self._stop(context)
+            self.on_finished(context, report)
+            return {'FINISHED'}
+
+        if progress:
+            done, total = progress
+            context.window_manager.progress_update(int(100 * done / max(total, 1)))
+        return {'RUNNING_MODAL'}
+
+    def _stop(self, context):
+        wm = context.window_manager
+        if self._timer is not None:
+            wm.event_timer_remove(self._timer)
+            self._timer = None
+        wm.progress_end()
@@ -1,2 +1,6 @@
-from ..Archive.build_skeleton import main as build_arm_skeleton
+try:
+    from ..Archive.build_skeleton import main as build_arm_skeleton
+except ImportError:
+    # Outside Blender (batch planning workers) only the bpy-free modules are used
+    build_arm_skeleton = None
 # from .export_clean_data import main as export_json
\ No newline at end of file
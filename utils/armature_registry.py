@@ -1,99 +1,145 @@
 import bpy # type: ignore
 import os
-import json
 from datetime import datetime
+from . import limb_catalogue, limb_archive, json_journal
 
-def get_registry_path():
+def get_hierarchy_dir():
     scripts_dir = bpy.utils.user_resource('SCRIPTS')
-    return os.path.join(scripts_dir, "addons", "Auto_Rig", "Hierarchy", "armature_registry.json")
+    return os.path.join(scripts_dir, "addons", "Auto_Rig", "Hierarchy")
+
+def get_armature_dir(armature_name):
+    return os.path.join(get_hierarchy_dir(), armature_name)
+
+def get_registry_path():
+    return os.path.join(get_hierarchy_dir(), "armature_registry.json")
+
+# ------------------------
+# Registry Cache
+# ------------------------
+
+# Process-wide cache for the enum callbacks. Blender only keeps a borrowed
+# reference to the strings returned by an EnumProperty items callback, so the
+# item lists must stay alive here until the next rebuild.
+_registry_cache = {
+    "key": None,
+    "items": {},
+}
+
+def _registry_stat_key(path):
+    stats = []
+    for p in (path, f"{path}.journal"):
+        try:
+            st = os.stat(p)
+            stats.append((st.st_mtime_ns, st.st_size))
+        except OSError:
+            stats.append(None)
+    return (path, *stats)
+
+def invalidate_registry_cache():
+    _registry_cache["key"] = None
+    _registry_cache["items"] = {}
+
+def _build_registry_items(data):
+    items = {True: [], False: []}
+    for a in data:
+        is_deform = a.get("is_deform")
+        if is_deform not in items:
+            continue
+        path = a.get("path", "")
+        if os.path.isdir(path) or os.path.isfile(limb_archive.get_archive_path(path)):
+            items[is_deform].append((a["name"], a["name"], ""))
+        else:
+            print(f"[AutoRig] Skipping '{a['name']}' – missing folder: {path}")
+    return {k: sorted(v) for k, v in items.items()}
+
+def get_cached_registry_items(is_deform=True):
+    key = _registry_stat_key(get_registry_path())
+    if _registry_cache["key"] != key:
+        _registry_cache["items"] = _build_registry_items(load_registry())
+        _registry_cache["key"] = key
+    return _registry_cache["items"].get(is_deform, [])
 
 # ------------------------
 # Core JSON I/O
 # ------------------------
 
+def get_registry_store():
+    return json_journal.get_store(get_registry_path())
+
 def load_registry():
-    path = get_registry_path()
-    if not os.path.isfile(path):
-        return []
     try:
-        with open(path, "r") as f:
-            return json.load(f)
+        return get_registry_store().load()
     except Exception as e:
         print(f"[AutoRig] Failed to load registry: {e}")
         return []
 
 def save_registry(data):
     try:
-        with open(get_registry_path(), "w") as f:
-            json.dump(data, f, indent=4)
+        get_registry_store().replace(data)
+    except Exception as e:
+        print(f"[AutoRig] Failed to save registry: {e}")
+    finally:
+        invalidate_registry_cache()
+
+def registry_batch():
+    # Entries updated inside the block are written once, compacted, on exit
+    return get_registry_store().batch()
+
+def _get_entry(name):
+    try:
+        return get_registry_store().get(name)
+    except Exception as e:
+        print(f"[AutoRig] Failed to load registry: {e}")
+        return None
+
+def _put_entry(entry):
+    try:
+        get_registry_store().put(entry)
     except Exception as e:
         print(f"[AutoRig] Failed to save registry: {e}")
+    finally:
+        invalidate_registry_cache()
 
 # ------------------------
 # Armature Management
 # ------------------------
 
 def get_items_by_type(is_deform=True):
-    data = load_registry()
-    items = []
-    for a in data:
-        if a.get("is_deform") == is_deform:
-            path = a.get("path", "")
-            if os.path.isdir(path):
-                items.append((a["name"], a["name"], ""))
-            else:
-                print(f"[AutoRig] Skipping '{a['name']}' – missing folder: {path}")
-    return sorted(items)
+    from . import rig_storage
+    return rig_storage.get_storage().armature_items(is_deform)
 
-def get_limb_items_from(armature_name):
-    print(f"[AutoRig Debug] Fetching limbs for armature: {armature_name}")
-    items = []
+NO_ARMATURE_ITEMS = [("", "<no armature>", "")]
 
+def get_limb_items_from(armature_name):
     if not armature_name:
-        return [("", "<no armature>", "")]
-
-    scripts_dir = bpy.utils.user_resource('SCRIPTS')
-    driver_path = os.path.join(scripts_dir, "addons", "Auto_Rig", "Hierarchy", armature_name)
-    print(f"[AutoRig Debug] Looking in: {driver_path}")
+        return NO_ARMATURE_ITEMS
 
-    if os.path.isdir(driver_path):
-        for file in os.listdir(driver_path):
-            if file.endswith(".json") and not file.startswith(".meta"):
-                name = os.path.splitext(file)[0]
-                items.append((name, name, ""))
-
-    if not items:
-        items.append(("none", "No limbs found", ""))
-
-    return sorted(items)
+    from . import rig_storage
+    return rig_storage.get_storage().limb_items(armature_name)
 
 
 def update_is_deform(armature_name, is_deform):
-    data = load_registry()
-    for a in data:
-        if a["name"] == armature_name:
-            a["is_deform"] = is_deform
-            break
-    else:
+    entry = _get_entry(armature_name)
+    if entry is None:
         print(f"[AutoRig] Armature '{armature_name}' not found in registry.")
-    save_registry(data)
+        return
+    entry["is_deform"] = is_deform
+    _put_entry(entry)
 
 def create_or_update_entry(name, path=None, is_deform=False, notes=""):
-    data = load_registry()
-    for a in data:
-        if a["name"] == name:
-            a.update({
-                "is_deform": is_deform,
-                "notes": notes,
-                "path": path or a.get("path"),
-            })
-            break
+    entry = _get_entry(name)
+    if entry is not None:
+        entry.update({
+            "is_deform": is_deform,
+            "notes": notes,
+            "path": path or entry.get("path"),
+        })
     else:
-        data.append({
+        entry = {
             "name": name,
             "created": datetime.now().strftime("%Y-%m-%d"),
             "is_deform": is_deform,
             "notes": notes,
             "path": path or "",
-        })
-    save_registry(data)
+        }
+    _put_entry(entry)
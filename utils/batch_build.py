@@ -0,0 +1,363 @@
+import os
+import sys
+import json
+import time
+import tempfile
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+
+from . import limb_io, limb_archive, rig_plan, retarget
+
+# Headless batch rig builder.
+#
+# A manifest lists the characters to rig overnight:
+#
+#   {
+#     "chains": "Hierarchy/limb_chains.json",          optional
+#     "characters": [
+#       {"name": "hero", "source": "driver.01", "target": "root.003",
+#        "limbs": ["arm_l", "arm_r"],                   optional, all limbs
+#        "blend": "chars/hero.blend",                   optional, opened first
+#        "output": "rigged/hero.blend"}                 optional, saved after
+#     ]
+#   }
+#
+# Relative paths are relative to the manifest. Every character is planned
+# (limbs read, retargeted, merged into a rig_plan.RigPlan) in a process
+# pool without bpy, then handed in manifest order to a backend while the
+# pool keeps planning the rest. With one worker, or where no process pool
+# can be started, the same plans are made one by one in this process.
+# Backends expose:
+#
+#   name
+#   run(job, plan)  -> {"created", "updated", "timings"}, raises on failure
+#   close()
+#
+# BlenderBackend runs each plan in `blender -b`, FakeBackend builds it
+# into plain dicts so the runner can be exercised without Blender.
+
+HIERARCHY_DIR = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "Hierarchy"))
+MAX_WORKERS = min(8, os.cpu_count() or 4)
+
+
+class BatchBuildError(Exception):
+    pass
+
+
+# ------------------------
+# Manifest and planning
+# ------------------------
+
+def load_manifest(manifest):
+    """
+    Reads a manifest path or dict into a list of jobs with absolute paths
+    and the chain list resolved.
+    """
+    base_dir = os.getcwd()
+    if not isinstance(manifest, dict):
+        base_dir = os.path.dirname(os.path.abspath(manifest))
+        with open(manifest, "r") as f:
+            manifest = json.load(f)
+
+    def resolve(path):
+        return os.path.normpath(os.path.join(base_dir, path)) if path else None
+
+    chains = None
+    chains_path = resolve(manifest.get("chains"))
+    if chains_path and os.path.isfile(chains_path):
+        with open(chains_path, "r") as f:
+            chains = json.load(f)
+
+    hierarchy_dir = resolve(manifest.get("hierarchy")) or HIERARCHY_DIR
+    jobs = []
+    for entry in manifest.get("characters", ()):
+        if not entry.get("name") or not entry.get("source"):
+            raise BatchBuildError(f"Manifest character needs a name and a source: {entry}")
+        jobs.append({
+            "name": entry["name"],
+            "source": entry["source"],
+            "target": entry.get("target"),
+            "limbs": entry.get("limbs"),
+            "armature": entry.get("armature") or entry["name"],
+            "blend": resolve(entry.get("blend")),
+            "output": resolve(entry.get("output")),
+            "hierarchy": hierarchy_dir,
+            "chains": chains,
+        })
+    return jobs
+
+def list_limbs(armature_dir):
+    # Limb files of an armature folder, or the members of its archive
+    names = set()
+    if os.path.isdir(armature_dir):
+        names = {os.path.splitext(f)[0] for f in os.listdir(armature_dir) if limb_io.is_limb_file(f)}
+    archive = limb_archive.get_archive_path(armature_dir)
+    if not names and os.path.isfile(archive):
+        names = set(limb_archive.read_toc(archive))
+    return sorted(names)
+
+def plan_character(job):
+    """
+    Pure Python planning for one job, run in the worker processes.
+    Returns (plan dict, limb names, seconds).
+    """
+    start = time.perf_counter()
+    source_dir = os.path.join(job["hierarchy"], job["source"])
+    available = list_limbs(source_dir)
+    if job["limbs"]:
+        limb_names = [name for name in job["limbs"] if name in available]
+        missing = sorted(set(job["limbs"]) - set(available))
+        if missing:
+            raise BatchBuildError(f"'{job['source']}' has no limbs {missing}")
+    elif job["chains"]:
+        limb_names = rig_plan.resolve_chains(job["chains"], available)
+    else:
+        limb_names = available
+    if not limb_names:
+        raise BatchBuildError(f"No limbs found for '{job['source']}'")
+
+    source_limbs = {name: limb_io.load_limb_data(os.path.join(source_dir, f"{name}.json"))
+                    for name in limb_names}
+    if job["target"]:
+        target_dir = os.path.join(job["hierarchy"], job["target"])
+        target_available = set(list_limbs(target_dir))
+        target_limbs = {name: limb_io.load_limb_data(os.path.join(target_dir, f"{name}.json"))
+                        for name in limb_names if name in target_available}
+        if target_limbs:
+            retarget.retarget_limbs(source_limbs, target_limbs)
+
+    plan = rig_plan.build_plan(source_limbs)
+    return plan.to_dict(), limb_names, time.perf_counter() - start
+
+
+# ------------------------
+# Backends
+# ------------------------
+
+class FakeBackend:
+    """
+    Builds plans into {armature name: {bone: parent}} in memory. Checks the
+    plan order the way an EDIT session would need it: every parent has to
+    be built before its children unless it is an external parent. Names in
+    fail make those characters raise, to exercise the failure report.
+    """
+    name = "fake"
+
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.armatures = {}
+
+    def run(self, job, plan):
+        if job["name"] in self.fail:
+            raise BatchBuildError(f"Simulated failure for '{job['name']}'")
+
+        start = time.perf_counter()
+        bones = self.armatures.setdefault(job["armature"], {})
+        existing = set(bones)
+        external = plan.get("external_parents", {})
+        for name, record in plan["bones"]:
+            parent = record.get("parent")
+            if parent and parent not in bones and name not in external:
+                raise BatchBuildError(f"'{name}' comes before its parent '{parent}'")
+            bones[name] = parent
+        created = len(set(bones) - existing)
+        return {
+            "created": created,
+            "updated": len(plan["bones"]) - created,
+            "timings": {"build": time.perf_counter() - start},
+        }
+
+    def close(self):
+        pass
+
+
+class BlenderBackend:
+    """
+    Runs each plan in a fresh `blender -b` process: the character's .blend
+    is opened when the job has one, the plan is built with
+    create_limb_chain.build_plan_steps and the file is saved to the job's
+    output. The result comes back through a JSON file.
+    """
+    name = "blender"
+
+    def __init__(self, blender_path=None, timeout=600):
+        self.blender_path = blender_path or os.environ.get("BLENDER", "blender")
+        self.timeout = timeout
+
+    def command(self, job, plan_path, result_path):
+        package = __package__.rsplit(".", 1)[0]
+        addons_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        expr = (f"import sys; sys.path.insert(0, {addons_dir!r}); "
+                f"from {package}.utils import batch_build; batch_build.blender_main()")
+        cmd = [self.blender_path, "-b"]
+        if job.get("blend"):
+            cmd.append(job["blend"])
+        cmd += ["--python-exit-code", "1", "--python-expr", expr, "--", plan_path, result_path]
+        return cmd
+
+    def run(self, job, plan):
+        with tempfile.TemporaryDirectory(prefix="autorig_batch_") as tmp:
+            plan_path = os.path.join(tmp, "plan.json")
+            result_path = os.path.join(tmp, "result.json")
+            with open(plan_path, "w") as f:
+                json.dump({"job": {k: v for k, v in job.items() if k != "chains"}, "plan": plan}, f)
+
+            try:
+                proc = subprocess.run(self.command(job, plan_path, result_path),
+                                      capture_output=True, text=True, timeout=self.timeout)
+            except subprocess.TimeoutExpired:
+                raise BatchBuildError(f"Blender timed out after {self.timeout}s")
+            except OSError as e:
+                raise BatchBuildError(f"Could not start Blender '{self.blender_path}': {e}")
+
+            if proc.returncode != 0 or not os.path.isfile(result_path):
+                tail = "\n".join((proc.stderr or proc.stdout).strip().splitlines()[-5:])
+                raise BatchBuildError(f"Blender exited with {proc.returncode}: {tail}")
+            with open(result_path, "r") as f:
+                result = json.load(f)
+
+        if result.get("error"):
+            raise BatchBuildError(result["error"])
+        return result
+
+    def close(self):
+        pass
+
+
+def blender_main():
+    """
+    Entry point inside `blender -b`, see BlenderBackend. Arguments after
+    "--" are the plan file and the result file.
+    """
+    import bpy # type: ignore
+    from . import create_limb_chain, rig_steps
+
+    plan_path, result_path = sys.argv[sys.argv.index("--") + 1:][:2]
+    with open(plan_path, "r") as f:
+        data = json.load(f)
+    job = data["job"]
+
+    result = {}
+    try:
+        plan = rig_plan.RigPlan.from_dict(data["plan"])
+        report = rig_steps.run_steps(create_limb_chain.build_plan_steps(plan, armature_name=job["armature"]))
+        if job.get("output"):
+            os.makedirs(os.path.dirname(job["output"]), exist_ok=True)
+            bpy.ops.wm.save_as_mainfile(filepath=job["output"])
+        result = {k: report.get(k) for k in ("created", "updated", "timings")}
+    except Exception as e:
+        result = {"error": f"{type(e).__name__}: {e}"}
+    with open(result_path, "w") as f:
+        json.dump(result, f)
+
+
+# ------------------------
+# Runner
+# ------------------------
+
+def run_batch(manifest, backend, max_workers=None):
+    """
+    Plans every character of the manifest in a process pool and builds them
+    with backend in manifest order. A failing character is recorded and the
+    batch carries on. Returns the batch report.
+    """
+    jobs = load_manifest(manifest)
+    start = time.perf_counter()
+    results = []
+
+    workers = min(max_workers or MAX_WORKERS, max(len(jobs), 1))
+    pool = _open_pool(workers) if workers > 1 else None
+    try:
+        if pool is None:
+            futures = [_SerialPlan(job) for job in jobs]
+        else:
+            futures = [pool.submit(plan_character, job) for job in jobs]
+        for job, future in zip(jobs, futures):
+            results.append(_run_job(job, future, backend))
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+    backend.close()
+
+    report = _batch_report(results, time.perf_counter() - start, backend.name)
+    print_report(report)
+    return report
+
+class _SerialPlan:
+    # Stands in for a pool future, plans the job when its result is asked for
+    def __init__(self, job):
+        self.job = job
+
+    def result(self):
+        return plan_character(self.job)
+
+def _open_pool(workers):
+    try:
+        return ProcessPoolExecutor(max_workers=workers)
+    except (OSError, NotImplementedError, ImportError) as e:
+        print(f"[AutoRig] No process pool ({e}), planning in this process")
+        return None
+
+def _run_job(job, future, backend):
+    result = {"character": job["name"], "ok": False, "stage": "plan", "error": None,
+              "bones": 0, "limbs": [], "plan_seconds": 0.0, "build_seconds": 0.0}
+    try:
+        plan, limb_names, plan_seconds = future.result()
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+        return result
+
+    result.update(stage="build", limbs=limb_names, plan_seconds=plan_seconds, bones=len(plan["bones"]))
+    start = time.perf_counter()
+    try:
+        backend.run(job, plan)
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    else:
+        result["ok"] = True
+    result["build_seconds"] = time.perf_counter() - start
+    return result
+
+def _batch_report(results, seconds, backend_name):
+    built = [r for r in results if r["ok"]]
+    bones = sum(r["bones"] for r in built)
+    return {
+        "backend": backend_name,
+        "characters": results,
+        "built": len(built),
+        "failed": len(results) - len(built),
+        "bones": bones,
+        "seconds": seconds,
+        "characters_per_minute": len(built) * 60.0 / seconds if seconds else 0.0,
+        "bones_per_second": bones / seconds if seconds else 0.0,
+    }
+
+def print_report(report):
+    for r in report["characters"]:
+        if r["ok"]:
+            print(f"[AutoRig] {r['character']:<20} ok      {r['bones']:5d} bones  "
+                  f"plan {r['plan_seconds'] * 1000:7.1f} ms  build {r['build_seconds'] * 1000:8.1f} ms")
+        else:
+            print(f"[AutoRig] {r['character']:<20} FAILED  ({r['stage']}) {r['error']}")
+    print(f"[AutoRig] Batch ({report['backend']}): {report['built']} built, {report['failed']} failed, "
+          f"{report['bones']} bones in {report['seconds']:.2f}s "
+          f"({report['characters_per_minute']:.1f} characters/min, {report['bones_per_second']:.0f} bones/s)")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build rigs for every character in a manifest.")
+    parser.add_argument("manifest")
+    parser.add_argument("--backend", choices=("blender", "fake"), default="blender")
+    parser.add_argument("--blender", help="Blender executable, $BLENDER or 'blender' by default")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--report", help="Write the batch report to this JSON file")
+    args = parser.parse_args()
+
+    backend = BlenderBackend(args.blender) if args.backend == "blender" else FakeBackend()
+    report = run_batch(args.manifest, backend, max_workers=args.workers)
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+    sys.exit(1 if report["failed"] else 0)
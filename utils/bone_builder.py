@@ -0,0 +1,129 @@
+import bpy # type: ignore
+from contextlib import contextmanager
+
+from . import bone_geometry, rig_steps
+
+# Batched edit-bone builder.
+#
+# Every bpy.ops.object.mode_set call flushes the depsgraph, so toggling into
+# EDIT mode per bone made mode switches the bulk of a build. The builder
+# enters EDIT mode once, creates every bone through armature.data.edit_bones,
+# parents them in the same session and leaves once. All mode switches go
+# through mode_set() here so the number of operator calls can be reported.
+
+_ops_calls = {"count": 0}
+
+
+def mode_set(mode):
+    _ops_calls["count"] += 1
+    bpy.ops.object.mode_set(mode=mode)
+
+def get_ops_call_count():
+    return _ops_calls["count"]
+
+def reset_ops_call_count():
+    _ops_calls["count"] = 0
+
+@contextmanager
+def edit_session(armature, exit_mode='OBJECT'):
+    """
+    Makes armature active and yields its edit_bones, entering EDIT mode
+    only if it is not there already. Switches to exit_mode on the way out
+    (None stays in EDIT mode).
+    """
+    bpy.context.view_layer.objects.active = armature
+    if armature.mode != 'EDIT':
+        mode_set('EDIT')
+    try:
+        yield armature.data.edit_bones
+    finally:
+        if exit_mode and exit_mode != 'EDIT':
+            mode_set(exit_mode)
+
+
+def _assign_parents(ebones, parents, report):
+    # Parents are assigned after every bone exists, so order does not matter
+    for name, parent in parents:
+        if not parent:
+            continue
+        parent_bone = ebones.get(parent)
+        if parent_bone is None:
+            report["missing_parents"].append((name, parent))
+            continue
+        ebones[name].parent = parent_bone
+        report["parented"] += 1
+
+def _finish_report(armature, report, start_calls):
+    for name, parent in report["missing_parents"]:
+        print(f"[INFO] Skipping parent assignment for '{name}' - parent '{parent}' not found.")
+
+    report["ops_calls"] = get_ops_call_count() - start_calls
+    print(f"[AutoRig] Built {report['created']} new / {report['updated']} existing bones "
+          f"on '{armature.name}' with {report['ops_calls']} bpy.ops calls")
+    return report
+
+def build_edit_bones(armature, bones, exit_mode='OBJECT'):
+    """
+    Creates or updates bones in a single EDIT session.
+
+    bones is an iterable of (name, head, tail, parent). Bones may parent to
+    ones already on the armature. Returns a report dict with created,
+    updated, parented, missing_parents and ops_calls.
+    """
+    if not armature or armature.type != 'ARMATURE':
+        raise ValueError("Armature not found or invalid")
+
+    start_calls = get_ops_call_count()
+    report = {"created": 0, "updated": 0, "parented": 0, "missing_parents": []}
+
+    with edit_session(armature, exit_mode) as ebones:
+        parents = []
+        for name, head, tail, parent in bones:
+            bone = ebones.get(name)
+            if bone is None:
+                bone = ebones.new(name)
+                report["created"] += 1
+            else:
+                report["updated"] += 1
+            bone.head = head
+            bone.tail = tail
+            parents.append((name, parent))
+
+        _assign_parents(ebones, parents, report)
+
+    return _finish_report(armature, report, start_calls)
+
+def build_edit_bones_from_arrays(armature, arrays, exit_mode='OBJECT'):
+    """
+    Same as build_edit_bones for a bone_geometry.BoneArrays. Missing bones
+    are created first, then every head, tail and roll is written in bulk.
+    The report also says which write path ("foreach" or "loop") was used.
+    """
+    return rig_steps.run_steps(build_edit_bones_from_arrays_steps(armature, arrays, exit_mode))
+
+def build_edit_bones_from_arrays_steps(armature, arrays, exit_mode='OBJECT'):
+    # Step generator behind build_edit_bones_from_arrays, see rig_steps
+    if not armature or armature.type != 'ARMATURE':
+        raise ValueError("Armature not found or invalid")
+
+    start_calls = get_ops_call_count()
+    report = {"created": 0, "updated": 0, "parented": 0, "missing_parents": []}
+    total = len(arrays) + 1
+
+    with edit_session(armature, exit_mode) as ebones:
+        done = 0
+        for chunk in rig_steps.chunks(arrays.names):
+            for name in chunk:
+                if ebones.get(name) is None:
+                    ebones.new(name)
+                    report["created"] += 1
+                else:
+                    report["updated"] += 1
+            done += len(chunk)
+            yield done, total
+
+        report["write_path"] = bone_geometry.push_to_edit_bones(ebones, arrays)
+        _assign_parents(ebones, zip(arrays.names, arrays.parents), report)
+        yield total, total
+
+    return _finish_report(armature, report, start_calls)
@@ -0,0 +1,110 @@
+import json
+
+# Bulk appearance stage for the builders. Bones are grouped by collection
+# name, custom shape and bone color up front, so every collection is looked
+# up or created once, every shape object is resolved once and every distinct
+# color is decoded once, however many bones share them.
+
+
+def _value_key(value):
+    return json.dumps(value, sort_keys=True) if isinstance(value, (dict, list)) else value
+
+def group_by_collection(records):
+    groups = {}
+    for name, record in records.items():
+        for col_name in record.get("bone_collections") or ():
+            groups.setdefault(col_name, []).append(name)
+    return groups
+
+def group_by_value(records, key):
+    # {value key: (value, [bone names])}, bones without a value are left out
+    groups = {}
+    for name, record in records.items():
+        value = record.get(key)
+        if value is None:
+            continue
+        group = groups.setdefault(_value_key(value), (value, []))
+        group[1].append(name)
+    return groups
+
+
+def assign_collections(armature, records):
+    collections = armature.data.collections
+    existing = {col.name: col for col in collections}
+    bones = armature.data.bones
+
+    assigned = 0
+    for col_name, names in group_by_collection(records).items():
+        col = existing.get(col_name)
+        if col is None:
+            col = existing[col_name] = collections.new(name=col_name)
+        for name in names:
+            bone = bones.get(name)
+            if bone:
+                col.assign(bone)
+                assigned += 1
+    return assigned
+
+def apply_custom_shapes(armature, records):
+    import bpy # type: ignore
+    pose_bones = armature.pose.bones
+    applied = 0
+    for key in ("custom_shape", "custom_shape_transform"):
+        for shape_name, names in group_by_value(records, key).values():
+            shape = bpy.data.objects.get(shape_name)
+            if shape is None:
+                continue
+            for name in names:
+                pose_bone = pose_bones.get(name)
+                if pose_bone:
+                    setattr(pose_bone, key, shape)
+                    applied += 1
+    return applied
+
+COLOR_SLOTS = ("normal", "select", "active")
+
+def read_bone_color(pose_bone, all_slots=False):
+    # Same layout as the exporter writes. all_slots keeps the custom colors
+    # of non-CUSTOM palettes too, which apply_bone_colors may overwrite
+    if not hasattr(pose_bone, "bone_color"):
+        return None
+    color = pose_bone.bone_color
+    custom = None
+    if all_slots or color.palette == 'CUSTOM':
+        custom = {slot: list(getattr(color.custom, slot)) for slot in COLOR_SLOTS}
+    return {"palette": color.palette, "custom_colors": custom}
+
+def write_bone_color(pose_bone, color):
+    if not hasattr(pose_bone, "bone_color"):
+        return False
+    custom = color.get("custom_colors") or {}
+    pose_bone.bone_color.palette = color["palette"]
+    for slot in COLOR_SLOTS:
+        if slot in custom:
+            setattr(pose_bone.bone_color.custom, slot, custom[slot])
+    return True
+
+def apply_bone_colors(armature, records):
+    pose_bones = armature.pose.bones
+    applied = 0
+    for color, names in group_by_value(records, "bone_color").values():
+        if not color.get("palette"):
+            continue
+        if color["palette"] != 'CUSTOM':
+            color = {"palette": color["palette"]}
+        for name in names:
+            pose_bone = pose_bones.get(name)
+            if pose_bone is not None and write_bone_color(pose_bone, color):
+                applied += 1
+    return applied
+
+def apply_bone_appearance(armature, records):
+    """
+    Collections, custom shapes and bone colors for {name: record} in one
+    grouped pass. Call from POSE or OBJECT mode. Returns per-stage counts.
+    """
+    return {
+        "collections": assign_collections(armature, records),
+        "custom_shapes": apply_custom_shapes(armature, records),
+        "bone_colors": apply_bone_colors(armature, records),
+    }
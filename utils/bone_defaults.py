@@ -0,0 +1,161 @@
+import os
+import copy
+import json
+
+# Default values of a serialized bone record. The exporter leaves out every
+# value that matches, loaders fill them back in, and the builders skip the
+# RNA writes for them on freshly created bones since Blender already starts
+# new pose bones with these values.
+
+BONE_DEFAULTS = {
+    "bone_collections": [],
+    "parent": None,
+    "children": [],
+    "bone_color": None,
+    "custom_shape": None,
+    "custom_shape_transform": None,
+    "custom_shape_scale_xyz": [1.0, 1.0, 1.0],
+    "custom_shape_translation": [0.0, 0.0, 0.0],
+    "custom_shape_wire_width": 1.0,
+    "custom_shape_rotation": None,
+    "use_custom_shape_bone_size": True,
+    "lock_location": [False, False, False],
+    "lock_rotation": [False, False, False],
+    "lock_rotation_w": False,
+    "lock_scale": [False, False, False],
+    "rotation_mode": "QUATERNION",
+    "constraints": [],
+    "drivers": [],
+    "custom_properties": {},
+    "rna_ui": {},
+}
+
+# Pose bone settings written straight through setattr by the builders
+POSE_SETTINGS = (
+    "custom_shape_scale_xyz",
+    "custom_shape_translation",
+    "custom_shape_wire_width",
+    "use_custom_shape_bone_size",
+    "lock_location",
+    "lock_rotation",
+    "lock_rotation_w",
+    "lock_scale",
+    "rotation_mode",
+)
+
+
+def is_default(key, value):
+    return key in BONE_DEFAULTS and value == BONE_DEFAULTS[key]
+
+def elide_bone_defaults(bone):
+    return {k: v for k, v in bone.items() if not is_default(k, v)}
+
+def fill_bone_defaults(bone):
+    for key, value in BONE_DEFAULTS.items():
+        if key not in bone:
+            bone[key] = copy.copy(value)
+    return bone
+
+def fill_limb_defaults(data):
+    # Works in place on both limb file layouts
+    if "ue_bones" in data or "controllers" in data:
+        sections = [data.get("ue_bones", {}), data.get("controllers", {})]
+    else:
+        sections = [{k: v for k, v in data.items() if not k.startswith("_")}]
+    for bones in sections:
+        for bone in bones.values():
+            if isinstance(bone, dict):
+                fill_bone_defaults(bone)
+    return data
+
+def pose_settings_to_write(attrs, is_new_bone):
+    # New bones already hold the defaults, existing ones may not
+    settings = {}
+    for key in POSE_SETTINGS:
+        value = attrs.get(key, BONE_DEFAULTS[key])
+        if is_new_bone and value == BONE_DEFAULTS[key]:
+            continue
+        settings[key] = value
+    return settings
+
+
+# ------------------------
+# Round-trip check
+# ------------------------
+
+def elide_limb_defaults(data):
+    # Copy of a limb with every bone elided, both layouts
+    if "ue_bones" in data or "controllers" in data:
+        elided = dict(data)
+        for section in ("ue_bones", "controllers"):
+            if section in elided:
+                elided[section] = {n: elide_bone_defaults(b) for n, b in elided[section].items()}
+        return elided
+    return {n: (b if n.startswith("_") else elide_bone_defaults(b)) for n, b in data.items()}
+
+def roundtrip_mismatches(data):
+    """
+    Elides and refills every bone of one limb dict and returns the
+    (bone, key) pairs that do not come back as they were.
+    """
+    mismatches = []
+    elided = elide_limb_defaults(copy.deepcopy(data))
+    restored = dict(_iter_bones(fill_limb_defaults(json.loads(json.dumps(elided)))))
+    for name, bone in _iter_bones(data):
+        filled = restored.get(name, {})
+        for key, value in bone.items():
+            if filled.get(key) != value:
+                mismatches.append((name, key))
+        for key in filled.keys() - bone.keys():
+            if not is_default(key, filled[key]):
+                mismatches.append((name, key))
+    return mismatches
+
+def verify_roundtrip(hierarchy_dir):
+    """
+    Runs roundtrip_mismatches over every limb file under hierarchy_dir.
+    Dot-directories (.plans, .store) and files that are not limbs are
+    skipped. Returns a list of (file, bone, key) mismatches, empty when
+    everything round-trips.
+    """
+    mismatches = []
+    checked = 0
+    for armature_name in sorted(os.listdir(hierarchy_dir)):
+        folder = os.path.join(hierarchy_dir, armature_name)
+        if armature_name.startswith(".") or not os.path.isdir(folder):
+            continue
+        for file in sorted(os.listdir(folder)):
+            if not file.endswith(".json") or file.startswith("."):
+                continue
+            path = os.path.join(folder, file)
+            with open(path, "r") as f:
+                data = json.load(f)
+            if not _is_limb(data):
+                continue
+
+            mismatches += [(path, name, key) for name, key in roundtrip_mismatches(data)]
+            checked += sum(1 for _ in _iter_bones(data))
+
+    print(f"[AutoRig] Round-trip checked {checked} bones, {len(mismatches)} mismatches")
+    return mismatches
+
+def _is_limb(data):
+    # Plain limb files only, bone store manifests hold digests instead of bones
+    if not isinstance(data, dict) or "_manifest" in data:
+        return False
+    return all(isinstance(bone, dict) for _, bone in _iter_bones(data))
+
+def _iter_bones(data):
+    if "ue_bones" in data or "controllers" in data:
+        for section in ("ue_bones", "controllers"):
+            yield from data.get(section, {}).items()
+    else:
+        for name, bone in data.items():
+            if not name.startswith("_"):
+                yield name, bone
+
+
+if __name__ == "__main__":
+    hierarchy = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "Hierarchy"))
+    for mismatch in verify_roundtrip(hierarchy):
+        print("[MISMATCH]", *mismatch)
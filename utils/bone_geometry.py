@@ -0,0 +1,122 @@
+import numpy as np
+
+from . import limb_binary
+
+# Vectorized bone geometry.
+#
+# A limb's heads and tails are loaded into N x 3 float arrays once and
+# scaled as one array operation instead of per-bone list math.
+# push_to_edit_bones() writes the result back with foreach_get/foreach_set
+# when the edit bone collection supports it.
+#
+# Nothing in here imports bpy, the kernel works on plain arrays and only
+# push_to_edit_bones() touches Blender data through the collection it is
+# handed.
+
+SCALE = 0.01
+
+
+class BoneArrays:
+    """
+    names[i] / parents[i] with heads[i], tails[i] (float64 N x 3) and
+    rolls[i]. has_roll marks the bones whose roll came from the file; only
+    those are written back.
+    """
+
+    def __init__(self, names, heads, tails, rolls=None, parents=None, has_roll=None):
+        count = len(names)
+        self.names = list(names)
+        self.heads = np.asarray(heads, dtype=np.float64).reshape(count, 3)
+        self.tails = np.asarray(tails, dtype=np.float64).reshape(count, 3)
+        self.rolls = np.zeros(count) if rolls is None else np.asarray(rolls, dtype=np.float64).reshape(count)
+        self.parents = list(parents) if parents is not None else [None] * count
+        self.has_roll = np.zeros(count, dtype=bool) if has_roll is None else np.asarray(has_roll, dtype=bool)
+
+    @classmethod
+    def from_bones(cls, bones, default_head=(0.0, 0.0, 0.0), default_tail=(0.0, 1.0, 0.0)):
+        # bones: {name: record} as found in the limb files
+        names = list(bones)
+        heads = [bones[n].get("head") or default_head for n in names]
+        tails = [bones[n].get("tail") or default_tail for n in names]
+        rolls = [bones[n].get("roll") or 0.0 for n in names]
+        has_roll = [bones[n].get("roll") is not None for n in names]
+        parents = [bones[n].get("parent") for n in names]
+        if not names:
+            heads = tails = np.zeros((0, 3))
+        return cls(names, heads, tails, rolls, parents, has_roll)
+
+    @classmethod
+    def from_binary(cls, limb, default_head=(0.0, 0.0, 0.0), default_tail=(0.0, 1.0, 0.0)):
+        # limb: limb_binary.BinaryLimb. Reads the mapped arrays directly,
+        # no per-bone dicts are built
+        names = limb.names
+        count = limb.count
+        flags = np.asarray(limb.flags, dtype=np.uint8).reshape(count)
+        heads = np.array(limb.heads, dtype=np.float64).reshape(count, 3)
+        tails = np.array(limb.tails, dtype=np.float64).reshape(count, 3)
+        heads[(flags & limb_binary.FLAG_HAS_HEAD) == 0] = default_head
+        tails[(flags & limb_binary.FLAG_HAS_TAIL) == 0] = default_tail
+        has_roll = (flags & limb_binary.FLAG_HAS_ROLL) != 0
+
+        indices = np.asarray(limb.parents, dtype=np.int64).reshape(count)
+        external = limb.sidecar.get("external_parents", {}) if (indices < 0).any() else {}
+        parents = [names[p] if p >= 0 else external.get(name) for name, p in zip(names, indices.tolist())]
+        return cls(names, heads, tails, limb.rolls, parents, has_roll)
+
+    def __len__(self):
+        return len(self.names)
+
+    def scale(self, factor):
+        # In place, returns self
+        self.heads *= factor
+        self.tails *= factor
+        return self
+
+
+# ------------------------
+# Blender write-back
+# ------------------------
+
+def _push_foreach(ebones, arrays):
+    order = {bone.name: i for i, bone in enumerate(ebones)}
+    rows = np.fromiter((order[n] for n in arrays.names), dtype=np.int64, count=len(arrays))
+    total = len(order)
+
+    for attr, values, width, mask in (
+        ("head", arrays.heads, 3, None),
+        ("tail", arrays.tails, 3, None),
+        ("roll", arrays.rolls, 1, arrays.has_roll),
+    ):
+        if mask is not None and not mask.any():
+            continue
+        buf = np.empty(total * width, dtype=np.float32)
+        ebones.foreach_get(attr, buf)
+        buf = buf.reshape(total, width) if width > 1 else buf
+        if mask is None:
+            buf[rows] = values
+        else:
+            buf[rows[mask]] = values[mask]
+        ebones.foreach_set(attr, buf.ravel())
+
+def _push_loop(ebones, arrays):
+    for i, name in enumerate(arrays.names):
+        bone = ebones[name]
+        bone.head = arrays.heads[i].tolist()
+        bone.tail = arrays.tails[i].tolist()
+        if arrays.has_roll[i]:
+            bone.roll = float(arrays.rolls[i])
+
+def push_to_edit_bones(ebones, arrays):
+    """
+    Writes heads, tails and rolls into existing edit bones. Returns
+    "foreach" when the bulk path was used, "loop" otherwise.
+    """
+    if not len(arrays):
+        return "foreach"
+    try:
+        _push_foreach(ebones, arrays)
+        return "foreach"
+    except (AttributeError, TypeError, RuntimeError) as e:
+        print(f"[AutoRig] foreach_set unavailable for edit bones ({e}), writing per bone")
+        _push_loop(ebones, arrays)
+        return "loop"
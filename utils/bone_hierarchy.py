@@ -0,0 +1,84 @@
+# Parent/children index for chain traversal.
+#
+# Bone.children and EditBone.children are rebuilt by RNA on every access,
+# and walking them recursively hits Python's recursion limit on long
+# procedural chains (tails, tentacles, hair). The index is built once from
+# any bone collection and walked with an explicit stack, visiting bones in
+# the same depth-first preorder as the old recursive traversals.
+
+
+class BoneIndex:
+    def __init__(self, bones):
+        """
+        bones is armature.data.bones or armature.data.edit_bones. Children
+        keep the order the bone's children collection lists them in.
+        """
+        self.parents = {}
+        self.children = {}
+        for bone in bones:
+            self.children.setdefault(bone.name, [])
+            parent = bone.parent.name if bone.parent else None
+            self.parents[bone.name] = parent
+            if parent is not None:
+                self.children.setdefault(parent, []).append(bone.name)
+
+    def __contains__(self, name):
+        return name in self.parents
+
+    def filtered_children(self, name):
+        # Children as written to the "children" field, twist bones left out
+        return [child for child in self.children.get(name, ()) if "twist" not in child.lower()]
+
+    def walk(self, roots, stops=(), visited=None, reached_stops=None):
+        """
+        Bone names reachable from roots, depth first, not entering stop
+        bones or bones already in visited. Stop bones the walk ran into are
+        appended to reached_stops when a list is given.
+        """
+        stops = set(stops)
+        visited = set() if visited is None else visited
+        order = []
+        for root in roots:
+            if root not in self.parents:
+                continue
+            stack = [root]
+            while stack:
+                name = stack.pop()
+                if name in visited:
+                    continue
+                if name in stops:
+                    if reached_stops is not None:
+                        reached_stops.append(name)
+                    continue
+                visited.add(name)
+                order.append(name)
+                stack.extend(reversed(self.children.get(name, ())))
+        return order
+
+
+def benchmark_walk(depth=5000):
+    # A single procedural chain deeper than the recursion limit
+    import sys
+    import time
+
+    class _Bone:
+        def __init__(self, name, parent):
+            self.name = name
+            self.parent = parent
+
+    bones = []
+    for i in range(depth):
+        bones.append(_Bone(f"tail_{i:05d}", bones[-1] if bones else None))
+
+    start = time.perf_counter()
+    index = BoneIndex(bones)
+    order = index.walk([bones[0].name])
+    elapsed = time.perf_counter() - start
+    assert order == [b.name for b in bones]
+    print(f"[AutoRig] Walked {len(order)} bones (recursion limit {sys.getrecursionlimit()}) "
+          f"in {elapsed * 1000:.1f} ms")
+    return elapsed
+
+
+if __name__ == "__main__":
+    benchmark_walk()
@@ -0,0 +1,200 @@
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+
+from . import limb_writer
+
+# Content-addressed bone store shared by every armature in Hierarchy/.
+#
+# Each canonicalized bone record is saved once under
+# Hierarchy/.store/objects/<2 hex>/<rest>.json, keyed by its sha1. Its
+# constraint and driver lists are split out into their own blobs and
+# referenced as "_constraints"/"_drivers". A limb file exported this way is
+# a manifest that maps bone names to hashes:
+#
+#   {"_meta": {...}, "_manifest": {"version": 1, "store": "../.store"},
+#    "ue_bones": {"clavicle_l": "3f2a..."}, "controllers": {...}}
+#
+# Near-identical variants of the same limb then share most of their blobs,
+# and loading them through resolve_manifest() parses each shared blob once.
+
+STORE_DIRNAME = ".store"
+MANIFEST_VERSION = 1
+BLOB_REFS = ("constraints", "drivers")
+CACHE_SIZE = 8192
+
+_blob_cache = OrderedDict()
+# Limb loader threads resolve manifests concurrently
+_blob_lock = threading.Lock()
+
+
+def get_store_dir(hierarchy_dir):
+    return os.path.join(hierarchy_dir, STORE_DIRNAME)
+
+def canonical_bytes(value):
+    return json.dumps(limb_writer.canonical_value(value), separators=(",", ":"), sort_keys=True).encode("utf-8")
+
+def blob_path(store_dir, digest):
+    return os.path.join(store_dir, "objects", digest[:2], f"{digest[2:]}.json")
+
+def put_blob(store_dir, value):
+    raw = canonical_bytes(value)
+    digest = hashlib.sha1(raw).hexdigest()
+    path = blob_path(store_dir, digest)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(raw)
+        os.replace(tmp_path, path)
+    return digest
+
+def get_blob(store_dir, digest):
+    key = (store_dir, digest)
+    with _blob_lock:
+        if key in _blob_cache:
+            _blob_cache.move_to_end(key)
+            return _blob_cache[key]
+
+    with open(blob_path(store_dir, digest), "r") as f:
+        value = json.load(f)
+    with _blob_lock:
+        _blob_cache[key] = value
+        if len(_blob_cache) > CACHE_SIZE:
+            _blob_cache.popitem(last=False)
+    return value
+
+def clear_blob_cache():
+    with _blob_lock:
+        _blob_cache.clear()
+
+
+# ------------------------
+# Bones and manifests
+# ------------------------
+
+def put_bone(store_dir, record):
+    record = dict(record)
+    for key in BLOB_REFS:
+        value = record.pop(key, None)
+        if value:
+            record[f"_{key}"] = put_blob(store_dir, value)
+    return put_blob(store_dir, record)
+
+def get_bone(store_dir, digest):
+    # Shallow copy, so callers can set head/tail without touching the cache
+    record = dict(get_blob(store_dir, digest))
+    for key in BLOB_REFS:
+        ref = record.pop(f"_{key}", None)
+        if ref:
+            record[key] = get_blob(store_dir, ref)
+    return record
+
+def is_manifest(data):
+    return isinstance(data, dict) and "_manifest" in data
+
+def write_manifest(path, meta, bones, store_dir):
+    """
+    Stores every (section, name, record) from bones and writes the limb
+    manifest to path. Only blobs that are not in the store yet hit the disk.
+    Returns the number of bones written.
+    """
+    manifest = {
+        "_meta": dict(meta),
+        "_manifest": {
+            "version": MANIFEST_VERSION,
+            "store": os.path.relpath(store_dir, os.path.dirname(os.path.abspath(path))),
+        },
+        "ue_bones": {},
+        "controllers": {},
+    }
+    for section, name, record in bones:
+        manifest[section][name] = put_bone(store_dir, record)
+
+    bone_count = len(manifest["ue_bones"]) + len(manifest["controllers"])
+    manifest["_meta"]["bone_count"] = bone_count
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+    return bone_count
+
+def resolve_manifest(data, path):
+    info = data["_manifest"]
+    if info.get("version", 1) > MANIFEST_VERSION:
+        raise ValueError(f"[ERROR] Unsupported limb manifest version in {path}")
+    store_dir = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(path)), info.get("store", "")))
+
+    limb = {"_meta": data.get("_meta", {})}
+    for section in ("ue_bones", "controllers"):
+        limb[section] = {name: get_bone(store_dir, digest) for name, digest in data.get(section, {}).items()}
+    return limb
+
+
+# ------------------------
+# Garbage collection
+# ------------------------
+
+def _manifest_files(hierarchy_dir):
+    for armature_name in os.listdir(hierarchy_dir):
+        folder = os.path.join(hierarchy_dir, armature_name)
+        if armature_name.startswith(".") or not os.path.isdir(folder):
+            continue
+        for file in os.listdir(folder):
+            if file.endswith(".json") and not file.startswith(".meta"):
+                yield os.path.join(folder, file)
+
+def collect_garbage(hierarchy_dir, dry_run=False):
+    """
+    Deletes every blob in Hierarchy/.store that no manifest references any
+    more. Returns the number of blobs removed (or that would be, on dry_run).
+    """
+    store_dir = get_store_dir(hierarchy_dir)
+    objects_dir = os.path.join(store_dir, "objects")
+    if not os.path.isdir(objects_dir):
+        return 0
+
+    live = set()
+    for path in _manifest_files(hierarchy_dir):
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"[AutoRig] Skipping {path} during store GC: {e}")
+            continue
+        if not is_manifest(data):
+            continue
+        for section in ("ue_bones", "controllers"):
+            for digest in data.get(section, {}).values():
+                live.add(digest)
+                try:
+                    record = get_blob(store_dir, digest)
+                except OSError:
+                    print(f"[AutoRig] Missing blob {digest} referenced by {path}")
+                    continue
+                for key in BLOB_REFS:
+                    ref = record.get(f"_{key}")
+                    if ref:
+                        live.add(ref)
+
+    removed = 0
+    for prefix in os.listdir(objects_dir):
+        prefix_dir = os.path.join(objects_dir, prefix)
+        if not os.path.isdir(prefix_dir):
+            continue
+        for file in os.listdir(prefix_dir):
+            digest = prefix + os.path.splitext(file)[0]
+            if file.endswith(".json") and digest not in live:
+                removed += 1
+                if not dry_run:
+                    os.remove(os.path.join(prefix_dir, file))
+                    with _blob_lock:
+                        _blob_cache.pop((store_dir, digest), None)
+        if not dry_run and not os.listdir(prefix_dir):
+            os.rmdir(prefix_dir)
+
+    print(f"[AutoRig] Bone store GC: {removed} unreferenced blobs {'found' if dry_run else 'removed'}, {len(live)} live")
+    return removed
@@ -0,0 +1,152 @@
+import time
+
+# Per-type constraint schemas for the exporters. Instead of walking
+# dir(constraint) for every constraint of every bone, the list of RNA
+# properties worth saving is built once per constraint type from
+# bl_rna.properties and reused for every later export.
+#
+# Each schema entry is (identifier, kind) where kind is one of
+#   "value"   plain int/float/bool/string/enum
+#   "flag"    enum flag, comes back from RNA as a set
+#   "array"   vector or matrix property
+#   "id"      pointer to an ID datablock, saved by name
+
+_schemas = {}
+
+SKIPPED_PROPERTIES = {"rna_type", "name", "type"}
+
+
+def _is_id_struct(struct):
+    while struct is not None:
+        if struct.identifier == "ID":
+            return True
+        struct = struct.base
+    return False
+
+def build_constraint_schema(constraint):
+    schema = []
+    for prop in constraint.bl_rna.properties:
+        identifier = prop.identifier
+        if identifier in SKIPPED_PROPERTIES or prop.is_readonly:
+            continue
+
+        if prop.type == 'COLLECTION':
+            continue
+        elif prop.type == 'POINTER':
+            # Pointers to nested structs are skipped, datablocks are kept by name
+            if not _is_id_struct(prop.fixed_type):
+                continue
+            kind = "id"
+        elif prop.type == 'ENUM' and prop.is_enum_flag:
+            kind = "flag"
+        elif getattr(prop, "array_length", 0) > 0:
+            kind = "array"
+        else:
+            kind = "value"
+        schema.append((identifier, kind))
+    return tuple(schema)
+
+def get_constraint_schema(constraint):
+    schema = _schemas.get(constraint.type)
+    if schema is None:
+        schema = _schemas[constraint.type] = build_constraint_schema(constraint)
+    return schema
+
+def id_properties(constraint_type):
+    # Identifiers saved by name, for a type whose schema is already built
+    return {identifier for identifier, kind in _schemas.get(constraint_type, ()) if kind == "id"}
+
+def clear_constraint_schemas():
+    _schemas.clear()
+
+def _array_value(value):
+    # Matrices iterate as rows of vectors, vectors as plain numbers
+    return [list(v) if hasattr(v, "__iter__") else v for v in value]
+
+def serialize_constraint_values(constraint, kinds=None):
+    d = {}
+    for identifier, kind in get_constraint_schema(constraint):
+        if kinds is not None and kind not in kinds:
+            continue
+        try:
+            value = getattr(constraint, identifier)
+        except AttributeError:
+            continue
+
+        if kind == "id":
+            d[identifier] = value.name if value else None
+        elif kind == "flag":
+            d[identifier] = sorted(value)
+        elif kind == "array":
+            d[identifier] = _array_value(value)
+        else:
+            d[identifier] = value
+    return d
+
+def apply_constraint_values(constraint, data):
+    """
+    Writes values saved by serialize_constraint_values back onto a
+    constraint. ID pointers are looked up by name in bpy.data.objects.
+    """
+    import bpy # type: ignore
+
+    for identifier, kind in get_constraint_schema(constraint):
+        if identifier not in data:
+            continue
+        value = data[identifier]
+        try:
+            if kind == "id":
+                value = bpy.data.objects.get(value) if value else None
+            elif kind == "flag":
+                value = set(value)
+            setattr(constraint, identifier, value)
+        except (AttributeError, TypeError, ValueError) as e:
+            print(f"[AutoRig] Could not set {constraint.type}.{identifier}: {e}")
+
+
+# ------------------------
+# Benchmark
+# ------------------------
+
+def _serialize_by_reflection(constraint):
+    # The dir() based serializer this module replaces, kept for comparison
+    from .export_clean_data import clean_value
+
+    d = {"name": constraint.name, "type": constraint.type}
+    for attr in dir(constraint):
+        if not attr.startswith("_") and not callable(getattr(constraint, attr)):
+            try:
+                d[attr] = clean_value(getattr(constraint, attr))
+            except:
+                continue
+    return d
+
+def benchmark_constraint_serialization(armature, repeats=20):
+    """
+    Times the reflection serializer against the schema serializer over every
+    constraint on the armature's pose bones and prints both.
+    """
+    from .export_clean_data import serialize_constraint
+
+    constraints = [c for pb in armature.pose.bones for c in pb.constraints]
+    if not constraints:
+        print("[AutoRig] No constraints to benchmark.")
+        return None
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for c in constraints:
+            _serialize_by_reflection(c)
+    reflection = time.perf_counter() - start
+
+    clear_constraint_schemas()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for c in constraints:
+            serialize_constraint(c)
+    schema = time.perf_counter() - start
+
+    print(f"[AutoRig] {len(constraints)} constraints x {repeats}: "
+          f"reflection {reflection * 1000:.1f} ms, schema {schema * 1000:.1f} ms "
+          f"({reflection / schema if schema else float('inf'):.1f}x)")
+    return {"constraints": len(constraints), "reflection": reflection, "schema": schema}
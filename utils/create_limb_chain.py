@@ -4,7 +4,10 @@ from typing import Dict, List, Tuple
 from mathutils import Vector  # type: ignore
 import bpy # type: ignore
 import json
+import time
 from pathlib import Path
+from contextlib import contextmanager
+from . import limb_io, bone_builder, bone_geometry, retarget, rig_steps
 
 def vector_sub(a, b):
     return [a[i] - b[i] for i in range(3)]
@@ -57,7 +60,8 @@ def build_segment_dict_from_json(json_path: str) -> Dict[str, Tuple[List[float],
 
 
 def create_bone_in_edit_mode(armature, bone_name, head, tail):
-    bpy.ops.object.mode_set(mode='EDIT')
+    if armature.mode != 'EDIT':
+        bone_builder.mode_set('EDIT')
     ebones = armature.data.edit_bones
 
     if bone_name in ebones:
@@ -76,31 +80,12 @@ def scale_vector(vec, scale):
     return [x * scale for x in vec]
 
 def build_bones_from_json_file(meta, bone_dict, armature):
-    """ 
-    
     """
-    if not armature or armature.type != 'ARMATURE':
-        raise ValueError("Armature not found or invalid")
-    
-    bpy.context.view_layer.objects.active = armature
-    bpy.ops.object.mode_set(mode='EDIT')
-
-    # First pass: create bones
-    for bone_name, bone_data in bone_dict.items():
-        head = scale_vector(bone_data["head"], SCALE)
-        tail = scale_vector(bone_data["tail"], SCALE)
-        create_bone_in_edit_mode(armature, bone_name, head, tail)
-        
-    # Pass 2: Assign all parents
-    for bone_name, bone_data in bone_dict.items():
-        
-        parent = bone_data["parent"]
-        if parent and parent in armature.data.edit_bones and bone_name in armature.data.edit_bones:
-            armature.data.edit_bones[bone_name].parent = armature.data.edit_bones[parent]
-        elif parent:
-            print(f"[INFO] Skipping parent assignment for '{bone_name}' - parent '{parent}' not found.")
-
-    bpy.ops.object.mode_set(mode='OBJECT')
+    Scales every bone of bone_dict as one array, then creates and parents
+    them in one EDIT session. Returns the bone_builder report.
+    """
+    arrays = bone_geometry.BoneArrays.from_bones(bone_dict).scale(SCALE)
+    return bone_builder.build_edit_bones_from_arrays(armature, arrays)
 
 def get_source_file_path(armature_name="driver", limb_chain_name="arm_l"):
     scripts_dir = bpy.utils.user_resource('SCRIPTS')
@@ -110,25 +95,14 @@ def get_source_file_path(armature_name="driver", limb_chain_name="arm_l"):
 
 
 def get_data_from_file(filepath):
-    if not os.path.exists(filepath):
-        raise FileNotFoundError(f"[ERROR] File not found: {filepath}")
-
-    with open(filepath, 'r') as f:
-        data = json.load(f)
-
-    return data
+    # JSON and binary (.arlb) limb files are both detected here
+    return limb_io.load_limb_data(filepath)
 
 
 def retarget_ue_bones(source, target):
-    for bone_name in source:
-        if bone_name in target:
-            source[bone_name]["head"] = target[bone_name].get("head")
-            child_name = target[bone_name].get("child")
-            if child_name and child_name in target:
-                source[bone_name]["tail"] = target[child_name].get("head")
-            else:
-                source[bone_name]["tail"] = [0,0,0]
-    return source
+    # Joined by name once; tails come from the target's first child, or the
+    # target's own tail for leaf bones
+    return retarget.retarget_bones(source, target)
 
 def scale_and_apply(armature):
     bpy.ops.object.mode_set(mode='OBJECT')
@@ -158,11 +132,11 @@ def apply_global_transform(armature, meta_data):
     print(f"[apply_global_transform] armature location now: {armature.location}")
     print(f"[apply_global_transform] armature scale now: {armature.scale}")
     
-def get_or_create_armature():
-    new_armature_name = bpy.context.scene.autorig_props.new_arm_name
-    
-    if not new_armature_name:
-        new_armature_name = "auto_rig"
+def get_new_armature_name():
+    return bpy.context.scene.autorig_props.new_arm_name or "auto_rig"
+
+def get_or_create_armature(name=None):
+    new_armature_name = name or get_new_armature_name()
         
     # Try to get the armature object by name
     arm = bpy.data.objects.get(new_armature_name)
@@ -188,18 +162,25 @@ def get_or_create_armature():
     return arm
 
 def main(source_armature_name, limb_chain_name, target_armature_name=None, ):
-    source_file = get_source_file_path(source_armature_name, limb_chain_name)
-    target_file = None
-    if target_armature_name:
-        target_file = get_source_file_path(target_armature_name, limb_chain_name)
-    
-    source_data = get_data_from_file(source_file)
-    target_data = get_data_from_file(target_file) if target_file else {}
-
-    ue_bones_data = source_data.get("ue_bones", {})
-    retargeting_bones_data = target_data.get("ue_bones", {})
-    controller_bones_data = source_data.get("controllers", {})
-    meta_data = source_data.get("_meta", {})        
+    """
+    limb_chain_name may be a single limb or a list of limbs. A list is read
+    in parallel and built into the armature in one pass.
+    """
+    from . import limb_loader
+
+    limb_names = [limb_chain_name] if isinstance(limb_chain_name, str) else list(limb_chain_name)
+    source_limbs = limb_loader.read_storage_limbs(source_armature_name, limb_names)
+    target_limbs = limb_loader.read_storage_limbs(target_armature_name, limb_names) if target_armature_name else {}
+
+    ue_bones_data = {}
+    controller_bones_data = {}
+    for data in source_limbs.values():
+        ue_bones_data.update(data.get("ue_bones", {}))
+        controller_bones_data.update(data.get("controllers", {}))
+    retargeting_bones_data = {}
+    for data in target_limbs.values():
+        retargeting_bones_data.update(data.get("ue_bones", {}))
+    meta_data = source_limbs[limb_names[0]].get("_meta", {}) if limb_names else {}
     armature  = get_or_create_armature()
     apply_global_transform(armature, meta_data)
 
@@ -211,9 +192,191 @@ def main(source_armature_name, limb_chain_name, target_armature_name=None, ):
         ue_bones_data = retarget_ue_bones(ue_bones_data, retargeting_bones_data)
         print(json.dumps(ue_bones_data, indent=4))
         
-    build_bones_from_json_file(meta_data, ue_bones_data, armature)
-    build_bones_from_json_file(meta_data, controller_bones_data, armature)
-
+    # Controllers parent to ue bones, so both sections go in one session
+    return build_bones_from_json_file(meta_data, {**ue_bones_data, **controller_bones_data}, armature)
+
+
+@contextmanager
+def _timed(timings, stage):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - start
+
+def _timed_steps(timings, stage, steps, offset, total):
+    # Times only the work between yields, not the idle ticks of a modal run,
+    # and maps the stage's progress onto the whole build
+    timings.setdefault(stage, 0.0)
+    try:
+        while True:
+            start = time.perf_counter()
+            try:
+                done, _ = next(steps)
+            except StopIteration as stop:
+                timings[stage] += time.perf_counter() - start
+                return stop.value
+            timings[stage] += time.perf_counter() - start
+            yield offset + done, total
+    finally:
+        steps.close()
+
+ROLLBACK_POSE_FIELDS = ("bone_collections", "custom_shape", "custom_shape_transform")
+
+def _capture_rollback(armature, created, names):
+    from . import rig_diff, bone_collections
+
+    pose_bones = armature.pose.bones
+    return {
+        "created": created,
+        "location": tuple(armature.location),
+        "scale": tuple(armature.scale),
+        "bones": set(armature.data.bones.keys()),
+        "collections": {col.name for col in armature.data.collections},
+        "snapshot": rig_diff.snapshot_armature(armature, names),
+        # Every custom slot too, apply_bone_colors may overwrite them
+        "bone_colors": {name: bone_collections.read_bone_color(pose_bones[name], all_slots=True)
+                        for name in names if name in pose_bones},
+    }
+
+def _rollback_build(armature, state):
+    from . import rig_diff, bone_defaults, bone_collections
+
+    if state["created"]:
+        data = armature.data
+        if armature.mode != 'OBJECT':
+            bpy.context.view_layer.objects.active = armature
+            bone_builder.mode_set('OBJECT')
+        bpy.data.objects.remove(armature, do_unlink=True)
+        bpy.data.armatures.remove(data)
+        print("[AutoRig] Build cancelled, removed the new armature")
+        return
+
+    with bone_builder.edit_session(armature) as ebones:
+        for ebone in [b for b in ebones if b.name not in state["bones"]]:
+            ebones.remove(ebone)
+        for name, snap in state["snapshot"].items():
+            ebone = ebones.get(name)
+            if ebone is not None:
+                ebone.head = snap["head"]
+                ebone.tail = snap["tail"]
+        for name, snap in state["snapshot"].items():
+            ebone = ebones.get(name)
+            if ebone is not None:
+                ebone.parent = ebones.get(snap["parent"]) if snap["parent"] else None
+
+    fields = ROLLBACK_POSE_FIELDS + bone_defaults.POSE_SETTINGS
+    for name, snap in state["snapshot"].items():
+        rig_diff.apply_pose_fields(armature, name, snap, fields)
+    for name, color in state["bone_colors"].items():
+        pose_bone = armature.pose.bones.get(name)
+        if pose_bone is not None and color is not None:
+            bone_collections.write_bone_color(pose_bone, color)
+    for col in [c for c in armature.data.collections if c.name not in state["collections"]]:
+        armature.data.collections.remove(col)
+    armature.location = state["location"]
+    armature.scale = state["scale"]
+    print(f"[AutoRig] Build cancelled, restored '{armature.name}'")
+
+def _pose_steps(armature, plan, existing, report):
+    from . import bone_collections, bone_defaults
+
+    total = len(plan) + 1
+    report.update(bone_collections.apply_bone_appearance(armature, plan.bones))
+    yield 1, total
+
+    done = 1
+    for chunk in rig_steps.chunks(plan.bones.items()):
+        for name, record in chunk:
+            pose_bone = armature.pose.bones.get(name)
+            if pose_bone is None:
+                continue
+            for key, value in bone_defaults.pose_settings_to_write(record, name not in existing).items():
+                setattr(pose_bone, key, value)
+        done += len(chunk)
+        yield done, total
+
+    bone_builder.mode_set('OBJECT')
+    report["ops_calls"] += 1
+
+def build_full_rig(source_armature_name, target_armature_name=None, chains=None):
+    """
+    Builds every limb chain the source armature has as one plan: the limbs
+    are loaded in parallel, retargeted together, ordered with cross-limb
+    parents resolved and created in a single EDIT session. chains is the
+    content of limb_chains.json; without it every limb of the source is
+    used. Returns the build report with per-stage timings in seconds.
+    """
+    return rig_steps.run_steps(build_full_rig_steps(source_armature_name, target_armature_name, chains))
+
+def build_full_rig_steps(source_armature_name, target_armature_name=None, chains=None):
+    # Step generator behind build_full_rig, see rig_steps. Closing it before
+    # it finishes rolls the armature back to where it was
+    from . import rig_storage, limb_loader, rig_plan, retarget
+
+    timings = {}
+    with _timed(timings, "resolve"):
+        storage = rig_storage.get_storage()
+        available = [name for name, _, _ in storage.limb_items(source_armature_name) if name != "none"]
+        limb_names = rig_plan.resolve_chains(chains, available) if chains else available
+        if not limb_names:
+            print(f"[AutoRig] No limb chains found for '{source_armature_name}'")
+            return None
+
+    with _timed(timings, "load"):
+        source_limbs = limb_loader.read_storage_limbs(source_armature_name, limb_names, storage)
+        target_limbs = {}
+        if target_armature_name:
+            target_available = {name for name, _, _ in storage.limb_items(target_armature_name)}
+            target_limbs = limb_loader.read_storage_limbs(
+                target_armature_name, [n for n in limb_names if n in target_available], storage)
+    yield 0, 1
+
+    with _timed(timings, "retarget"):
+        if target_limbs:
+            retarget.retarget_limbs(source_limbs, target_limbs)
+
+    with _timed(timings, "plan"):
+        plan = rig_plan.build_plan(source_limbs)
+        print(f"[AutoRig] Full rig plan: {plan.summary()}")
+    yield 0, 1
+
+    report = yield from build_plan_steps(plan, timings)
+    report["limbs"] = limb_names
+    return report
+
+def build_plan_steps(plan, timings=None, armature_name=None):
+    """
+    Builds an already resolved rig_plan.RigPlan into armature_name (the
+    new armature name from the panel by default) as a step generator.
+    Shared by build_full_rig_steps and the headless batch builder.
+    """
+    timings = {} if timings is None else timings
+    with _timed(timings, "armature"):
+        armature_name = armature_name or get_new_armature_name()
+        created = bpy.data.objects.get(armature_name) is None
+        armature = get_or_create_armature(armature_name)
+        existing = set(armature.data.bones.keys())
+        rollback = _capture_rollback(armature, created, [n for n in plan.bones if n in existing])
+        apply_global_transform(armature, plan.meta)
+
+    stage_total = len(plan) + 1
+    try:
+        arrays = bone_geometry.BoneArrays.from_bones(plan.bones).scale(SCALE)
+        edit_steps = bone_builder.build_edit_bones_from_arrays_steps(armature, arrays, exit_mode='POSE')
+        report = yield from _timed_steps(timings, "edit_bones", edit_steps, 0, 2 * stage_total)
+        yield from _timed_steps(timings, "pose", _pose_steps(armature, plan, existing, report),
+                                stage_total, 2 * stage_total)
+    except BaseException:
+        _rollback_build(armature, rollback)
+        raise
+
+    limb_count = len(set(plan.limbs.values()))
+    report["timings"] = timings
+    print(f"[AutoRig] Built full rig '{armature.name}' from {limb_count} limbs in {sum(timings.values()):.3f}s")
+    for stage, seconds in timings.items():
+        print(f"[AutoRig]   {stage:<11} {seconds * 1000:8.1f} ms")
+    return report
 
 if __name__ == "__main__":
     
@@ -0,0 +1,58 @@
+import re
+
+# Bone name -> driver lookup for the exporters. Each fcurve's data_path is
+# parsed once and the map is kept per armature for the rest of the session,
+# so exporting several limbs does not rescan every driver for every bone.
+# The map stores indices into animation_data.drivers rather than the fcurves
+# themselves. It is checked against the (data_path, array_index) signature
+# of the drivers, a plain attribute read per driver with no parsing, so
+# mode switches and other armature updates keep the map while any edit to
+# a driver's path (bone renames included) rebuilds it.
+
+_BONE_PATH = re.compile(r'^pose\.bones\["((?:[^"\\]|\\.)*)"\]')
+
+_cache = {}
+
+
+def bone_name_from_path(data_path):
+    match = _BONE_PATH.match(data_path)
+    if not match:
+        return None
+    return match.group(1).replace('\\"', '"').replace('\\\\', '\\')
+
+def driver_signature(fcurves):
+    return tuple((fc.data_path, fc.array_index) for fc in fcurves)
+
+def build_driver_index(fcurves):
+    index = {}
+    for i, fc in enumerate(fcurves):
+        bone_name = bone_name_from_path(fc.data_path)
+        if bone_name is not None:
+            index.setdefault(bone_name, []).append(i)
+    return index
+
+def get_driver_index(armature):
+    """
+    Returns (index, drivers) where index maps bone names to positions in
+    drivers. Reuses the cached map while the armature's drivers are unchanged.
+    """
+    if not armature.animation_data:
+        _cache.pop(armature.name, None)
+        return {}, []
+
+    drivers = armature.animation_data.drivers
+    signature = driver_signature(drivers)
+    entry = _cache.get(armature.name)
+    if entry is None or entry["signature"] != signature:
+        entry = _cache[armature.name] = {
+            "signature": signature,
+            "index": build_driver_index(drivers),
+        }
+    return entry["index"], drivers
+
+def clear_driver_index(armature_name=None):
+    if armature_name is None:
+        _cache.clear()
+    else:
+        _cache.pop(armature_name, None)
+
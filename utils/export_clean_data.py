@@ -1,6 +1,7 @@
 import bpy # type: ignore
-import json
 import os
+import time
+from . import constraint_schema, driver_index, bone_defaults, bone_hierarchy
 
 
 def clean_value(value):
@@ -40,6 +41,7 @@ def serialize_object_metadata(obj_name, obj):
 def serialize_driver(driver):
     return {
         "data_path": driver.data_path,
+        "array_index": driver.array_index,
         "expression": driver.driver.expression,
         "variables": [
             {
@@ -54,123 +56,222 @@ def serialize_driver(driver):
 
 def serialize_constraint(constraint):
     d = {"name": constraint.name, "type": constraint.type}
-    for attr in dir(constraint):
-        if not attr.startswith("_") and not callable(getattr(constraint, attr)):
-            try:
-                d[attr] = clean_value(getattr(constraint, attr))
-            except:
-                continue
+    d.update(constraint_schema.serialize_constraint_values(constraint))
     return d
 
 def is_controller_bone(name):
     lowered = name.lower()
     return any(prefix in lowered for prefix in ["ik_", "fk_", "mch_", "ctrl_", "helper", "pole", "target"])
 
-def serialize_bone_data(chain, armature):
-    root_bones, stop_bones = chain
-    ue_bones = {}
-    controllers = {}
-
+def snapshot_edit_bones(armature):
     bpy.context.view_layer.objects.active = armature
     bpy.ops.object.mode_set(mode='EDIT')
     ebones = armature.data.edit_bones
-    edit_bone_data = {
+    return {
         eb.name: {"head": list(eb.head), "tail": list(eb.tail)} for eb in ebones
     }
 
-    bpy.ops.object.mode_set(mode='POSE')
-    visited = set()
-
-    def traverse(bone):
-        if bone.name in visited or bone.name in stop_bones:
-            return
-        visited.add(bone.name)
-
-        pose_bone = bone
-        shape_obj = pose_bone.custom_shape
-        transform_obj = pose_bone.custom_shape_transform
-        bone_dict = {
-            "bone_collections": [col.name for col in pose_bone.bone.collections]
-                if hasattr(pose_bone.bone, "collections") else [],
-            "parent": pose_bone.parent.name if pose_bone.parent else None,
-            "children": [child.name for child in pose_bone.children if "twist" not in child.name.lower()],
-            "bone_color": {
-                "palette": pose_bone.bone_color.palette,
-                "custom_colors": {
-                    "normal": list(pose_bone.bone_color.custom.normal),
-                    "select": list(pose_bone.bone_color.custom.select),
-                    "active": list(pose_bone.bone_color.custom.active)
-                } if pose_bone.bone_color.palette == 'CUSTOM' else None
-            } if hasattr(pose_bone, "bone_color") else None,
-            "custom_shape": shape_obj.name if shape_obj else None,
-            "custom_shape_transform": transform_obj.name if transform_obj else None,
-            "custom_shape_scale_xyz": list(pose_bone.custom_shape_scale_xyz),
-            "custom_shape_translation": list(pose_bone.custom_shape_translation),
-            "custom_shape_wire_width": pose_bone.custom_shape_wire_width,
-            "custom_shape_rotation": list(shape_obj.rotation_euler) if shape_obj else None,
-            "use_custom_shape_bone_size": pose_bone.use_custom_shape_bone_size,
-            "lock_location": list(pose_bone.lock_location),
-            "lock_rotation": list(pose_bone.lock_rotation),
-            "lock_rotation_w": pose_bone.lock_rotation_w,
-            "lock_scale": list(pose_bone.lock_scale),
-            "rotation_mode": pose_bone.rotation_mode,
-            "constraints": [serialize_constraint(c) for c in pose_bone.constraints],
-            "drivers": [
-                serialize_driver(d) for d in armature.animation_data.drivers
-                if d.data_path.startswith(f'pose.bones["{bone.name}"]')
-            ] if armature.animation_data else [],
-            "custom_properties": {
-                k: clean_value(pose_bone[k]) for k in pose_bone.keys() if not k.startswith("_")
-            },
-            "rna_ui": {
-                k: clean_value(pose_bone["_RNA_UI"][k]) for k in pose_bone.get("_RNA_UI", {}) if k in pose_bone
-            }
+def serialize_pose_bone(pose_bone, edit_bone_data, bone_drivers, drivers, index=None):
+    shape_obj = pose_bone.custom_shape
+    transform_obj = pose_bone.custom_shape_transform
+    bone_dict = {
+        "bone_collections": [col.name for col in pose_bone.bone.collections]
+            if hasattr(pose_bone.bone, "collections") else [],
+        "parent": pose_bone.parent.name if pose_bone.parent else None,
+        "children": index.filtered_children(pose_bone.name) if index else
+            [child.name for child in pose_bone.children if "twist" not in child.name.lower()],
+        "bone_color": {
+            "palette": pose_bone.bone_color.palette,
+            "custom_colors": {
+                "normal": list(pose_bone.bone_color.custom.normal),
+                "select": list(pose_bone.bone_color.custom.select),
+                "active": list(pose_bone.bone_color.custom.active)
+            } if pose_bone.bone_color.palette == 'CUSTOM' else None
+        } if hasattr(pose_bone, "bone_color") else None,
+        "custom_shape": shape_obj.name if shape_obj else None,
+        "custom_shape_transform": transform_obj.name if transform_obj else None,
+        "custom_shape_scale_xyz": list(pose_bone.custom_shape_scale_xyz),
+        "custom_shape_translation": list(pose_bone.custom_shape_translation),
+        "custom_shape_wire_width": pose_bone.custom_shape_wire_width,
+        "custom_shape_rotation": list(shape_obj.rotation_euler) if shape_obj else None,
+        "use_custom_shape_bone_size": pose_bone.use_custom_shape_bone_size,
+        "lock_location": list(pose_bone.lock_location),
+        "lock_rotation": list(pose_bone.lock_rotation),
+        "lock_rotation_w": pose_bone.lock_rotation_w,
+        "lock_scale": list(pose_bone.lock_scale),
+        "rotation_mode": pose_bone.rotation_mode,
+        "constraints": [serialize_constraint(c) for c in pose_bone.constraints],
+        "drivers": [serialize_driver(drivers[i]) for i in bone_drivers.get(pose_bone.name, ())],
+        "custom_properties": {
+            k: clean_value(pose_bone[k]) for k in pose_bone.keys() if not k.startswith("_")
+        },
+        "rna_ui": {
+            k: clean_value(pose_bone["_RNA_UI"][k]) for k in pose_bone.get("_RNA_UI", {}) if k in pose_bone
         }
+    }
 
-        if bone.name in edit_bone_data:
-            bone_dict.update(edit_bone_data[bone.name])
+    if pose_bone.name in edit_bone_data:
+        bone_dict.update(edit_bone_data[pose_bone.name])
+    return bone_dict
 
-        if is_controller_bone(bone.name):
-            controllers[bone.name] = bone_dict
-        else:
-            ue_bones[bone.name] = bone_dict
+def bone_section(name):
+    return "controllers" if is_controller_bone(name) else "ue_bones"
+
+def chain_bone_names(chain, armature, index=None):
+    """
+    Bone names of a (roots, stops) chain in export order: depth first from
+    each root, stopping at the stop bones. Works in any mode.
+    """
+    root_bones, stop_bones = chain
+    index = index or bone_hierarchy.BoneIndex(armature.data.bones)
+    return index.walk(root_bones, stop_bones)
 
-        for child in bone.children:
-            traverse(child)
+def iter_bone_data(chain, armature):
+    """
+    Yields (section, bone_name, bone_dict) in traversal order, section being
+    "ue_bones" or "controllers".
+    """
+    edit_bone_data = snapshot_edit_bones(armature)
 
-    for root in root_bones:
-        if root in armature.pose.bones:
-            traverse(armature.pose.bones[root])
+    bpy.ops.object.mode_set(mode='POSE')
+    bone_drivers, drivers = driver_index.get_driver_index(armature)
+    pose_bones = armature.pose.bones
+    index = bone_hierarchy.BoneIndex(armature.data.bones)
 
-    return {"ue_bones": ue_bones, "controllers": controllers}
+    for name in chain_bone_names(chain, armature, index):
+        bone_dict = serialize_pose_bone(pose_bones[name], edit_bone_data, bone_drivers, drivers, index)
+        yield bone_section(name), name, bone_defaults.elide_bone_defaults(bone_dict)
 
-def export_limb_file(limb_name, chain, armature, output_path):
-    from . import armature_registry
-    
-    obj_name = f'{limb_name}_{armature.name}'
-    bone_data = serialize_bone_data(chain, armature)
-    data = {
-        "_meta": serialize_object_metadata(obj_name, armature),
-        "ue_bones": bone_data["ue_bones"],
-        "controllers": bone_data["controllers"]
-    }
+def serialize_bone_data(chain, armature):
+    data = {"ue_bones": {}, "controllers": {}}
+    for section, name, bone_dict in iter_bone_data(chain, armature):
+        data[section][name] = bone_dict
+    return data
 
-    with open(output_path, "w") as f:
-        json.dump(data, f, indent=4)
+def _write_limb(limb_name, armature, output_path, meta, bones, pretty, dedupe, fingerprint=None):
+    from . import rig_storage, limb_fingerprints
 
-    # Add to registry
-    full_path = os.path.abspath(os.path.dirname(output_path))
+    # Bones go to the storage backend as the traversal produces them,
+    # the backend also updates the registry
     is_deform = "deform" in armature.name.lower()
-    armature_registry.create_or_update_entry(
-        name=armature.name,
-        path=full_path,
+    written_path = rig_storage.get_storage().write_limb_stream(
+        armature.name,
+        limb_name,
+        meta,
+        bones,
+        path=output_path,
         is_deform=is_deform,
-        notes="Auto-added from export_clean_data"
+        notes="Auto-added from export_clean_data",
+        pretty=pretty,
+        dedupe=dedupe,
     )
 
-    print(f"Exported: {output_path}")
-    return output_path
+    # export_all_limbs records the fingerprint it wrote, any other export
+    # drops the stored one so the next export_all_limbs writes it again
+    if fingerprint is None and output_path:
+        limb_fingerprints.forget_limb(os.path.dirname(output_path), limb_name)
+
+    print(f"Exported: {written_path}")
+    return written_path
+
+def export_limb_file(limb_name, chain, armature, output_path, pretty=False, dedupe=False):
+    obj_name = f'{limb_name}_{armature.name}'
+    meta = serialize_object_metadata(obj_name, armature)
+    return _write_limb(limb_name, armature, output_path, meta, iter_bone_data(chain, armature), pretty, dedupe)
+
+def export_limb_file_steps(limb_name, chain, armature, output_path, pretty=False, dedupe=False):
+    """
+    Step generator version of export_limb_file for the modal exporter, see
+    rig_steps. Bones are serialized a chunk per step and the file is only
+    written by the last step, so closing it early leaves the library
+    untouched. Returns the output path.
+    """
+    from . import rig_steps
+
+    obj_name = f'{limb_name}_{armature.name}'
+    meta = serialize_object_metadata(obj_name, armature)
+
+    # The chain is a subset of the armature, its bone count bounds the steps
+    total = len(armature.data.bones) + 1
+    bones = []
+    for item in iter_bone_data(chain, armature):
+        bones.append(item)
+        if len(bones) % rig_steps.CHUNK_SIZE == 0:
+            yield len(bones), total
+
+    yield total - 1, total
+    from . import armature_registry
+    with armature_registry.registry_batch():
+        return _write_limb(limb_name, armature, output_path, meta, iter(bones), pretty, dedupe)
+
+
+def serialize_armature_bones(armature, names, index=None):
+    """
+    {name: elided bone dict} for names from one EDIT snapshot and one POSE
+    pass, each bone serialized once however many chains share it.
+    """
+    edit_bone_data = snapshot_edit_bones(armature)
+
+    bpy.ops.object.mode_set(mode='POSE')
+    bone_drivers, drivers = driver_index.get_driver_index(armature)
+    pose_bones = armature.pose.bones
+    index = index or bone_hierarchy.BoneIndex(armature.data.bones)
+    return {
+        name: bone_defaults.elide_bone_defaults(
+            serialize_pose_bone(pose_bones[name], edit_bone_data, bone_drivers, drivers, index))
+        for name in names
+    }
+
+def export_all_limbs(armature, chains, output_dir, ext=".json", pretty=False, dedupe=False, force=False):
+    """
+    Exports every chain ({"name", "roots", "stops"} entries of
+    limb_chains.json) of armature into output_dir. The armature is
+    snapshotted and traversed once, split into each chain's partition and
+    all files are written in one registry batch. Limbs whose fingerprint
+    has not changed since the last export are skipped unless force is set.
+    Returns {"written": {limb: path}, "skipped": [limb]}.
+    """
+    from . import armature_registry, limb_fingerprints
+
+    start = time.perf_counter()
+    index = bone_hierarchy.BoneIndex(armature.data.bones)
+    partitions = {c["name"]: chain_bone_names((c["roots"], c["stops"]), armature, index) for c in chains}
+    needed = list(dict.fromkeys(name for names in partitions.values() for name in names))
+    serialized = serialize_armature_bones(armature, needed, index)
+    serialize_time = time.perf_counter() - start
+
+    os.makedirs(output_dir, exist_ok=True)
+    fingerprints = limb_fingerprints.load_fingerprints(output_dir)
+    written, skipped = {}, []
+    with armature_registry.registry_batch():
+        for limb_name, names in partitions.items():
+            if not names:
+                print(f"[AutoRig] Skipping '{limb_name}', none of its roots are in '{armature.name}'")
+                continue
+            meta = serialize_object_metadata(f'{limb_name}_{armature.name}', armature)
+            bones = [(bone_section(name), name, serialized[name]) for name in names]
+            output_path = os.path.join(output_dir, f"{limb_name}{ext}")
+
+            entry = limb_fingerprints.fingerprint_limb(meta, bones, (ext, pretty, dedupe))
+            if not force and limb_fingerprints.is_unchanged(fingerprints, limb_name, entry, output_path):
+                skipped.append(limb_name)
+                continue
+            changed, removed = limb_fingerprints.changed_bones(fingerprints.get(limb_name), entry)
+            if limb_name in fingerprints:
+                print(f"[AutoRig] '{limb_name}' changed: {len(changed)} bones modified or added, "
+                      f"{len(removed)} removed")
+
+            written[limb_name] = _write_limb(limb_name, armature, output_path, meta, iter(bones),
+                                             pretty, dedupe, fingerprint=entry)
+            fingerprints[limb_name] = entry
+    if written:
+        limb_fingerprints.save_fingerprints(output_dir, fingerprints)
 
+    if skipped:
+        print(f"[AutoRig] Unchanged, skipped: {', '.join(skipped)}")
+    print(f"[AutoRig] Exported {len(written)} limbs, skipped {len(skipped)} ({len(serialized)} bones) in "
+          f"{(time.perf_counter() - start) * 1000:.1f} ms, serializing took {serialize_time * 1000:.1f} ms")
+    return {"written": written, "skipped": skipped}
 
 def main(limb_index):
     limbs = ["base", "spine", "arm_l_target", "arm_r", "leg_l", "leg_r"]
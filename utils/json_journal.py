@@ -0,0 +1,180 @@
+import os
+import json
+from contextlib import contextmanager
+
+# Crash-safe storage for the small JSON list files in Hierarchy/
+# (armature_registry.json, limb_chains.json). Records are dicts identified
+# by a key field. Single updates are appended to "<file>.journal" and
+# replayed on load; the base file is only ever replaced through an atomic
+# rename, either when the journal grows past compact_every lines or when a
+# batch ends.
+
+COMPACT_EVERY = 64
+
+_stores = {}
+
+
+def get_store(path, key="name"):
+    store = _stores.get(path)
+    if store is None:
+        store = _stores[path] = JournalStore(path, key=key)
+    return store
+
+def _stat(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+def atomic_write_json(path, data, indent=4):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=indent)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class JournalStore:
+    def __init__(self, path, key="name", compact_every=COMPACT_EVERY):
+        self.path = path
+        self.journal_path = f"{path}.journal"
+        self.key = key
+        self.compact_every = compact_every
+        self._data = None
+        self._disk_key = None
+        self._journal_lines = 0
+        self._batch_depth = 0
+        self._batch_dirty = False
+
+    # ---- Loading ----
+
+    def _current_disk_key(self):
+        return (_stat(self.path), _stat(self.journal_path))
+
+    def _read_base(self):
+        if not os.path.isfile(self.path):
+            return []
+        with open(self.path, "r") as f:
+            return json.load(f)
+
+    def _replay_journal(self, data):
+        lines, torn = 0, False
+        if not os.path.isfile(self.journal_path):
+            return lines, torn
+        with open(self.journal_path, "r") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    op = json.loads(line)
+                except ValueError:
+                    # Torn write from a crash, everything before it is intact
+                    print(f"[AutoRig] Ignoring truncated journal entry in {self.journal_path}")
+                    torn = True
+                    break
+                self._apply(data, op)
+                lines += 1
+        return lines, torn
+
+    def _apply(self, data, op):
+        if op.get("op") == "put":
+            record = op["record"]
+            for i, item in enumerate(data):
+                if item.get(self.key) == record.get(self.key):
+                    data[i] = record
+                    break
+            else:
+                data.append(record)
+        elif op.get("op") == "delete":
+            data[:] = [item for item in data if item.get(self.key) != op.get("key")]
+
+    def _ensure_loaded(self):
+        if self._batch_depth and self._data is not None:
+            return
+        disk_key = self._current_disk_key()
+        if self._data is not None and disk_key == self._disk_key:
+            return
+        data = self._read_base()
+        lines, torn = self._replay_journal(data) if isinstance(data, list) else (0, False)
+        self._data = data
+        self._journal_lines = lines
+        self._disk_key = disk_key
+        if torn:
+            # Fold the intact entries into the base file so new appends do
+            # not land behind the broken line
+            self.compact()
+
+    def load(self):
+        self._ensure_loaded()
+        if not isinstance(self._data, list):
+            return self._data
+        return [dict(item) for item in self._data]
+
+    def get(self, key_value):
+        self._ensure_loaded()
+        if not isinstance(self._data, list):
+            return None
+        for item in self._data:
+            if item.get(self.key) == key_value:
+                return dict(item)
+        return None
+
+    # ---- Writing ----
+
+    def _append(self, op):
+        with open(self.journal_path, "a") as f:
+            f.write(json.dumps(op) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._journal_lines += 1
+        if self._journal_lines >= self.compact_every:
+            self.compact()
+        else:
+            self._disk_key = self._current_disk_key()
+
+    def _commit(self, op):
+        self._ensure_loaded()
+        if not isinstance(self._data, list):
+            raise TypeError(f"{self.path} does not hold a list of records")
+        self._apply(self._data, op)
+        if self._batch_depth:
+            self._batch_dirty = True
+        else:
+            self._append(op)
+
+    def put(self, record):
+        self._commit({"op": "put", "record": dict(record)})
+
+    def delete(self, key_value):
+        self._commit({"op": "delete", "key": key_value})
+
+    def replace(self, data):
+        self._data = data if not isinstance(data, list) else [dict(item) for item in data]
+        if self._batch_depth:
+            self._batch_dirty = True
+        else:
+            self.compact()
+
+    def compact(self):
+        atomic_write_json(self.path, self._data if self._data is not None else [])
+        # A crash before this point only leaves puts that are already in the
+        # base file, replaying them again is harmless
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+        self._journal_lines = 0
+        self._disk_key = self._current_disk_key()
+
+    @contextmanager
+    def batch(self):
+        self._ensure_loaded()
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0 and self._batch_dirty:
+                self._batch_dirty = False
+                self.compact()
@@ -0,0 +1,199 @@
+import os
+import json
+import lzma
+import zlib
+import struct
+
+from . import bone_defaults
+
+# Single-file limb archive, one per armature: Hierarchy/<armature>.arlib
+#
+#   header   <4sHHIQ  magic "ARLA", version, flags, member count, TOC offset
+#   members  each limb as compact JSON, compressed on its own
+#   TOC      zlib JSON list of {name, offset, length, size, codec, crc32,
+#            bone_count}, written last so members can be streamed in
+#
+# A limb is read by seeking to its member and decompressing just that, the
+# TOC alone is enough to fill the limb dropdowns.
+
+MAGIC = b"ARLA"
+VERSION = 1
+EXTENSION = ".arlib"
+HEADER = struct.Struct("<4sHHIQ")
+
+CODEC_ITEMS = [
+    ('zlib', "zlib", "Fast to read, good compression"),
+    ('lzma', "LZMA", "Smallest archives, slower to write"),
+]
+
+_COMPRESS = {
+    "zlib": lambda raw: zlib.compress(raw, 9),
+    "lzma": lambda raw: lzma.compress(raw, preset=6),
+}
+_DECOMPRESS = {
+    "zlib": zlib.decompress,
+    "lzma": lzma.decompress,
+}
+
+# TOC cache keyed on path, checked against (mtime_ns, size)
+_tocs = {}
+
+
+def get_archive_path(armature_dir):
+    # Hierarchy/<armature>/ -> Hierarchy/<armature>.arlib
+    return f"{os.path.normpath(armature_dir)}{EXTENSION}"
+
+def is_archive(path):
+    try:
+        with open(path, "rb") as f:
+            return f.read(4) == MAGIC
+    except OSError:
+        return False
+
+def _encode_limb(data):
+    # Same compact form as the streaming writer, with defaults elided
+    out = {}
+    for key, value in data.items():
+        if key in ("ue_bones", "controllers"):
+            out[key] = {n: bone_defaults.elide_bone_defaults(b) for n, b in value.items()}
+        elif not key.startswith("_") and isinstance(value, dict):
+            out[key] = bone_defaults.elide_bone_defaults(value)
+        else:
+            out[key] = value
+    return json.dumps(out, separators=(",", ":"), sort_keys=True).encode("utf-8")
+
+def _bone_count(data):
+    from . import limb_catalogue
+    return limb_catalogue.count_limb_bones(data)
+
+
+# ------------------------
+# Writing
+# ------------------------
+
+def write_archive(path, limbs, codec="zlib"):
+    """
+    Writes an archive from an iterable of (limb_name, limb_data). Members
+    are compressed one at a time. Returns the number of limbs written.
+    """
+    if codec not in _COMPRESS:
+        raise ValueError(f"Unknown archive codec: {codec}")
+
+    toc = []
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, 0, 0, 0))
+        for name, data in limbs:
+            raw = _encode_limb(data)
+            packed = _COMPRESS[codec](raw)
+            toc.append({
+                "name": name,
+                "offset": f.tell(),
+                "length": len(packed),
+                "size": len(raw),
+                "codec": codec,
+                "crc32": zlib.crc32(raw),
+                "bone_count": _bone_count(data),
+            })
+            f.write(packed)
+
+        toc_offset = f.tell()
+        f.write(zlib.compress(json.dumps(toc, separators=(",", ":")).encode("utf-8")))
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, VERSION, 0, len(toc), toc_offset))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    _tocs.pop(os.path.abspath(path), None)
+    return len(toc)
+
+def pack_armature_folder(armature_dir, path=None, codec="zlib"):
+    from . import limb_io
+
+    path = path or get_archive_path(armature_dir)
+    files = sorted(f for f in os.listdir(armature_dir) if limb_io.is_limb_file(f))
+
+    def limbs():
+        for file in files:
+            yield os.path.splitext(file)[0], limb_io.load_limb_data(os.path.join(armature_dir, file))
+
+    count = write_archive(path, limbs(), codec=codec)
+    print(f"[AutoRig] Packed {count} limbs into {path}")
+    return path
+
+
+# ------------------------
+# Reading
+# ------------------------
+
+def read_toc(path):
+    path = os.path.abspath(path)
+    st = os.stat(path)
+    key = (st.st_mtime_ns, st.st_size)
+    cached = _tocs.get(path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    with open(path, "rb") as f:
+        magic, version, _, count, toc_offset = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"[ERROR] Not a limb archive: {path}")
+        if version > VERSION:
+            raise ValueError(f"[ERROR] Unsupported limb archive version {version}: {path}")
+        f.seek(toc_offset)
+        toc = json.loads(zlib.decompress(f.read()))
+
+    if len(toc) != count:
+        raise ValueError(f"[ERROR] Corrupt limb archive TOC: {path}")
+    members = {m["name"]: m for m in toc}
+    _tocs[path] = (key, members)
+    return members
+
+def has_member(path, limb_name):
+    return os.path.isfile(path) and limb_name in read_toc(path)
+
+def read_member_bytes(path, limb_name):
+    # (TOC entry, compressed member bytes)
+    member = read_toc(path).get(limb_name)
+    if member is None:
+        raise FileNotFoundError(f"[ERROR] Limb '{limb_name}' not found in {path}")
+
+    with open(path, "rb") as f:
+        f.seek(member["offset"])
+        return member, f.read(member["length"])
+
+def read_member(path, limb_name):
+    member, packed = read_member_bytes(path, limb_name)
+    raw = _DECOMPRESS[member["codec"]](packed)
+    if zlib.crc32(raw) != member["crc32"]:
+        raise ValueError(f"[ERROR] Checksum mismatch for '{limb_name}' in {path}")
+    return bone_defaults.fill_limb_defaults(json.loads(raw))
+
+def iter_members(path):
+    for name in read_toc(path):
+        yield name, read_member(path, name)
+
+def get_limb_items(path):
+    # Kept alive in the TOC cache for the enum callbacks
+    path = os.path.abspath(path)
+    members = read_toc(path)
+    cached = _tocs[path]
+    if len(cached) < 3:
+        items = [(name, name, f"{m['bone_count']} bones") for name, m in sorted(members.items())]
+        _tocs[path] = (*cached, items or [("none", "No limbs found", "")])
+    return _tocs[path][2]
+
+def unpack_archive(path, armature_dir):
+    from . import limb_io, limb_writer
+
+    os.makedirs(armature_dir, exist_ok=True)
+    count = 0
+    for name, data in iter_members(path):
+        _, sections = limb_io.split_limb_sections(data)
+        bones = ((section, bone_name, bone_defaults.elide_bone_defaults(bone))
+                 for section, section_bones in sections.items()
+                 for bone_name, bone in section_bones.items())
+        limb_writer.write_limb_stream(os.path.join(armature_dir, f"{name}.json"), data.get("_meta", {}), bones)
+        count += 1
+    print(f"[AutoRig] Unpacked {count} limbs from {path}")
+    return count
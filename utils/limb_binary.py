@@ -0,0 +1,313 @@
+import os
+import json
+import mmap
+import zlib
+import struct
+from array import array
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Binary limb container (.arlb)
+#
+#   header      magic, version, bone count, section table
+#   names       uint32 offsets[N + 1] followed by the utf-8 name bytes
+#   heads       float32[N, 3]
+#   tails       float32[N, 3]
+#   rolls       float32[N]
+#   parents     int32[N], index into the same limb, -1 for none
+#   flags       uint8[N], see FLAG_*
+#   sidecar     zlib JSON with _meta and the sparse per-bone payload
+#               (constraints, drivers, pose settings, parents outside the limb)
+#
+# Sections are 8-byte aligned so the arrays can be mapped straight into
+# numpy.frombuffer without copying.
+
+EXTENSION = ".arlb"
+MAGIC = b"ARLB"
+VERSION = 1
+
+SECTION_NAMES = ("names", "heads", "tails", "rolls", "parents", "flags", "sidecar")
+HEADER = struct.Struct("<4sHHI")
+SECTION = struct.Struct("<QQ")
+HEADER_SIZE = HEADER.size + SECTION.size * len(SECTION_NAMES)
+
+FLAG_CONTROLLER = 1
+FLAG_HAS_ROLL = 2
+FLAG_HAS_HEAD = 4
+FLAG_HAS_TAIL = 8
+
+GEOMETRY_KEYS = ("head", "tail", "roll", "parent")
+
+
+def is_binary_limb(path):
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+def _align(buf, alignment=8):
+    pad = (-len(buf)) % alignment
+    if pad:
+        buf.extend(b"\0" * pad)
+
+def _limb_bones(data):
+    # Yields (name, record, is_controller) for both limb file layouts
+    if "ue_bones" in data or "controllers" in data:
+        for name, bone in data.get("ue_bones", {}).items():
+            yield name, bone, False
+        for name, bone in data.get("controllers", {}).items():
+            yield name, bone, True
+    else:
+        for name, bone in data.items():
+            if not name.startswith("_"):
+                yield name, bone, False
+
+
+# ------------------------
+# Writing
+# ------------------------
+
+def encode_limb(data):
+    bones = list(_limb_bones(data))
+    index = {name: i for i, (name, _, _) in enumerate(bones)}
+    count = len(bones)
+
+    name_bytes = [name.encode("utf-8") for name, _, _ in bones]
+    offsets = array("I", [0])
+    for raw in name_bytes:
+        offsets.append(offsets[-1] + len(raw))
+
+    heads = array("f")
+    tails = array("f")
+    rolls = array("f")
+    parents = array("i")
+    flags = bytearray()
+    extras = {}
+    external_parents = {}
+
+    for name, bone, is_controller in bones:
+        flag = FLAG_CONTROLLER if is_controller else 0
+        head = bone.get("head")
+        tail = bone.get("tail")
+        if head is not None:
+            flag |= FLAG_HAS_HEAD
+        if tail is not None:
+            flag |= FLAG_HAS_TAIL
+        if bone.get("roll") is not None:
+            flag |= FLAG_HAS_ROLL
+        heads.extend(head if head is not None else (0.0, 0.0, 0.0))
+        tails.extend(tail if tail is not None else (0.0, 0.0, 0.0))
+        rolls.append(bone.get("roll") or 0.0)
+
+        parent = bone.get("parent")
+        if parent in index:
+            parents.append(index[parent])
+        else:
+            parents.append(-1)
+            if parent is not None:
+                external_parents[name] = parent
+
+        rest = {k: v for k, v in bone.items() if k not in GEOMETRY_KEYS}
+        if rest:
+            extras[name] = rest
+        flags.append(flag)
+
+    layout = "sections" if ("ue_bones" in data or "controllers" in data) else "flat"
+    sidecar = {
+        "_meta": data.get("_meta", {}),
+        "layout": layout,
+        "external_parents": external_parents,
+        "bones": extras,
+    }
+
+    sections = [
+        offsets.tobytes() + b"".join(name_bytes),
+        heads.tobytes(),
+        tails.tobytes(),
+        rolls.tobytes(),
+        parents.tobytes(),
+        bytes(flags),
+        zlib.compress(json.dumps(sidecar, separators=(",", ":")).encode("utf-8")),
+    ]
+
+    out = bytearray(HEADER_SIZE)
+    table = []
+    for section in sections:
+        _align(out)
+        table.append((len(out), len(section)))
+        out.extend(section)
+
+    HEADER.pack_into(out, 0, MAGIC, VERSION, 0, count)
+    for i, (offset, length) in enumerate(table):
+        SECTION.pack_into(out, HEADER.size + i * SECTION.size, offset, length)
+    return bytes(out)
+
+def write_binary_limb(path, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(encode_limb(data))
+    os.replace(tmp_path, path)
+    return path
+
+
+# ------------------------
+# Reading
+# ------------------------
+
+class BinaryLimb:
+    """
+    Memory-mapped view of an .arlb file. Geometry comes back as flat arrays
+    (numpy arrays when numpy is available) without building per-bone dicts;
+    the sidecar is only decompressed when asked for.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, _, count = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"[ERROR] Not a binary limb file: {path}")
+        if version > VERSION:
+            self.close()
+            raise ValueError(f"[ERROR] Unsupported binary limb version {version}: {path}")
+
+        self.count = count
+        self._sections = {
+            name: SECTION.unpack_from(self._map, HEADER.size + i * SECTION.size)
+            for i, name in enumerate(SECTION_NAMES)
+        }
+        self._names = None
+        self._sidecar = None
+        self._arrays = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._arrays = {}
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                # Arrays handed out by the caller still point into the map,
+                # it is released once they are garbage collected
+                pass
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _array(self, section, typecode, dtype, width=1):
+        if section in self._arrays:
+            return self._arrays[section]
+        offset, length = self._sections[section]
+        if np is not None:
+            arr = np.frombuffer(self._map, dtype=dtype, count=self.count * width, offset=offset)
+            if width > 1:
+                arr = arr.reshape(self.count, width)
+        else:
+            arr = memoryview(self._map)[offset:offset + length].cast(typecode)
+        self._arrays[section] = arr
+        return arr
+
+    @property
+    def names(self):
+        if self._names is None:
+            offset, length = self._sections["names"]
+            bounds = array("I")
+            bounds.frombytes(self._map[offset:offset + 4 * (self.count + 1)])
+            blob = self._map[offset + 4 * (self.count + 1):offset + length]
+            self._names = [blob[bounds[i]:bounds[i + 1]].decode("utf-8") for i in range(self.count)]
+        return self._names
+
+    @property
+    def heads(self):
+        return self._array("heads", "f", "<f4", 3)
+
+    @property
+    def tails(self):
+        return self._array("tails", "f", "<f4", 3)
+
+    @property
+    def rolls(self):
+        return self._array("rolls", "f", "<f4")
+
+    @property
+    def parents(self):
+        return self._array("parents", "i", "<i4")
+
+    @property
+    def flags(self):
+        return self._array("flags", "B", "u1")
+
+    @property
+    def sidecar(self):
+        if self._sidecar is None:
+            offset, length = self._sections["sidecar"]
+            self._sidecar = json.loads(zlib.decompress(self._map[offset:offset + length]))
+        return self._sidecar
+
+    @property
+    def meta(self):
+        return self.sidecar.get("_meta", {})
+
+    def _vector(self, arr, i):
+        if np is not None:
+            return [float(v) for v in arr[i]]
+        return [arr[i * 3], arr[i * 3 + 1], arr[i * 3 + 2]]
+
+    def to_dict(self):
+        # Rebuilds the JSON limb layout for the existing loaders
+        names = self.names
+        parents = self.parents
+        flags = self.flags
+        sidecar = self.sidecar
+        extras = sidecar.get("bones", {})
+        external = sidecar.get("external_parents", {})
+        heads, tails, rolls = self.heads, self.tails, self.rolls
+
+        data = {"_meta": sidecar.get("_meta", {})}
+        layout = sidecar.get("layout", "sections")
+        if layout == "sections":
+            data["ue_bones"] = {}
+            data["controllers"] = {}
+
+        for i, name in enumerate(names):
+            flag = int(flags[i])
+            parent = int(parents[i])
+            bone = dict(extras.get(name, {}))
+            bone["parent"] = names[parent] if parent >= 0 else external.get(name)
+            if flag & FLAG_HAS_HEAD:
+                bone["head"] = self._vector(heads, i)
+            if flag & FLAG_HAS_TAIL:
+                bone["tail"] = self._vector(tails, i)
+            if flag & FLAG_HAS_ROLL:
+                bone["roll"] = float(rolls[i])
+
+            if layout != "sections":
+                data[name] = bone
+            elif flag & FLAG_CONTROLLER:
+                data["controllers"][name] = bone
+            else:
+                data["ue_bones"][name] = bone
+        return data
+
+
+def read_binary_limb(path):
+    with BinaryLimb(path) as limb:
+        return limb.to_dict()
+
+def read_bone_count(path):
+    with open(path, "rb") as f:
+        magic, _, _, count = HEADER.unpack(f.read(HEADER.size))
+    return count if magic == MAGIC else 0
@@ -0,0 +1,112 @@
+import os
+import json
+
+from . import limb_binary, limb_io
+
+# Per-armature index of the limb files in Hierarchy/<armature>/.
+# Each entry remembers the folder mtime it was built from, so the enum
+# callbacks only rescan when a file is added, removed or renamed. The
+# exporter updates entries directly through record_limb_file().
+_catalogue = {}
+
+NO_LIMB_ITEMS = [("none", "No limbs found", "")]
+
+
+def count_limb_bones(data):
+    if "ue_bones" in data or "controllers" in data:
+        return len(data.get("ue_bones", {})) + len(data.get("controllers", {}))
+    return len([k for k in data if not k.startswith("_")])
+
+def read_bone_count(path):
+    if limb_binary.is_binary_limb(path):
+        return limb_binary.read_bone_count(path)
+    try:
+        with open(path, "r") as f:
+            data = json.load(f)
+    except Exception as e:
+        print(f"[AutoRig] Failed to read limb file {path}: {e}")
+        return 0
+
+    meta = data.get("_meta", {})
+    if "bone_count" in meta:
+        return meta["bone_count"]
+    return count_limb_bones(data)
+
+def _norm(folder):
+    return os.path.normcase(os.path.abspath(folder))
+
+def _dir_mtime(folder):
+    try:
+        return os.stat(folder).st_mtime_ns
+    except OSError:
+        return None
+
+def _limb_info(path, bone_count=None, previous=None):
+    st = os.stat(path)
+    if previous and previous["size"] == st.st_size and previous["mtime"] == st.st_mtime_ns:
+        return previous
+    return {
+        "name": os.path.splitext(os.path.basename(path))[0],
+        "path": path,
+        "size": st.st_size,
+        "mtime": st.st_mtime_ns,
+        "bone_count": read_bone_count(path) if bone_count is None else bone_count,
+    }
+
+def _rebuild_items(entry):
+    items = [(name, name, f"{info['bone_count']} bones") for name, info in entry["limbs"].items()]
+    entry["items"] = sorted(items) if items else NO_LIMB_ITEMS
+
+def refresh_armature(armature_name, folder):
+    folder = _norm(folder)
+    previous = _catalogue.get(armature_name, {})
+    old_limbs = previous.get("limbs", {}) if previous.get("folder") == folder else {}
+    entry = {"folder": folder, "dir_mtime": _dir_mtime(folder), "limbs": {}}
+
+    if os.path.isdir(folder):
+        for file in os.listdir(folder):
+            if not limb_io.is_limb_file(file):
+                continue
+            name = os.path.splitext(file)[0]
+            try:
+                entry["limbs"][name] = _limb_info(os.path.join(folder, file), previous=old_limbs.get(name))
+            except OSError:
+                continue
+
+    _rebuild_items(entry)
+    _catalogue[armature_name] = entry
+    return entry
+
+def get_armature_entry(armature_name, folder):
+    folder = _norm(folder)
+    entry = _catalogue.get(armature_name)
+    if entry is None or entry["folder"] != folder or entry["dir_mtime"] != _dir_mtime(folder):
+        entry = refresh_armature(armature_name, folder)
+    return entry
+
+def get_limb_items(armature_name, folder):
+    return get_armature_entry(armature_name, folder)["items"]
+
+def get_limb_info(armature_name, folder, limb_name):
+    return get_armature_entry(armature_name, folder)["limbs"].get(limb_name)
+
+def record_limb_file(armature_name, path, bone_count=None):
+    folder = _norm(os.path.dirname(path))
+    entry = _catalogue.get(armature_name)
+    if entry is None or entry["folder"] != folder:
+        # Nothing indexed yet, the next lookup scans the folder anyway
+        return
+
+    name = os.path.splitext(os.path.basename(path))[0]
+    is_new = name not in entry["limbs"]
+    entry["limbs"][name] = _limb_info(path, bone_count=bone_count)
+    if is_new:
+        # Creating the file bumped the folder mtime, overwriting does not
+        entry["dir_mtime"] = _dir_mtime(folder)
+    _rebuild_items(entry)
+
+def invalidate_catalogue(armature_name=None):
+    if armature_name is None:
+        _catalogue.clear()
+    else:
+        _catalogue.pop(armature_name, None)
@@ -0,0 +1,68 @@
+import os
+import json
+import hashlib
+
+from . import json_journal
+
+# Dirty tracking for the exporter.
+#
+# Every exported bone gets a fingerprint of its serialized record, which
+# covers geometry, pose settings, constraints and drivers, and every limb
+# a fingerprint of its metadata, export options and bone fingerprints in
+# order. They are kept per armature folder in .meta_fingerprints.json (the
+# ".meta" prefix keeps the limb scanners away from it). A limb whose
+# fingerprint matches the stored one and whose file is still there is not
+# written again.
+
+FINGERPRINT_FILE = ".meta_fingerprints.json"
+
+
+def _digest(value):
+    raw = json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+def bone_fingerprint(record):
+    return _digest(record)
+
+def fingerprint_limb(meta, bones, options=()):
+    """
+    Fingerprints for one limb, bones being (section, name, record) in
+    export order. Returns {"fingerprint", "bones": {name: fingerprint}}.
+    """
+    bone_fps = {name: bone_fingerprint(record) for _, name, record in bones}
+    order = [[section, name, bone_fps[name]] for section, name, _ in bones]
+    return {"fingerprint": _digest([meta, list(options), order]), "bones": bone_fps}
+
+
+def get_fingerprint_path(folder):
+    return os.path.join(folder, FINGERPRINT_FILE)
+
+def load_fingerprints(folder):
+    try:
+        with open(get_fingerprint_path(folder), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_fingerprints(folder, fingerprints):
+    os.makedirs(folder, exist_ok=True)
+    json_journal.atomic_write_json(get_fingerprint_path(folder), fingerprints, indent=None)
+
+def forget_limb(folder, limb_name):
+    # For limbs written outside export_all_limbs, so it does not skip them
+    fingerprints = load_fingerprints(folder)
+    if fingerprints.pop(limb_name, None) is not None:
+        save_fingerprints(folder, fingerprints)
+
+def is_unchanged(fingerprints, limb_name, entry, output_path):
+    stored = fingerprints.get(limb_name)
+    return (stored is not None and stored.get("fingerprint") == entry["fingerprint"]
+            and os.path.exists(output_path))
+
+def changed_bones(stored, entry):
+    # Bones added or modified since the stored fingerprints, then the removed ones
+    old = (stored or {}).get("bones", {})
+    new = entry["bones"]
+    changed = [name for name, fp in new.items() if old.get(name) != fp]
+    removed = [name for name in old if name not in new]
+    return changed, removed
@@ -0,0 +1,458 @@
+import os
+import re
+import json
+from collections import OrderedDict
+from json.decoder import scanstring
+
+from . import limb_io, limb_binary, limb_archive, bone_defaults, bone_store
+
+# Lazy limb reader.
+#
+# Filling dropdowns and planning a build only need bone names, parents and
+# head/tail/roll. The first time a JSON limb file is opened it is scanned once
+# and a small "<limb>.json.idx" sidecar is written next to it holding those
+# fields plus the byte offset and length of every bone record. Later opens
+# read only the sidecar; constraints, drivers and custom properties are
+# parsed from the file one record at a time when asked for.
+#
+# Binary (.arlb) limbs are indexed from their arrays directly, and manifests
+# resolve their records through the bone store. Limbs that only exist as a
+# member of the armature's .arlib archive are read whole from the archive.
+
+INDEX_EXTENSION = ".idx"
+INDEX_VERSION = 2
+SECTIONS = ("ue_bones", "controllers")
+LRU_SIZE = 16
+
+_decoder = json.JSONDecoder()
+_WS = re.compile(r'[ \t\n\r]*')
+
+_open_limbs = OrderedDict()
+
+
+def index_path(path):
+    return f"{path}{INDEX_EXTENSION}"
+
+def _archive_source(path):
+    # (archive path, limb name) when path only exists as an .arlib member
+    folder = os.path.dirname(path)
+    limb_name = os.path.splitext(os.path.basename(path))[0]
+    archive = limb_archive.get_archive_path(folder)
+    if limb_archive.has_member(archive, limb_name):
+        return archive, limb_name
+    return None
+
+def _source_key(path):
+    if not os.path.exists(path):
+        source = _archive_source(path)
+        if source is not None:
+            path = source[0]
+    st = os.stat(path)
+    return [st.st_mtime_ns, st.st_size]
+
+
+# ------------------------
+# JSON scanning
+# ------------------------
+
+def _scan_object(text, pos, descend=()):
+    """
+    Walks the JSON object starting at text[pos] == "{" without building it.
+    Returns ([(key, start, end, value)], end) where value is the decoded
+    member, or the nested member list for keys in descend.
+    """
+    members = []
+    pos = _WS.match(text, pos + 1).end()
+    if text[pos] == "}":
+        return members, pos + 1
+
+    while True:
+        key, pos = scanstring(text, pos + 1)
+        pos = _WS.match(text, pos).end()
+        pos = _WS.match(text, pos + 1).end()  # skip ":"
+        start = pos
+        if key in descend and text[pos] == "{":
+            value, end = _scan_object(text, pos)
+        else:
+            value, end = _decoder.raw_decode(text, pos)
+        members.append((key, start, end, value))
+
+        pos = _WS.match(text, end).end()
+        if text[pos] == ",":
+            pos = _WS.match(text, pos + 1).end()
+            continue
+        return members, pos + 1
+
+def _byte_offsets(text, offsets):
+    # Character -> byte offsets, only needed when the file is not pure ASCII
+    result = {}
+    prev_char, prev_byte = 0, 0
+    for offset in sorted(set(offsets)):
+        prev_byte += len(text[prev_char:offset].encode("utf-8"))
+        prev_char = offset
+        result[offset] = prev_byte
+    return result
+
+def build_json_index(path):
+    with open(path, "rb") as f:
+        raw = f.read()
+    text = raw.decode("utf-8")
+
+    start = _WS.match(text, 0).end()
+    members, _ = _scan_object(text, start, descend=SECTIONS)
+
+    is_manifest = any(key == "_manifest" for key, _, _, _ in members)
+    layout = "sections" if any(key in SECTIONS for key, _, _, _ in members) else "flat"
+
+    entries = []
+    meta_span = None
+    top_keys = []
+    for key, start, end, value in members:
+        top_keys.append(key)
+        if key == "_meta":
+            meta_span = (start, end)
+        elif layout == "sections" and key in SECTIONS:
+            for name, b_start, b_end, record in value:
+                entries.append((name, key, b_start, b_end, record))
+        elif layout == "flat" and not key.startswith("_"):
+            entries.append((key, "ue_bones", start, end, value))
+
+    manifest_info = None
+    if is_manifest:
+        manifest_info = next(value for key, _, _, value in members if key == "_manifest")
+        store_dir = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(path)), manifest_info.get("store", "")))
+
+    if len(raw) == len(text):
+        to_bytes = None
+    else:
+        spans = [s for e in entries for s in (e[2], e[3])] + (list(meta_span) if meta_span else [])
+        to_bytes = _byte_offsets(text, spans)
+
+    def span(start, end):
+        if to_bytes is None:
+            return [start, end - start]
+        return [to_bytes[start], to_bytes[end] - to_bytes[start]]
+
+    bones = []
+    for name, section, start, end, record in entries:
+        if is_manifest:
+            record = bone_store.get_bone(store_dir, record)
+        bones.append({
+            "name": name,
+            "section": section,
+            "parent": record.get("parent"),
+            "head": record.get("head"),
+            "tail": record.get("tail"),
+            "roll": record.get("roll"),
+            "span": span(start, end),
+        })
+
+    return {
+        "version": INDEX_VERSION,
+        "source": _source_key(path),
+        "layout": layout,
+        "manifest": manifest_info,
+        "top_keys": top_keys,
+        "meta_span": span(*meta_span) if meta_span else None,
+        "bones": bones,
+    }
+
+def load_json_index(path):
+    idx_path = index_path(path)
+    source = _source_key(path)
+    if os.path.exists(idx_path):
+        try:
+            with open(idx_path, "r") as f:
+                index = json.load(f)
+            if index.get("version") == INDEX_VERSION and index.get("source") == source:
+                return index
+        except Exception:
+            pass
+
+    index = build_json_index(path)
+    try:
+        tmp_path = f"{idx_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(index, f, separators=(",", ":"))
+        os.replace(tmp_path, idx_path)
+    except OSError as e:
+        # Read-only library, keep the index in memory only
+        print(f"[AutoRig] Could not write limb index {idx_path}: {e}")
+    return index
+
+
+# ------------------------
+# Lazy limb
+# ------------------------
+
+class LazyLimb:
+    """
+    Header view of a limb file. names, parents, heads, tails and sections
+    come from the index; record() and the helpers below read a single bone
+    from disk on demand.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.is_binary = False
+        self._binary = None
+        self._binary_data = None
+        self._meta = None
+        self._records = None
+        self._archive = None
+
+        if not os.path.exists(path) and _archive_source(path) is not None:
+            self._archive = _archive_source(path)
+            self.index = self._index_from_archive()
+        elif limb_binary.is_binary_limb(path):
+            self.is_binary = True
+            self._binary = limb_binary.BinaryLimb(path)
+            self.index = self._index_from_binary()
+        else:
+            self.index = load_json_index(path)
+
+        self.bones = OrderedDict((b["name"], b) for b in self.index["bones"])
+
+    def _index_from_binary(self):
+        limb = self._binary
+        names = limb.names
+        parents = limb.parents
+        flags = limb.flags
+        heads, tails = limb.heads, limb.tails
+        external = None
+        bones = []
+        for i, name in enumerate(names):
+            parent = int(parents[i])
+            if parent < 0:
+                if external is None:
+                    external = limb.sidecar.get("external_parents", {})
+                parent_name = external.get(name)
+            else:
+                parent_name = names[parent]
+            bones.append({
+                "name": name,
+                "section": "controllers" if int(flags[i]) & limb_binary.FLAG_CONTROLLER else "ue_bones",
+                "parent": parent_name,
+                "head": limb._vector(heads, i),
+                "tail": limb._vector(tails, i),
+                "span": None,
+            })
+        layout = limb.sidecar.get("layout", "sections")
+        top_keys = ["_meta", *SECTIONS] if layout != "flat" else ["_meta", *names]
+        return {"version": INDEX_VERSION, "layout": layout, "manifest": None,
+                "top_keys": top_keys, "meta_span": None, "bones": bones}
+
+    def _index_from_archive(self):
+        # Members are compressed whole, so the records are kept from the read
+        data = limb_archive.read_member(*self._archive)
+        layout, sections = limb_io.split_limb_sections(data)
+        self._meta = data.get("_meta", {})
+        self._records = {}
+        bones = []
+        for section, section_bones in sections.items():
+            for name, record in section_bones.items():
+                self._records[name] = record
+                bones.append({
+                    "name": name,
+                    "section": section,
+                    "parent": record.get("parent"),
+                    "head": record.get("head"),
+                    "tail": record.get("tail"),
+                    "roll": record.get("roll"),
+                    "span": None,
+                })
+        top_keys = ["_meta", *SECTIONS] if layout != "flat" else ["_meta", *(b["name"] for b in bones)]
+        return {"version": INDEX_VERSION, "layout": layout, "manifest": None,
+                "top_keys": top_keys, "meta_span": None, "bones": bones}
+
+    def _binary_limb(self):
+        # The LRU closes evicted limbs, callers still holding one reopen it here
+        if self._binary is None:
+            self._binary = limb_binary.BinaryLimb(self.path)
+        return self._binary
+
+    def close(self):
+        if self._binary is not None:
+            self._binary.close()
+            self._binary = None
+
+    # ---- Header fields ----
+
+    @property
+    def names(self):
+        return list(self.bones)
+
+    @property
+    def bone_count(self):
+        return len(self.bones)
+
+    @property
+    def top_keys(self):
+        return self.index.get("top_keys", [])
+
+    def parent(self, name):
+        return self.bones[name]["parent"]
+
+    def head(self, name):
+        return self.bones[name]["head"]
+
+    def tail(self, name):
+        return self.bones[name]["tail"]
+
+    def section(self, name):
+        return self.bones[name]["section"]
+
+    def bone_arrays(self):
+        """
+        bone_geometry.BoneArrays for the whole limb. Binary limbs hand their
+        mapped arrays over as they are, JSON limbs are built from the index.
+        """
+        from . import bone_geometry
+
+        if self.is_binary:
+            return bone_geometry.BoneArrays.from_binary(self._binary_limb())
+        bones = self.bones.values()
+        return bone_geometry.BoneArrays(
+            self.names,
+            [b["head"] or [0.0, 0.0, 0.0] for b in bones],
+            [b["tail"] or [0.0, 1.0, 0.0] for b in bones],
+            rolls=[b.get("roll") or 0.0 for b in bones],
+            parents=[b["parent"] for b in bones],
+            has_roll=[b.get("roll") is not None for b in bones],
+        )
+
+    @property
+    def meta(self):
+        if self._meta is None:
+            if self.is_binary:
+                self._meta = self._binary_limb().meta
+            elif self.index.get("meta_span"):
+                self._meta = json.loads(self._read_span(self.index["meta_span"]))
+            else:
+                self._meta = {}
+        return self._meta
+
+    # ---- Records on demand ----
+
+    def _read_span(self, span):
+        offset, length = span
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            return f.read(length).decode("utf-8")
+
+    def preload(self):
+        """
+        Reads every record and _meta in one pass, so later record() calls
+        never touch the disk. Calling it again is free. Returns self.
+        """
+        if self._records is not None:
+            return self
+        if self.is_binary:
+            self._records = {name: self.record(name) for name in self.bones}
+            self.meta
+            return self
+
+        with open(self.path, "rb") as f:
+            raw = f.read()
+        if self.index.get("meta_span") and self._meta is None:
+            offset, length = self.index["meta_span"]
+            self._meta = json.loads(raw[offset:offset + length])
+
+        records = {}
+        store_dir = self._store_dir()
+        for name, entry in self.bones.items():
+            offset, length = entry["span"]
+            value = json.loads(raw[offset:offset + length])
+            if store_dir:
+                value = bone_store.get_bone(store_dir, value)
+            records[name] = bone_defaults.fill_bone_defaults(value)
+        self._records = records
+        return self
+
+    def _store_dir(self):
+        manifest = self.index.get("manifest")
+        if not manifest:
+            return None
+        return os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(self.path)), manifest.get("store", "")))
+
+    def record(self, name):
+        if self._records is not None:
+            return dict(self._records[name])
+
+        entry = self.bones[name]
+        if self.is_binary:
+            if self._binary_data is None:
+                self._binary_data = self._binary_limb().to_dict()
+            sections = self._binary_data
+            bones = sections if self.index.get("layout") == "flat" else sections[entry["section"]]
+            return bone_defaults.fill_bone_defaults(dict(bones[name]))
+
+        value = json.loads(self._read_span(entry["span"]))
+        store_dir = self._store_dir()
+        if store_dir:
+            value = bone_store.get_bone(store_dir, value)
+        return bone_defaults.fill_bone_defaults(value)
+
+    def constraints(self, name):
+        return self.record(name)["constraints"]
+
+    def drivers(self, name):
+        return self.record(name)["drivers"]
+
+    def custom_properties(self, name):
+        return self.record(name)["custom_properties"]
+
+    def to_dict(self):
+        data = {"_meta": self.meta}
+        if self.index.get("layout") == "flat":
+            for name in self.bones:
+                data[name] = self.record(name)
+        else:
+            data["ue_bones"] = {}
+            data["controllers"] = {}
+            for name, entry in self.bones.items():
+                data[entry["section"]][name] = self.record(name)
+        return data
+
+
+def resolve_limb_path(path):
+    path = str(path)
+    if not os.path.exists(path):
+        # Same fallback as limb_io.load_limb_data
+        alt = limb_io.find_limb_file(os.path.dirname(path), os.path.splitext(os.path.basename(path))[0])
+        if alt is not None:
+            path = alt
+        elif _archive_source(path) is None:
+            raise FileNotFoundError(f"[ERROR] File not found: {path}")
+    return os.path.abspath(path)
+
+def open_limb(path):
+    """
+    Returns a LazyLimb for path from a small LRU of recently opened limbs,
+    reopening it when the file changed on disk.
+    """
+    path = resolve_limb_path(path)
+    key = tuple(_source_key(path))
+    cached = _open_limbs.get(path)
+    if cached is not None and cached[0] == key:
+        _open_limbs.move_to_end(path)
+        return cached[1]
+
+    return cache_limb(LazyLimb(path))
+
+def cache_limb(limb):
+    # Puts a LazyLimb built elsewhere (e.g. a loader thread) into the LRU
+    path = os.path.abspath(limb.path)
+    previous = _open_limbs.pop(path, None)
+    if previous is not None and previous[1] is not limb:
+        previous[1].close()
+    _open_limbs[path] = (tuple(_source_key(path)), limb)
+    if len(_open_limbs) > LRU_SIZE:
+        _, (_, old) = _open_limbs.popitem(last=False)
+        old.close()
+    return limb
+
+def clear_open_limbs():
+    for _, limb in _open_limbs.values():
+        limb.close()
+    _open_limbs.clear()
@@ -0,0 +1,80 @@
+import os
+import json
+
+from . import limb_binary, limb_archive, bone_defaults, bone_store
+
+# Single entry point for reading limb files. Loaders call load_limb_data()
+# and get the JSON layout back whatever format the file was saved in, with
+# the values the exporter elided filled back in.
+
+LIMB_EXTENSIONS = (".json", limb_binary.EXTENSION)
+
+
+def is_limb_file(filename):
+    return filename.endswith(LIMB_EXTENSIONS) and not filename.startswith(".")
+
+def find_limb_file(folder, limb_name):
+    for ext in LIMB_EXTENSIONS:
+        path = os.path.join(folder, f"{limb_name}{ext}")
+        if os.path.exists(path):
+            return path
+    return None
+
+def resolve_limb_source(filepath):
+    """
+    Where load_limb_data reads filepath from: (path, None) for a file, or
+    (archive path, limb name) for a member of the armature's .arlib archive.
+    """
+    filepath = str(filepath)
+    if os.path.exists(filepath):
+        return filepath, None
+
+    # Fall back to a binary file saved under the same limb name,
+    folder = os.path.dirname(filepath)
+    limb_name = os.path.splitext(os.path.basename(filepath))[0]
+    alt = find_limb_file(folder, limb_name)
+    if alt is not None:
+        return alt, None
+
+    # or to the member of the armature's .arlib archive
+    archive = limb_archive.get_archive_path(folder)
+    if limb_archive.has_member(archive, limb_name):
+        return archive, limb_name
+    raise FileNotFoundError(f"[ERROR] File not found: {filepath}")
+
+def load_limb_data(filepath):
+    filepath, member = resolve_limb_source(filepath)
+    if member is not None:
+        return limb_archive.read_member(filepath, member)
+
+    if limb_binary.is_binary_limb(filepath):
+        data = limb_binary.read_binary_limb(filepath)
+    else:
+        with open(filepath, 'r') as f:
+            data = json.load(f)
+        if bone_store.is_manifest(data):
+            data = bone_store.resolve_manifest(data, filepath)
+
+    return bone_defaults.fill_limb_defaults(data)
+
+def split_limb_sections(data):
+    # Returns (layout, {section: bones}) for both limb file layouts
+    if "ue_bones" in data or "controllers" in data:
+        return "sections", {s: data.get(s, {}) for s in ("ue_bones", "controllers")}
+    return "flat", {"ue_bones": {k: v for k, v in data.items() if not k.startswith("_")}}
+
+def flatten_limb_bones(data):
+    # All bones of a limb in one dict, ue_bones first, then controllers
+    _, sections = split_limb_sections(data)
+    bones = {}
+    for section in sections.values():
+        bones.update(section)
+    return bones
+
+def write_limb_data(filepath, data):
+    if str(filepath).endswith(limb_binary.EXTENSION):
+        return limb_binary.write_binary_limb(filepath, data)
+
+    with open(filepath, "w") as f:
+        json.dump(data, f, indent=4)
+    return filepath
@@ -0,0 +1,81 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from . import limb_index
+
+# Parallel limb loading for multi-limb builds.
+#
+# Reading and parsing limb files does not touch bpy, so every requested
+# limb is read in a thread pool and handed back as plain Python data. Only
+# the armature mutation that follows stays on Blender's main thread.
+
+MAX_WORKERS = min(8, os.cpu_count() or 4)
+
+
+def _map(fn, items, max_workers=None):
+    # Results in input order, the first worker exception is raised here
+    items = list(items)
+    if len(items) <= 1:
+        return [fn(item) for item in items]
+    workers = min(max_workers or MAX_WORKERS, len(items))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="autorig_limb") as pool:
+        return list(pool.map(fn, items))
+
+def _report(what, count, start):
+    print(f"[AutoRig] Loaded {count} {what} in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+def load_limb_files(paths, max_workers=None):
+    """
+    Reads every limb file in paths in parallel. Returns {path: limb data}
+    in the order given, with defaults filled in like limb_io.load_limb_data.
+    """
+    from . import limb_io
+
+    start = time.perf_counter()
+    paths = [str(p) for p in paths]
+    results = _map(limb_io.load_limb_data, paths, max_workers)
+    _report("limb files", len(paths), start)
+    return dict(zip(paths, results))
+
+def load_lazy_limbs(paths, max_workers=None):
+    """
+    Opens and preloads a LazyLimb per path in parallel, then puts them in
+    limb_index's LRU from the calling thread. Returns {path: LazyLimb}.
+    """
+    def load(path):
+        return limb_index.LazyLimb(limb_index.resolve_limb_path(path)).preload()
+
+    start = time.perf_counter()
+    paths = [str(p) for p in paths]
+    limbs = _map(load, paths, max_workers)
+    for limb in limbs:
+        limb_index.cache_limb(limb)
+    _report("limbs", len(paths), start)
+    return dict(zip(paths, limbs))
+
+def read_storage_limbs(armature_name, limb_names, storage=None, max_workers=None):
+    """
+    Reads limb_names of armature_name from the storage backend. Returns
+    {limb name: limb data}. The SQLite connection belongs to the main
+    thread, so that backend reads one limb after another; folder limbs
+    have their paths resolved here and only the file reads run in threads.
+    """
+    from . import rig_storage
+
+    from . import limb_io
+
+    storage = storage or rig_storage.get_storage()
+    limb_names = list(limb_names)
+
+    start = time.perf_counter()
+    if storage.name == "sqlite":
+        results = [storage.read_limb(armature_name, name) for name in limb_names]
+    else:
+        # Paths go through bpy.utils, resolve them here; the workers only
+        # read and parse files
+        paths = [storage.limb_path(armature_name, name) for name in limb_names]
+        results = _map(limb_io.load_limb_data, paths, max_workers)
+    _report(f"limbs of '{armature_name}'", len(limb_names), start)
+    return dict(zip(limb_names, results))
@@ -0,0 +1,88 @@
+import os
+import json
+import shutil
+import tempfile
+
+# Streaming limb writer. Bones are serialized one at a time as the export
+# traversal yields them, so the full limb never sits in memory as a dict.
+# Each section is spooled (in memory up to SPOOL_SIZE, on disk after that)
+# and the file is assembled and renamed into place once _meta is known.
+#
+# Compact mode: no whitespace, keys sorted inside _meta and each bone
+# record, floats rounded to the 9 significant digits that round-trip a
+# float32 exactly. The top-level order is _meta, ue_bones, controllers in
+# both modes.
+# Pretty mode: the indent=4 layout the addon always wrote, for debugging.
+
+SECTIONS = ("ue_bones", "controllers")
+SPOOL_SIZE = 1 << 20
+
+
+def canonical_float(value):
+    return float(format(value, ".9g"))
+
+def canonical_value(value):
+    if isinstance(value, float):
+        return canonical_float(value)
+    if isinstance(value, dict):
+        return {k: canonical_value(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [canonical_value(v) for v in value]
+    return value
+
+def _dumps(value, pretty, depth=0):
+    if pretty:
+        text = json.dumps(value, indent=4)
+        return text.replace("\n", "\n" + " " * (4 * depth)) if depth else text
+    return json.dumps(canonical_value(value), separators=(",", ":"), sort_keys=True)
+
+def write_limb_stream(path, meta, bones, pretty=False):
+    """
+    Writes a limb file from meta and an iterator of (section, name, record)
+    tuples. Sets _meta.bone_count and returns the number of bones written.
+    """
+    spools = {s: tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE, mode="w+") for s in SECTIONS}
+    counts = {s: 0 for s in SECTIONS}
+    key_sep = ": " if pretty else ":"
+
+    try:
+        for section, name, record in bones:
+            spool = spools[section]
+            if counts[section]:
+                spool.write(",")
+            if pretty:
+                spool.write("\n" + " " * 8)
+            spool.write(json.dumps(name) + key_sep + _dumps(record, pretty, depth=2))
+            counts[section] += 1
+
+        meta = dict(meta)
+        meta["bone_count"] = sum(counts.values())
+
+        # Both modes keep the section order of the pretty files
+        top_keys = ("_meta",) + SECTIONS
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write("{")
+            for i, key in enumerate(top_keys):
+                if i:
+                    f.write(",")
+                if pretty:
+                    f.write("\n" + " " * 4)
+                f.write(json.dumps(key) + key_sep)
+                if key == "_meta":
+                    f.write(_dumps(meta, pretty, depth=1))
+                    continue
+                f.write("{")
+                spools[key].seek(0)
+                shutil.copyfileobj(spools[key], f)
+                if pretty and counts[key]:
+                    f.write("\n" + " " * 4)
+                f.write("}")
+            f.write("\n}" if pretty else "}")
+        os.replace(tmp_path, path)
+    finally:
+        for spool in spools.values():
+            spool.close()
+
+    return meta["bone_count"]
@@ -2,6 +2,7 @@ import bpy # type: ignore
 import os
 import importlib
 from . import armature_registry
+from . import rig_storage
 importlib.reload(armature_registry)
 
 from .armature_registry import get_items_by_type, get_limb_items_from
@@ -20,6 +21,9 @@ def control_limb_items(self, context):
 def deform_limb_items(self, context):
     return get_limb_items_from(context.scene.autorig_props.deform_armature_name)
 
+def update_storage_backend(self, context):
+    rig_storage.set_storage_backend(self.storage_backend)
+
 
 class AutoRigProperties(bpy.types.PropertyGroup):
     control_armature_name: bpy.props.EnumProperty(
@@ -52,4 +56,10 @@ class AutoRigProperties(bpy.types.PropertyGroup):
     ) # type: ignore
     new_arm_name: bpy.props.StringProperty(
         name="Armature",
+    ) # type: ignore
+    storage_backend: bpy.props.EnumProperty(
+        name="Rig Library",
+        items=rig_storage.BACKEND_ITEMS,
+        default='folder',
+        update=update_storage_backend,
     ) # type: ignore
\ No newline at end of file
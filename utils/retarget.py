@@ -0,0 +1,215 @@
+import os
+import time
+import numpy as np
+
+from . import limb_io
+
+# Index-joined retargeting.
+#
+# Source and target skeletons are joined by bone name once into integer
+# row arrays. Heads are a single gather from the target heads; tails are
+# gathered from the head of each target bone's first child, or from the
+# target's own tail for leaf bones. A whole body is retargeted in one call
+# by merging every limb's bones before the join.
+#
+# Children come from the "children" lists the exporter writes. Older limb
+# files without them get children derived from the parent links.
+
+
+def _bone_arrays(bones):
+    names = list(bones)
+    heads = np.array([bones[n].get("head") or (0.0, 0.0, 0.0) for n in names], dtype=np.float64).reshape(-1, 3)
+    tails = np.array([bones[n].get("tail") or (0.0, 0.0, 0.0) for n in names], dtype=np.float64).reshape(-1, 3)
+    return names, heads, tails
+
+def child_rows(bones, index, rows=None):
+    """
+    First-child row (into index) for every bone of bones, -1 for leaves.
+    Writes into rows when given, so several limbs can share one array.
+    """
+    if rows is None:
+        rows = np.full(len(index), -1, dtype=np.int64)
+
+    if any(bone.get("children") for bone in bones.values()):
+        for name, bone in bones.items():
+            for child in bone.get("children") or ():
+                row = index.get(child)
+                if row is not None:
+                    rows[index[name]] = row
+                    break
+    else:
+        # Legacy layout: the first bone naming a parent is its child
+        for name, bone in bones.items():
+            parent_row = index.get(bone.get("parent"))
+            if parent_row is not None and rows[parent_row] < 0:
+                rows[parent_row] = index[name]
+    return rows
+
+def join_by_name(source_names, target_index):
+    """(source rows, target rows) of the bones present on both sides."""
+    pairs = [(i, target_index[name]) for i, name in enumerate(source_names) if name in target_index]
+    if not pairs:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    src, tgt = np.array(pairs, dtype=np.int64).T
+    return src, tgt
+
+
+class RetargetJoin:
+    """
+    Target skeleton prepared for repeated retargets: heads, tails and the
+    first-child row of every bone. target_limbs is a list of bone dicts,
+    one per limb, so children are read with each file's own convention.
+    """
+
+    def __init__(self, target_limbs):
+        merged = {}
+        for bones in target_limbs:
+            merged.update(bones)
+        self.names, self.heads, self.tails = _bone_arrays(merged)
+        self.index = {name: i for i, name in enumerate(self.names)}
+
+        self.children = np.full(len(self.names), -1, dtype=np.int64)
+        for bones in target_limbs:
+            child_rows(bones, self.index, self.children)
+
+        # Tail of every target bone after retargeting, computed once
+        has_child = self.children >= 0
+        self.retarget_tails = self.tails.copy()
+        self.retarget_tails[has_child] = self.heads[self.children[has_child]]
+
+    def plan(self, source_names):
+        # Row arrays for a source skeleton, reusable for every retarget of it
+        return join_by_name(source_names, self.index)
+
+    def apply(self, source_names, heads, tails, plan=None):
+        """Returns retargeted copies of heads and tails (N x 3) for source_names."""
+        src, tgt = plan if plan is not None else self.plan(source_names)
+        heads = heads.copy()
+        tails = tails.copy()
+        heads[src] = self.heads[tgt]
+        tails[src] = self.retarget_tails[tgt]
+        return heads, tails, len(src)
+
+
+def retarget_bones(source, target):
+    """
+    Retargets the bone dict source onto target in place, both being
+    {name: record} and possibly spanning several limbs. Bones missing
+    from target are left untouched. Returns source.
+    """
+    join = RetargetJoin([target])
+    names, heads, tails = _bone_arrays(source)
+    heads, tails, _ = join.apply(names, heads, tails)
+    for i, name in enumerate(names):
+        if name in join.index:
+            source[name]["head"] = heads[i].tolist()
+            source[name]["tail"] = tails[i].tolist()
+    return source
+
+def retarget_limbs(source_limbs, target_limbs, section="ue_bones"):
+    """
+    Retargets a whole body in one call. source_limbs and target_limbs map
+    limb name -> limb data as loaded by limb_io; only the given section is
+    retargeted. Source limb data is updated in place and returned.
+    """
+    target_bones = [_limb_section(data, section) for data in target_limbs.values()]
+    join = RetargetJoin(target_bones)
+
+    merged = {}
+    for data in source_limbs.values():
+        merged.update(_limb_section(data, section))
+    names, heads, tails = _bone_arrays(merged)
+    heads, tails, matched = join.apply(names, heads, tails)
+    for i, name in enumerate(names):
+        if name in join.index:
+            merged[name]["head"] = heads[i].tolist()
+            merged[name]["tail"] = tails[i].tolist()
+
+    print(f"[AutoRig] Retargeted {matched}/{len(names)} bones across {len(source_limbs)} limbs")
+    return source_limbs
+
+def _limb_section(data, section):
+    layout, sections = limb_io.split_limb_sections(data)
+    return sections.get(section, {}) if layout == "sections" else sections["ue_bones"]
+
+
+# ------------------------
+# Benchmark
+# ------------------------
+
+def _legacy_retarget(source, target):
+    # Per-bone dict version, with the children fix, for comparison
+    for bone_name in source:
+        if bone_name in target:
+            source[bone_name]["head"] = target[bone_name].get("head")
+            children = [c for c in target[bone_name].get("children") or () if c in target]
+            if children:
+                source[bone_name]["tail"] = target[children[0]].get("head")
+            else:
+                source[bone_name]["tail"] = target[bone_name].get("tail")
+    return source
+
+def benchmark_retarget(hierarchy_dir, repeats=200):
+    """
+    Retargets every armature in hierarchy_dir onto every other one,
+    repeats times, with the joined engine and the per-bone loop. Prints
+    and returns bones per second for both.
+    """
+    bodies = {}
+    for armature_name in sorted(os.listdir(hierarchy_dir)):
+        folder = os.path.join(hierarchy_dir, armature_name)
+        if not os.path.isdir(folder) or armature_name.startswith("."):
+            continue
+        limbs = {}
+        for file in sorted(os.listdir(folder)):
+            if limb_io.is_limb_file(file):
+                limbs[os.path.splitext(file)[0]] = limb_io.load_limb_data(os.path.join(folder, file))
+        if limbs:
+            bodies[armature_name] = {n: _limb_section(d, "ue_bones") for n, d in limbs.items()}
+
+    pairs = [(s, t) for s in bodies for t in bodies if s != t]
+    if not pairs:
+        print("[AutoRig] Retarget benchmark needs at least two armatures")
+        return {}
+
+    # Skeletons are converted and joined once, each repeat is just the gathers
+    arrays = {}
+    for name, limbs in bodies.items():
+        merged = {}
+        for bones in limbs.values():
+            merged.update(bones)
+        arrays[name] = _bone_arrays(merged)
+    joins = {name: RetargetJoin(list(limbs.values())) for name, limbs in bodies.items()}
+    plans = {(s, t): joins[t].plan(arrays[s][0]) for s, t in pairs}
+
+    bone_total = 0
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for source, target in pairs:
+            names, heads, tails = arrays[source]
+            joins[target].apply(names, heads, tails, plans[source, target])
+            bone_total += len(names)
+    joined = bone_total / (time.perf_counter() - start)
+
+    bone_total = 0
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for source, target in pairs:
+            merged_target = {}
+            for bones in bodies[target].values():
+                merged_target.update(bones)
+            merged = {}
+            for bones in bodies[source].values():
+                merged.update({n: dict(b) for n, b in bones.items()})
+            _legacy_retarget(merged, merged_target)
+            bone_total += len(merged)
+    loop = bone_total / (time.perf_counter() - start)
+
+    print(f"[AutoRig] Retarget: {joined:,.0f} bones/s joined, {loop:,.0f} bones/s per-bone loop "
+          f"({len(pairs)} armature pairs x {repeats})")
+    return {"joined": joined, "loop": loop}
+
+
+if __name__ == "__main__":
+    hierarchy = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "Hierarchy"))
+    benchmark_retarget(hierarchy)
@@ -0,0 +1,375 @@
+import os
+import json
+import time
+import hashlib
+import tempfile
+
+from . import limb_io, json_journal, bone_defaults, retarget, rig_plan
+
+# Rig compiler: limb file + build mode -> flat operation plan.
+#
+# Compiling does everything the builders used to redo on every run without
+# bpy: defaults are filled, the limb is retargeted for the ctrl/def modes,
+# parents are ordered, `_` keys dropped, collections, shapes and colors
+# grouped, and only the pose settings that differ from a new bone's are
+# kept. The result is a list of operations per object mode:
+#
+#   EDIT    create_bone, set_parent
+#   POSE    assign_collection, set_custom_shape, set_bone_color, set_pose,
+#           set_property, clear_constraints, add_constraint, add_driver
+#   OBJECT  set_transform
+#
+# execute_plan() replays it. Plans are cached as JSON in Blender's user
+# cache folder (get_plan_dir), <key>.json, outside Hierarchy so nothing that
+# scans the limb library runs into them. The key hashes the limb bytes (the file, or
+# the archive member limb_io falls back to), the reference limb, the mode,
+# the scale and the addon and compiler versions, so an unchanged limb skips
+# compiling entirely.
+
+COMPILER_VERSION = 2
+
+# Build modes of the panel's mode selector. The ctrl/def modes place the
+# limb on the same limb of the other armature
+MODES = ("json", "ctrl_from_def", "def_from_ctrl")
+
+PLAN_SUBDIR = os.path.join("AutoRig", "plans")
+
+
+# ------------------------
+# Cache key
+# ------------------------
+
+def get_addon_version():
+    from .. import bl_info
+    return ".".join(str(v) for v in bl_info["version"])
+
+def _file_digest(path, digest):
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+
+def _limb_digest(path, digest):
+    # Hashes what limb_io.load_limb_data will actually read
+    from . import limb_archive
+
+    source, member = limb_io.resolve_limb_source(path)
+    if member is None:
+        _file_digest(source, digest)
+    else:
+        entry, packed = limb_archive.read_member_bytes(source, member)
+        digest.update(entry["codec"].encode())
+        digest.update(packed)
+
+def plan_key(limb_path, mode="json", reference_path=None, scale=1.0):
+    digest = hashlib.sha256()
+    digest.update(json.dumps([COMPILER_VERSION, get_addon_version(), mode, scale]).encode())
+    for path in (limb_path, reference_path):
+        if path:
+            digest.update(b"\0")
+            _limb_digest(path, digest)
+    return digest.hexdigest()[:32]
+
+def get_plan_dir():
+    # Blender's user cache folder, the system temp folder outside Blender
+    try:
+        import bpy # type: ignore
+        return bpy.utils.user_resource('CACHE', path=PLAN_SUBDIR)
+    except (ImportError, TypeError, ValueError):
+        return os.path.join(tempfile.gettempdir(), PLAN_SUBDIR)
+
+def get_plan_path(key, plan_dir=None):
+    return os.path.join(plan_dir or get_plan_dir(), f"{key}.json")
+
+
+# ------------------------
+# Compile
+# ------------------------
+
+def _group(records, key):
+    groups = {}
+    for name, record in records.items():
+        value = record.get(key)
+        if value is None:
+            continue
+        token = json.dumps(value, sort_keys=True)
+        groups.setdefault(token, (value, []))[1].append(name)
+    return groups.values()
+
+def _scaled(vec, scale):
+    return [v * scale for v in vec] if scale != 1.0 else list(vec)
+
+def _indexed_drivers(drivers):
+    # Limbs exported before array_index was saved list a vector's channels
+    # in order, so each repeat of a data_path is the next channel
+    seen = {}
+    result = []
+    for drv in drivers:
+        if "array_index" not in drv:
+            drv = dict(drv, array_index=seen.get(drv["data_path"], 0))
+        seen[drv["data_path"]] = drv["array_index"] + 1
+        result.append(drv)
+    return result
+
+def compile_limb(limb_path, mode="json", reference_path=None, scale=1.0):
+    """
+    Compiles one limb file into an operation plan. The ctrl_from_def and
+    def_from_ctrl modes retarget the limb onto reference_path, the same
+    limb from the other armature.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown build mode: {mode}")
+    if mode != "json" and not reference_path:
+        raise ValueError(f"Build mode '{mode}' needs a reference limb")
+
+    limb_key = os.path.splitext(os.path.basename(str(limb_path)))[0]
+    data = limb_io.load_limb_data(limb_path)
+    if mode != "json":
+        retarget.retarget_limbs({limb_key: data}, {limb_key: limb_io.load_limb_data(reference_path)})
+    plan = rig_plan.build_plan({limb_key: data})
+    bones = plan.bones
+
+    edit_ops = [["create_bone", name, _scaled(r.get("head") or [0, 0, 0], scale),
+                 _scaled(r.get("tail") or [0, 1, 0], scale)] for name, r in bones.items()]
+    edit_ops += [["set_parent", name, r["parent"]] for name, r in bones.items() if r.get("parent")]
+
+    pose_ops = []
+    collections = {}
+    for name, record in bones.items():
+        for col_name in record.get("bone_collections") or ():
+            collections.setdefault(col_name, []).append(name)
+    pose_ops += [["assign_collection", col_name, names] for col_name, names in collections.items()]
+    for key in ("custom_shape", "custom_shape_transform"):
+        pose_ops += [["set_custom_shape", key, shape, names] for shape, names in _group(bones, key)]
+    pose_ops += [["set_bone_color", color, names] for color, names in _group(bones, "bone_color")
+                 if color.get("palette")]
+
+    for name, record in bones.items():
+        # Only values a new bone does not already have, the executor fills
+        # the rest back in for bones that existed before the build
+        settings = bone_defaults.pose_settings_to_write(record, is_new_bone=True)
+        pose_ops.append(["set_pose", name, settings])
+        for key, value in (record.get("custom_properties") or {}).items():
+            pose_ops.append(["set_property", name, key, value])
+
+    pose_ops.append(["clear_constraints", list(bones)])
+    for name, record in bones.items():
+        pose_ops += [["add_constraint", name, con] for con in record.get("constraints") or ()]
+        pose_ops += [["add_driver", name, drv] for drv in _indexed_drivers(record.get("drivers") or ())]
+
+    transform = plan.meta.get("transform", {})
+    object_ops = [["set_transform", transform.get("location", [0.0, 0.0, 0.0]),
+                   transform.get("scale", [1.0, 1.0, 1.0])]]
+
+    return {
+        "version": COMPILER_VERSION,
+        "limb": limb_key,
+        "mode": mode,
+        "bones": list(bones),
+        "ops": {"OBJECT": object_ops, "EDIT": edit_ops, "POSE": pose_ops},
+    }
+
+def load_plan(limb_path, mode="json", reference_path=None, scale=1.0, plan_dir=None):
+    """
+    Returns (plan, cached). The compiled plan is read from the plan cache
+    when the inputs hash to a plan already there, otherwise compiled and
+    saved.
+    """
+    key = plan_key(limb_path, mode, reference_path, scale)
+    path = get_plan_path(key, plan_dir)
+    if os.path.isfile(path):
+        try:
+            with open(path, "r") as f:
+                return json.load(f), True
+        except ValueError:
+            print(f"[AutoRig] Discarding unreadable plan {path}")
+
+    plan = compile_limb(limb_path, mode, reference_path, scale)
+    plan["key"] = key
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    json_journal.atomic_write_json(path, plan, indent=None)
+    return plan, False
+
+def clear_plan_cache(plan_dir=None):
+    plan_dir = plan_dir or get_plan_dir()
+    removed = 0
+    if os.path.isdir(plan_dir):
+        for file in os.listdir(plan_dir):
+            if file.endswith(".json"):
+                os.remove(os.path.join(plan_dir, file))
+                removed += 1
+    return removed
+
+
+# ------------------------
+# Execute
+# ------------------------
+
+def _create_bone(ctx, name, head, tail):
+    ebones = ctx["ebones"]
+    ebone = ebones.get(name) or ebones.new(name)
+    ebone.head = head
+    ebone.tail = tail
+
+def _set_parent(ctx, name, parent):
+    parent_bone = ctx["ebones"].get(parent)
+    if parent_bone is None:
+        ctx["report"]["missing_parents"].append((name, parent))
+        return
+    ctx["ebones"][name].parent = parent_bone
+
+def _assign_collection(ctx, col_name, names):
+    armature = ctx["armature"]
+    col = armature.data.collections.get(col_name) or armature.data.collections.new(name=col_name)
+    for name in names:
+        bone = armature.data.bones.get(name)
+        if bone:
+            col.assign(bone)
+
+def _set_custom_shape(ctx, key, shape_name, names):
+    import bpy # type: ignore
+    shape = bpy.data.objects.get(shape_name)
+    if shape is None:
+        return
+    for name in names:
+        pose_bone = ctx["pose_bones"].get(name)
+        if pose_bone:
+            setattr(pose_bone, key, shape)
+
+def _set_bone_color(ctx, color, names):
+    custom = color.get("custom_colors") or {}
+    for name in names:
+        pose_bone = ctx["pose_bones"].get(name)
+        if pose_bone is None or not hasattr(pose_bone, "bone_color"):
+            continue
+        pose_bone.bone_color.palette = color["palette"]
+        if color["palette"] == 'CUSTOM':
+            for slot in ("normal", "select", "active"):
+                if slot in custom:
+                    setattr(pose_bone.bone_color.custom, slot, custom[slot])
+
+def _set_pose(ctx, name, settings):
+    pose_bone = ctx["pose_bones"].get(name)
+    if pose_bone is None:
+        return
+    is_new = name not in ctx["existing"]
+    for key, value in bone_defaults.pose_settings_to_write(settings, is_new).items():
+        setattr(pose_bone, key, value)
+
+def _set_property(ctx, name, key, value):
+    pose_bone = ctx["pose_bones"].get(name)
+    if pose_bone is not None:
+        pose_bone[key] = value
+
+def _clear_constraints(ctx, names):
+    for name in names:
+        pose_bone = ctx["pose_bones"].get(name)
+        if pose_bone is None or name not in ctx["existing"]:
+            continue
+        for con in list(pose_bone.constraints):
+            pose_bone.constraints.remove(con)
+
+def _add_constraint(ctx, name, data):
+    from . import constraint_schema
+    pose_bone = ctx["pose_bones"].get(name)
+    if pose_bone is None:
+        return
+    con = pose_bone.constraints.new(type=data["type"])
+    con.name = data.get("name", con.name)
+    constraint_schema.apply_constraint_values(con, data)
+
+def _is_array_path(armature, path):
+    try:
+        value = armature.path_resolve(path)
+    except ValueError:
+        return False
+    return hasattr(value, "__len__") and not isinstance(value, str)
+
+def _add_driver(ctx, name, data):
+    import bpy # type: ignore
+    armature = ctx["armature"]
+    path = data["data_path"]
+    if _is_array_path(armature, path):
+        # One channel per driver, never every channel of the vector
+        index = data.get("array_index", 0)
+        armature.driver_remove(path, index)
+        fcurve = armature.driver_add(path, index)
+    else:
+        armature.driver_remove(path)
+        fcurve = armature.driver_add(path)
+
+    driver = fcurve.driver
+    driver.expression = data.get("expression", "")
+    for var_data in data.get("variables") or ():
+        var = driver.variables.new()
+        var.name = var_data["name"]
+        var.type = var_data["type"]
+        if var.targets and var_data.get("target_id"):
+            var.targets[0].id = bpy.data.objects.get(var_data["target_id"])
+            var.targets[0].data_path = var_data.get("data_path") or ""
+
+def _set_transform(ctx, location, scale):
+    ctx["armature"].location = location
+    ctx["armature"].scale = scale
+
+OPS = {
+    "create_bone": _create_bone,
+    "set_parent": _set_parent,
+    "assign_collection": _assign_collection,
+    "set_custom_shape": _set_custom_shape,
+    "set_bone_color": _set_bone_color,
+    "set_pose": _set_pose,
+    "set_property": _set_property,
+    "clear_constraints": _clear_constraints,
+    "add_constraint": _add_constraint,
+    "add_driver": _add_driver,
+    "set_transform": _set_transform,
+}
+
+def _replay(ctx, ops):
+    for op in ops:
+        OPS[op[0]](ctx, *op[1:])
+
+def execute_plan(armature, plan):
+    """
+    Replays a compiled plan on armature: OBJECT ops, then the EDIT ops in
+    one EDIT session, then the POSE ops. Returns a bone_builder style
+    report.
+    """
+    from . import bone_builder, rig_diff
+
+    start_calls = bone_builder.get_ops_call_count()
+    ops = plan["ops"]
+    existing = set(armature.data.bones.keys())
+    ctx = {
+        "armature": armature,
+        "existing": existing,
+        "report": {"created": 0, "updated": 0, "missing_parents": [], "ops": 0},
+    }
+
+    _replay(ctx, ops.get("OBJECT", ()))
+    with bone_builder.edit_session(armature, exit_mode='POSE') as ebones:
+        ctx["ebones"] = ebones
+        _replay(ctx, ops.get("EDIT", ()))
+    ctx["pose_bones"] = armature.pose.bones
+    _replay(ctx, ops.get("POSE", ()))
+    bone_builder.mode_set('OBJECT')
+
+    report = ctx["report"]
+    report["created"] = len([n for n in plan["bones"] if n not in existing])
+    report["updated"] = len(plan["bones"]) - report["created"]
+    report["ops"] = sum(len(o) for o in ops.values())
+    report["ops_calls"] = bone_builder.get_ops_call_count() - start_calls
+    rig_diff.record_built_bones(armature, plan["limb"], plan["bones"])
+    return report
+
+def build_limb(armature, limb_path, mode="json", reference_path=None, scale=1.0):
+    """Compiles limb_path (or loads its cached plan) and replays it on armature."""
+    start = time.perf_counter()
+    plan, cached = load_plan(limb_path, mode, reference_path, scale)
+    compiled = time.perf_counter()
+    report = execute_plan(armature, plan)
+    report["cached"] = cached
+    print(f"[AutoRig] {'Cached' if cached else 'Compiled'} plan for '{plan['limb']}' "
+          f"({report['ops']} ops) in {(compiled - start) * 1000:.1f} ms, "
+          f"executed in {(time.perf_counter() - compiled) * 1000:.1f} ms")
+    return report
@@ -0,0 +1,268 @@
+import json
+import time
+
+from . import bone_defaults, bone_collections, constraint_schema
+
+# Incremental rebuilds.
+#
+# The armature is snapshotted without leaving OBJECT mode (data.bones and
+# pose.bones), diffed per bone against the limb records and only the
+# differences are written. EDIT mode is entered only when a bone has to be
+# added, removed, moved or reparented; pose-level fields are patched in
+# place. The names built from each limb are kept on the armature object in
+# BUILT_BONES_PROP, so bones dropped from a limb file can be removed.
+#
+# Snapshot and diff do not import bpy, only applying the diff does.
+
+BUILT_BONES_PROP = "_autorig_built_bones"
+GEOMETRY_TOLERANCE = 1e-5
+
+EDIT_FIELDS = {"head", "tail", "parent"}
+
+
+# ------------------------
+# Built bone tracking
+# ------------------------
+
+def get_built_bones(armature, limb_key):
+    try:
+        return json.loads(armature.get(BUILT_BONES_PROP, "{}")).get(limb_key, [])
+    except ValueError:
+        return []
+
+def record_built_bones(armature, limb_key, names):
+    try:
+        built = json.loads(armature.get(BUILT_BONES_PROP, "{}"))
+    except ValueError:
+        built = {}
+    built[limb_key] = list(names)
+    armature[BUILT_BONES_PROP] = json.dumps(built)
+
+
+# ------------------------
+# Snapshot and diff
+# ------------------------
+
+def _serialize_constraint(constraint):
+    d = {"name": constraint.name, "type": constraint.type}
+    d.update(constraint_schema.serialize_constraint_values(constraint))
+    return d
+
+def snapshot_bone(armature, name):
+    bone = armature.data.bones.get(name)
+    pose_bone = armature.pose.bones.get(name)
+    if bone is None or pose_bone is None:
+        return None
+
+    snapshot = {
+        "head": list(bone.head_local),
+        "tail": list(bone.tail_local),
+        "parent": bone.parent.name if bone.parent else None,
+        "bone_collections": sorted(c.name for c in bone.collections) if hasattr(bone, "collections") else [],
+        "custom_shape": pose_bone.custom_shape.name if pose_bone.custom_shape else None,
+        "custom_shape_transform": pose_bone.custom_shape_transform.name if pose_bone.custom_shape_transform else None,
+        "bone_color": bone_collections.read_bone_color(pose_bone),
+        # Serialized on demand, most bones carry none
+        "constraints": [_serialize_constraint(c) for c in pose_bone.constraints] if len(pose_bone.constraints) else [],
+    }
+    for key in bone_defaults.POSE_SETTINGS:
+        value = getattr(pose_bone, key)
+        snapshot[key] = value if isinstance(value, (str, bool, int, float)) else list(value)
+    return snapshot
+
+def snapshot_armature(armature, names):
+    return {name: snapshot_bone(armature, name) for name in names}
+
+def _vectors_differ(a, b):
+    return any(abs(x - y) > GEOMETRY_TOLERANCE for x, y in zip(a, b))
+
+def _values_differ(a, b):
+    if isinstance(a, (list, tuple)) and isinstance(b, (list, tuple)):
+        return len(a) != len(b) or any(_values_differ(x, y) for x, y in zip(a, b))
+    if isinstance(a, float) or isinstance(b, float):
+        try:
+            return abs(a - b) > GEOMETRY_TOLERANCE
+        except TypeError:
+            return True
+    return a != b
+
+def _constraints_differ(current, wanted, objects=None):
+    if len(current) != len(wanted):
+        return True
+    for have, want in zip(current, wanted):
+        # name, type and the schema keys of the live constraint; anything
+        # else the file saved (bl_rna, is_valid, ...) cannot be written back.
+        # Targets missing from objects compare as None, as the builder sets them
+        ids = constraint_schema.id_properties(have["type"]) if objects is not None else ()
+        for key, value in have.items():
+            if key not in want:
+                continue
+            wanted_value = want[key]
+            if key in ids and wanted_value not in objects:
+                wanted_value = None
+            if _values_differ(value, wanted_value):
+                return True
+    return False
+
+def _bone_color_differs(current, wanted):
+    # The builders leave bones without a saved palette alone
+    if current is None or not wanted or not wanted.get("palette"):
+        return False
+    if current["palette"] != wanted["palette"]:
+        return True
+    if wanted["palette"] != 'CUSTOM':
+        return False
+    have = current.get("custom_colors") or {}
+    return any(_values_differ(have.get(slot), value)
+               for slot, value in (wanted.get("custom_colors") or {}).items())
+
+def diff_bones(snapshot, bones, built_names=(), objects=None):
+    """
+    Compares an armature snapshot with {name: record} limb bones. Returns
+    {"added": [names], "removed": [names], "changed": {name: [fields]}}.
+    removed lists bones built from this limb before that are gone from it.
+    Custom shapes missing from objects (a set of names) compare as None,
+    the same as the builder leaves them.
+    """
+    added, changed = [], {}
+    for name, record in bones.items():
+        current = snapshot.get(name)
+        if current is None:
+            added.append(name)
+            continue
+
+        fields = []
+        head = record.get("head") or [0, 0, 0]
+        tail = record.get("tail") or [0, 1, 0]
+        if _vectors_differ(current["head"], head):
+            fields.append("head")
+        if _vectors_differ(current["tail"], tail):
+            fields.append("tail")
+        if current["parent"] != record.get("parent"):
+            fields.append("parent")
+        if current["bone_collections"] != sorted(record.get("bone_collections") or []):
+            fields.append("bone_collections")
+        for key in ("custom_shape", "custom_shape_transform"):
+            wanted = record.get(key)
+            if objects is not None and wanted not in objects:
+                wanted = None
+            if current[key] != wanted:
+                fields.append(key)
+        if _bone_color_differs(current["bone_color"], record.get("bone_color")):
+            fields.append("bone_color")
+        for key in bone_defaults.POSE_SETTINGS:
+            if _values_differ(current[key], record.get(key, bone_defaults.BONE_DEFAULTS[key])):
+                fields.append(key)
+        if _constraints_differ(current["constraints"], record.get("constraints") or [], objects):
+            fields.append("constraints")
+
+        if fields:
+            changed[name] = fields
+
+    removed = [name for name in built_names if name not in bones and snapshot.get(name) is not None]
+    return {"added": added, "removed": removed, "changed": changed}
+
+
+# ------------------------
+# Apply
+# ------------------------
+
+def _apply_collections(armature, bone, names):
+    collections = armature.data.collections
+    for col in list(bone.collections):
+        if col.name not in names:
+            col.unassign(bone)
+    for col_name in names:
+        col = collections.get(col_name) or collections.new(name=col_name)
+        col.assign(bone)
+
+def _apply_constraints(pose_bone, constraints):
+    for con in list(pose_bone.constraints):
+        pose_bone.constraints.remove(con)
+    for data in constraints:
+        con = pose_bone.constraints.new(type=data["type"])
+        con.name = data.get("name", con.name)
+        constraint_schema.apply_constraint_values(con, data)
+
+def apply_pose_fields(armature, name, record, fields):
+    import bpy # type: ignore
+
+    pose_bone = armature.pose.bones[name]
+    for key in fields:
+        if key == "bone_collections":
+            _apply_collections(armature, pose_bone.bone, record.get("bone_collections") or [])
+        elif key == "bone_color":
+            bone_collections.apply_bone_colors(armature, {name: record})
+        elif key in ("custom_shape", "custom_shape_transform"):
+            setattr(pose_bone, key, bpy.data.objects.get(record.get(key) or ""))
+        elif key == "constraints":
+            _apply_constraints(pose_bone, record.get("constraints") or [])
+        elif key in bone_defaults.POSE_SETTINGS:
+            setattr(pose_bone, key, record.get(key, bone_defaults.BONE_DEFAULTS[key]))
+
+def apply_diff(armature, bones, diff):
+    from . import bone_builder
+
+    edit_bones = set(diff["added"]) | {n for n, f in diff["changed"].items() if EDIT_FIELDS & set(f)}
+    if edit_bones or diff["removed"]:
+        with bone_builder.edit_session(armature) as ebones:
+            for name in diff["removed"]:
+                if name in ebones:
+                    ebones.remove(ebones[name])
+            for name in diff["added"]:
+                ebones.new(name)
+            for name in edit_bones:
+                record = bones[name]
+                ebone = ebones[name]
+                ebone.head = record.get("head") or [0, 0, 0]
+                ebone.tail = record.get("tail") or [0, 1, 0]
+            # Parents last, an added bone may parent to another added one
+            for name in edit_bones:
+                parent = bones[name].get("parent")
+                ebones[name].parent = ebones.get(parent) if parent else None
+
+    # Pose-level fields are written from OBJECT mode, added bones get the
+    # fields that differ from what Blender starts them with
+    for name in diff["added"]:
+        record = bones[name]
+        fields = ["bone_collections", "custom_shape", "custom_shape_transform", "bone_color", "constraints"]
+        fields += list(bone_defaults.pose_settings_to_write(record, is_new_bone=True))
+        apply_pose_fields(armature, name, record, fields)
+    for name, fields in diff["changed"].items():
+        apply_pose_fields(armature, name, bones[name], [f for f in fields if f not in EDIT_FIELDS])
+
+def rebuild_incremental(armature, limb_key, bones):
+    """
+    Patches armature to match bones ({name: record}) and returns a report
+    with added/changed/removed counts, the ops calls made and the time.
+    """
+    import bpy # type: ignore
+    from . import bone_builder
+
+    start = time.perf_counter()
+    start_calls = bone_builder.get_ops_call_count()
+
+    if armature.mode == 'EDIT':
+        # data.bones only reflects edits once EDIT mode is left
+        bpy.context.view_layer.objects.active = armature
+        bone_builder.mode_set('OBJECT')
+
+    built = get_built_bones(armature, limb_key)
+    snapshot = snapshot_armature(armature, set(bones) | set(built))
+    diff = diff_bones(snapshot, bones, built, objects=set(bpy.data.objects.keys()))
+
+    if diff["added"] or diff["removed"] or diff["changed"]:
+        apply_diff(armature, bones, diff)
+    record_built_bones(armature, limb_key, bones)
+
+    report = {
+        "added": len(diff["added"]),
+        "changed": len(diff["changed"]),
+        "removed": len(diff["removed"]),
+        "ops_calls": bone_builder.get_ops_call_count() - start_calls,
+        "seconds": time.perf_counter() - start,
+    }
+    print(f"[AutoRig] Incremental rebuild of '{limb_key}' on '{armature.name}': "
+          f"{report['added']} added, {report['changed']} changed, {report['removed']} removed "
+          f"in {report['seconds'] * 1000:.1f} ms")
+    return report
@@ -0,0 +1,118 @@
+from collections import OrderedDict
+
+from . import limb_io
+
+# Full-body build planning, no bpy involved.
+#
+# The chains in Hierarchy/limb_chains.json are resolved against the limbs a
+# source armature actually has. Their bones are merged into one plan ordered
+# so every parent comes before its children, across limbs as well
+# (clavicle_l -> spine_05 lives in arm_l and spine). Parents that are in no
+# limb of the plan are kept as external and left to the builder, which
+# parents to them when the armature already has those bones.
+
+
+class RigPlan:
+    def __init__(self):
+        self.meta = {}
+        self.bones = OrderedDict()      # name -> record, parents first
+        self.sections = {}              # name -> "ue_bones" / "controllers"
+        self.limbs = {}                 # name -> limb it came from
+        self.external_parents = {}      # name -> parent outside the plan
+        self.duplicates = []            # (name, limb) skipped, first limb wins
+
+    def __len__(self):
+        return len(self.bones)
+
+    def to_dict(self):
+        # JSON-safe, bones keep their order
+        return {
+            "meta": self.meta,
+            "bones": [[name, record] for name, record in self.bones.items()],
+            "sections": self.sections,
+            "limbs": self.limbs,
+            "external_parents": self.external_parents,
+            "duplicates": [list(d) for d in self.duplicates],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        plan = cls()
+        plan.meta = data.get("meta", {})
+        plan.bones = OrderedDict((name, record) for name, record in data.get("bones", ()))
+        plan.sections = data.get("sections", {})
+        plan.limbs = data.get("limbs", {})
+        plan.external_parents = data.get("external_parents", {})
+        plan.duplicates = [tuple(d) for d in data.get("duplicates", ())]
+        return plan
+
+    def summary(self):
+        limbs = sorted(set(self.limbs.values()))
+        return (f"{len(self.bones)} bones from {len(limbs)} limbs, "
+                f"{len(self.external_parents)} external parents, {len(self.duplicates)} duplicates")
+
+
+def resolve_chains(chains, available_limbs):
+    """
+    Chain names from limb_chains.json (list or {armature: list}) that the
+    source armature has a limb for, in chain file order.
+    """
+    if isinstance(chains, dict):
+        chains = [c for group in chains.values() for c in group]
+    available = set(available_limbs)
+    names = []
+    for chain in chains or ():
+        name = chain.get("name")
+        if name in available and name not in names:
+            names.append(name)
+    return names
+
+def topological_order(parents):
+    """
+    Orders {name: parent} so every parent in the mapping comes before its
+    children, keeping the input order otherwise. Cycles are broken where
+    they are found.
+    """
+    order = []
+    state = {}  # 1 = on the current path, 2 = placed
+    for name in parents:
+        path = []
+        node = name
+        while node in parents and node not in state:
+            state[node] = 1
+            path.append(node)
+            node = parents[node]
+        if node in parents and state.get(node) == 1:
+            print(f"[AutoRig] Parent cycle at '{node}', breaking it")
+        for node in reversed(path):
+            state[node] = 2
+            order.append(node)
+    return order
+
+def build_plan(limbs):
+    """
+    Merges {limb name: limb data} into a RigPlan. _meta comes from the
+    first limb.
+    """
+    plan = RigPlan()
+    merged = OrderedDict()
+    for limb_name, data in limbs.items():
+        if not plan.meta:
+            plan.meta = data.get("_meta", {})
+        _, sections = limb_io.split_limb_sections(data)
+        for section, bones in sections.items():
+            for name, record in bones.items():
+                if name in merged:
+                    plan.duplicates.append((name, limb_name))
+                    continue
+                merged[name] = record
+                plan.sections[name] = section
+                plan.limbs[name] = limb_name
+
+    parents = {name: record.get("parent") for name, record in merged.items()}
+    for name in topological_order(parents):
+        plan.bones[name] = merged[name]
+        parent = parents[name]
+        if parent and parent not in merged:
+            plan.external_parents[name] = parent
+    return plan
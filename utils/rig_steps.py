@@ -0,0 +1,41 @@
+import time
+
+# Resumable build and export steps.
+#
+# Long builds and exports are written as generators that yield
+# (done, total) after each small unit of work and return their report.
+# The blocking call exhausts the generator in one go with run_steps(); the
+# modal operators advance it from a timer with advance() under a time
+# budget. Closing the generator cancels the work, and each generator rolls
+# back its own changes when that happens.
+
+CHUNK_SIZE = 32
+
+
+def run_steps(steps):
+    """Exhausts a step generator and returns its report."""
+    while True:
+        try:
+            next(steps)
+        except StopIteration as stop:
+            return stop.value
+
+def advance(steps, budget):
+    """
+    Advances steps for up to budget seconds. Returns (finished, progress,
+    report), progress being the last (done, total) yielded.
+    """
+    deadline = time.perf_counter() + budget
+    progress = None
+    while True:
+        try:
+            progress = next(steps)
+        except StopIteration as stop:
+            return True, progress, stop.value
+        if time.perf_counter() >= deadline:
+            return False, progress, None
+
+def chunks(items, size=CHUNK_SIZE):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
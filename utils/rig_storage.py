@@ -0,0 +1,376 @@
+import os
+import json
+import sqlite3
+from datetime import datetime
+
+from . import limb_io, limb_writer, bone_defaults, bone_store
+
+# Storage backends for the rig library. Both expose the same calls, so the
+# enum callbacks, the builders and the exporter do not care whether limbs
+# live as JSON files under Hierarchy/<armature>/ or in a SQLite database.
+#
+#   armature_items(is_deform)         -> enum items for the armature selectors
+#   limb_items(armature_name)         -> enum items for the limb selectors
+#   limb_path(armature_name, limb)    -> file the compiler and loaders can read
+#   read_limb(armature_name, limb)    -> limb dict as found in the JSON files
+#   write_limb(armature_name, limb, data, path=None, is_deform=False, notes="")
+#   write_limb_stream(armature_name, limb, meta, bones, path=None, ...)
+#                                     -> same, bones being (section, name, record);
+#                                        dedupe=True writes a bone store manifest
+
+BACKEND_ITEMS = [
+    ('folder', "Folders", "One JSON file per limb under Hierarchy/<armature>/"),
+    ('sqlite', "SQLite", "Single rig_library.sqlite database"),
+]
+
+DB_FILENAME = "rig_library.sqlite"
+# Limbs of the database written out for the file based readers, next to it
+EXPORT_DIRNAME = ".limbs"
+
+SECTIONS = ("ue_bones", "controllers")
+
+_active = {"backend": "folder", "instances": {}}
+
+
+def set_storage_backend(name):
+    if name not in {key for key, _, _ in BACKEND_ITEMS}:
+        raise ValueError(f"Unknown storage backend: {name}")
+    _active["backend"] = name
+
+def collect_limb_stream(meta, bones):
+    data = {"_meta": dict(meta), "ue_bones": {}, "controllers": {}}
+    for section, name, record in bones:
+        data[section][name] = record
+    data["_meta"]["bone_count"] = len(data["ue_bones"]) + len(data["controllers"])
+    return data
+
+def _scene_backend():
+    # The scene property survives a .blend reload, the update callback does not fire then
+    try:
+        import bpy # type: ignore
+    except ImportError:
+        return None
+    scene = getattr(bpy.context, "scene", None)
+    props = getattr(scene, "autorig_props", None)
+    return getattr(props, "storage_backend", None)
+
+def get_storage():
+    from . import armature_registry
+
+    name = _scene_backend() or _active["backend"]
+    _active["backend"] = name
+    if name == "sqlite":
+        db_path = os.path.join(armature_registry.get_hierarchy_dir(), DB_FILENAME)
+        key = ("sqlite", db_path)
+    else:
+        key = ("folder",)
+
+    storage = _active["instances"].get(key)
+    if storage is None:
+        storage = SQLiteStorage(db_path) if name == "sqlite" else FolderStorage()
+        _active["instances"][key] = storage
+    return storage
+
+
+# ------------------------
+# Folder backend
+# ------------------------
+
+class FolderStorage:
+    name = "folder"
+
+    def armature_items(self, is_deform=True):
+        from . import armature_registry
+        return armature_registry.get_cached_registry_items(is_deform)
+
+    def limb_items(self, armature_name):
+        from . import armature_registry, limb_catalogue, limb_archive
+        folder = armature_registry.get_armature_dir(armature_name)
+        items = limb_catalogue.get_limb_items(armature_name, folder)
+        if items is limb_catalogue.NO_LIMB_ITEMS:
+            # Armatures shipped as a single archive list their members from the TOC
+            archive = limb_archive.get_archive_path(folder)
+            if os.path.isfile(archive):
+                return limb_archive.get_limb_items(archive)
+        return items
+
+    def limb_path(self, armature_name, limb_name):
+        from . import armature_registry
+        folder = armature_registry.get_armature_dir(armature_name)
+        return limb_io.find_limb_file(folder, limb_name) or os.path.join(folder, f"{limb_name}.json")
+
+    def read_limb(self, armature_name, limb_name):
+        return limb_io.load_limb_data(self.limb_path(armature_name, limb_name))
+
+    def write_limb(self, armature_name, limb_name, data, path=None, is_deform=False, notes=""):
+        path = path or self.limb_path(armature_name, limb_name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        limb_io.write_limb_data(path, data)
+        self._after_write(armature_name, path, data.get("_meta", {}).get("bone_count"), is_deform, notes)
+        return path
+
+    def write_limb_stream(self, armature_name, limb_name, meta, bones, path=None,
+                          is_deform=False, notes="", pretty=False, dedupe=False):
+        path = path or self.limb_path(armature_name, limb_name)
+        if not path.endswith(".json"):
+            # The binary container needs every bone before it can lay out its arrays
+            return self.write_limb(armature_name, limb_name, collect_limb_stream(meta, bones),
+                                   path=path, is_deform=is_deform, notes=notes)
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if dedupe:
+            # Armature folders sit directly under Hierarchy/, next to the store
+            hierarchy_dir = os.path.dirname(os.path.dirname(os.path.abspath(path)))
+            bone_count = bone_store.write_manifest(path, meta, bones, bone_store.get_store_dir(hierarchy_dir))
+        else:
+            bone_count = limb_writer.write_limb_stream(path, meta, bones, pretty=pretty)
+        self._after_write(armature_name, path, bone_count, is_deform, notes)
+        return path
+
+    def _after_write(self, armature_name, path, bone_count, is_deform, notes):
+        from . import armature_registry, limb_catalogue
+
+        # Re-exporting in the other format replaces the old file
+        for ext in limb_io.LIMB_EXTENSIONS:
+            stale = f"{os.path.splitext(path)[0]}{ext}"
+            if stale != path and os.path.exists(stale):
+                print(f"[AutoRig] Removing superseded limb file: {stale}")
+                os.remove(stale)
+        limb_catalogue.record_limb_file(armature_name, os.path.abspath(path), bone_count)
+
+        armature_registry.create_or_update_entry(
+            name=armature_name,
+            path=os.path.abspath(os.path.dirname(path)),
+            is_deform=is_deform,
+            notes=notes,
+        )
+
+
+# ------------------------
+# SQLite backend
+# ------------------------
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS armatures (
+    id          INTEGER PRIMARY KEY,
+    name        TEXT NOT NULL UNIQUE,
+    created     TEXT,
+    is_deform   INTEGER NOT NULL DEFAULT 0,
+    notes       TEXT DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS limbs (
+    id          INTEGER PRIMARY KEY,
+    armature_id INTEGER NOT NULL REFERENCES armatures(id) ON DELETE CASCADE,
+    name        TEXT NOT NULL,
+    layout      TEXT NOT NULL DEFAULT 'sections',
+    meta        TEXT,
+    bone_count  INTEGER NOT NULL DEFAULT 0,
+    updated     TEXT,
+    UNIQUE (armature_id, name)
+);
+CREATE TABLE IF NOT EXISTS bones (
+    id          INTEGER PRIMARY KEY,
+    limb_id     INTEGER NOT NULL REFERENCES limbs(id) ON DELETE CASCADE,
+    position    INTEGER NOT NULL,
+    section     TEXT NOT NULL,
+    name        TEXT NOT NULL,
+    parent      TEXT,
+    data        TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_armatures_deform ON armatures (is_deform, name);
+CREATE INDEX IF NOT EXISTS idx_limbs_armature ON limbs (armature_id, name);
+CREATE INDEX IF NOT EXISTS idx_limbs_name ON limbs (name);
+CREATE INDEX IF NOT EXISTS idx_bones_limb ON bones (limb_id, position);
+CREATE INDEX IF NOT EXISTS idx_bones_name ON bones (name);
+"""
+
+
+class SQLiteStorage:
+    name = "sqlite"
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._conn = None
+        # Enum item lists handed to Blender, kept alive until the data changes
+        self._items = {}
+        self._items_version = None
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path)
+            self._conn.execute("PRAGMA foreign_keys = ON")
+            self._conn.execute("PRAGMA journal_mode = WAL")
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _cached_items(self, key, build):
+        # data_version moves when another connection commits, our own
+        # writes clear the cache directly
+        version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        if version != self._items_version:
+            self._items = {}
+            self._items_version = version
+        if key not in self._items:
+            self._items[key] = build()
+        return self._items[key]
+
+    def armature_items(self, is_deform=True):
+        def build():
+            rows = self.conn.execute(
+                "SELECT name FROM armatures WHERE is_deform = ? ORDER BY name",
+                (1 if is_deform else 0,),
+            )
+            return [(name, name, "") for (name,) in rows]
+        return self._cached_items(("armatures", bool(is_deform)), build)
+
+    def limb_items(self, armature_name):
+        def build():
+            rows = self.conn.execute(
+                "SELECT l.name, l.bone_count FROM limbs l "
+                "JOIN armatures a ON a.id = l.armature_id "
+                "WHERE a.name = ? ORDER BY l.name",
+                (armature_name,),
+            )
+            items = [(name, name, f"{count} bones") for name, count in rows]
+            return items or [("none", "No limbs found", "")]
+        return self._cached_items(("limbs", armature_name), build)
+
+    def read_limb(self, armature_name, limb_name):
+        row = self.conn.execute(
+            "SELECT l.id, l.layout, l.meta FROM limbs l "
+            "JOIN armatures a ON a.id = l.armature_id "
+            "WHERE a.name = ? AND l.name = ?",
+            (armature_name, limb_name),
+        ).fetchone()
+        if row is None:
+            raise FileNotFoundError(f"[ERROR] Limb not found in {self.db_path}: {armature_name}/{limb_name}")
+
+        limb_id, layout, meta = row
+        data = {"_meta": json.loads(meta) if meta else {}}
+        if layout == "sections":
+            for section in SECTIONS:
+                data[section] = {}
+
+        rows = self.conn.execute(
+            "SELECT section, name, data FROM bones WHERE limb_id = ? ORDER BY position",
+            (limb_id,),
+        )
+        for section, name, bone_data in rows:
+            target = data[section] if layout == "sections" else data
+            target[name] = json.loads(bone_data)
+        return bone_defaults.fill_limb_defaults(data)
+
+    def limb_path(self, armature_name, limb_name):
+        # Rewritten only when the stored limb changed, so the file's bytes
+        # (and the compiled plan keyed on them) stay put between builds
+        path = os.path.join(os.path.dirname(self.db_path), EXPORT_DIRNAME,
+                            armature_name, f"{limb_name}.json")
+        text = json.dumps(self.read_limb(armature_name, limb_name), separators=(",", ":"))
+        if os.path.isfile(path):
+            with open(path, "r") as f:
+                if f.read() == text:
+                    return path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def _upsert_armature(self, armature_name, is_deform=False, notes=""):
+        self.conn.execute(
+            "INSERT INTO armatures (name, created, is_deform, notes) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET is_deform = excluded.is_deform, notes = excluded.notes",
+            (armature_name, datetime.now().strftime("%Y-%m-%d"), 1 if is_deform else 0, notes),
+        )
+        return self.conn.execute("SELECT id FROM armatures WHERE name = ?", (armature_name,)).fetchone()[0]
+
+    def _write_limb_rows(self, armature_id, limb_name, data):
+        layout, sections = limb_io.split_limb_sections(data)
+        bone_count = sum(len(bones) for bones in sections.values())
+        self.conn.execute(
+            "INSERT INTO limbs (armature_id, name, layout, meta, bone_count, updated) VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(armature_id, name) DO UPDATE SET layout = excluded.layout, meta = excluded.meta, "
+            "bone_count = excluded.bone_count, updated = excluded.updated",
+            (armature_id, limb_name, layout, json.dumps(data.get("_meta", {}), separators=(",", ":")),
+             bone_count, datetime.now().isoformat(timespec="seconds")),
+        )
+        limb_id = self.conn.execute(
+            "SELECT id FROM limbs WHERE armature_id = ? AND name = ?", (armature_id, limb_name)
+        ).fetchone()[0]
+
+        self.conn.execute("DELETE FROM bones WHERE limb_id = ?", (limb_id,))
+        rows = []
+        position = 0
+        for section, bones in sections.items():
+            for name, bone in bones.items():
+                rows.append((limb_id, position, section, name, bone.get("parent"),
+                             json.dumps(bone, separators=(",", ":"))))
+                position += 1
+        self.conn.executemany(
+            "INSERT INTO bones (limb_id, position, section, name, parent, data) VALUES (?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+
+    def write_limb(self, armature_name, limb_name, data, path=None, is_deform=False, notes=""):
+        with self.conn:
+            armature_id = self._upsert_armature(armature_name, is_deform, notes)
+            self._write_limb_rows(armature_id, limb_name, data)
+        self._items = {}
+        return f"{self.db_path}::{armature_name}/{limb_name}"
+
+    def write_limb_stream(self, armature_name, limb_name, meta, bones, path=None,
+                          is_deform=False, notes="", pretty=False, dedupe=False):
+        return self.write_limb(armature_name, limb_name, collect_limb_stream(meta, bones),
+                               is_deform=is_deform, notes=notes)
+
+
+# ------------------------
+# Folder -> SQLite import
+# ------------------------
+
+def import_folder_library(hierarchy_dir, storage):
+    """
+    Copies every Hierarchy/<armature>/<limb>.json into the given SQLite
+    storage. is_deform and notes come from armature_registry.json when the
+    armature is listed there.
+    """
+    registry = {}
+    registry_path = os.path.join(hierarchy_dir, "armature_registry.json")
+    if os.path.isfile(registry_path):
+        with open(registry_path, "r") as f:
+            registry = {a["name"]: a for a in json.load(f)}
+
+    imported = 0
+    with storage.conn:
+        for armature_name in sorted(os.listdir(hierarchy_dir)):
+            folder = os.path.join(hierarchy_dir, armature_name)
+            if armature_name.startswith(".") or not os.path.isdir(folder):
+                continue
+            limb_files = [f for f in sorted(os.listdir(folder)) if limb_io.is_limb_file(f)]
+            if not limb_files:
+                continue
+
+            entry = registry.get(armature_name, {})
+            armature_id = storage._upsert_armature(
+                armature_name,
+                is_deform=entry.get("is_deform", False),
+                notes=entry.get("notes", ""),
+            )
+            for file in limb_files:
+                try:
+                    data = limb_io.load_limb_data(os.path.join(folder, file))
+                except Exception as e:
+                    print(f"[AutoRig] Skipping {armature_name}/{file}: {e}")
+                    continue
+                storage._write_limb_rows(armature_id, os.path.splitext(file)[0], data)
+                imported += 1
+
+    storage._items = {}
+    print(f"[AutoRig] Imported {imported} limbs into {storage.db_path}")
+    return imported